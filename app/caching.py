@@ -0,0 +1,150 @@
+"""
+HTTP caching: ETags for per-user read endpoints, and a short-TTL cache for
+identical /search requests.
+
+Every user has a documents_version counter (users table), bumped in the same
+transaction as a document create/upload/index. It's the ETag of the user's
+listings, so a client revalidating with If-None-Match gets a 304 when
+nothing changed. Versions are cached in-process for ETAG_VERSION_TTL
+seconds, so repeated revalidations don't touch the database at all; a write
+through another worker is seen once that short TTL runs out.
+
+/search results are cached per identical request for SEARCH_CACHE_TTL
+seconds and dropped whenever this process indexes documents.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app import models
+
+ETAG_VERSION_TTL = float(os.getenv("ETAG_VERSION_TTL", "2"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))  # 0 disables
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire ttl seconds after being set"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_versions = TTLCache(maxsize=100_000, ttl=ETAG_VERSION_TTL)
+search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+_index_generation = 0
+_generation_lock = threading.Lock()
+
+
+# ---------- per-user versions and ETags ----------
+
+def _version_statement(user_id: int):
+    return select(models.User.documents_version).where(models.User.id == user_id)
+
+
+def documents_version(db: Session, user_id: int) -> Optional[int]:
+    """The user's documents_version (None: no such user), cached for ETAG_VERSION_TTL"""
+    version = _versions.get(user_id)
+    if version is None:
+        version = db.execute(_version_statement(user_id)).scalar()
+        if version is not None:
+            _versions.set(user_id, version)
+    return version
+
+
+async def documents_version_async(db: AsyncSession, user_id: int) -> Optional[int]:
+    version = _versions.get(user_id)
+    if version is None:
+        version = (await db.execute(_version_statement(user_id))).scalar()
+        if version is not None:
+            _versions.set(user_id, version)
+    return version
+
+
+def bump_versions(user_ids: Iterable[int]):
+    """UPDATE statement bumping the users' versions; execute it in the write's transaction"""
+    return update(models.User).where(models.User.id.in_(set(user_ids))).values(
+        documents_version=models.User.documents_version + 1
+    )
+
+
+def forget_versions(user_ids: Iterable[int]):
+    """Drop cached versions after committing a bump"""
+    for user_id in set(user_ids):
+        _versions.pop(user_id)
+
+
+def conditional(request: Request, response: Response, user_id: int, version: int) -> Optional[Response]:
+    """
+    Tag the response with the user's version; a 304 response if the client's
+    If-None-Match already has it (return that instead of the body)
+    """
+    # weak: the same data may go out compressed or not
+    etag = f'W/"u{user_id}-v{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in client_tags or etag.removeprefix("W/") in client_tags:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+# ---------- /search result cache ----------
+
+def search_key(request) -> tuple:
+    """Cache key of a SearchRequest; includes the index generation, so results from before an index change never match"""
+    return (_index_generation, request.query, request.top_k, request.user_id, request.min_score)
+
+
+def index_changed():
+    global _index_generation
+    with _generation_lock:
+        _index_generation += 1
+    search_cache.clear()
+
+
+def clear():
+    """Forget everything (tests: every test starts from an empty database)"""
+    _versions.clear()
+    search_cache.clear()
@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import struct
+import zlib
+from typing import Optional, Union
+from sqlalchemy import LargeBinary, event
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.dialects.sqlite.aiosqlite import AsyncAdapt_aiosqlite_connection
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+
+# Document.content is stored zlib-compressed (OCR text shrinks ~3.5x), in the
+# layout of MySQL's COMPRESS(): 4-byte little-endian text length, then the
+# zlib stream. So the database can decompress it too: UNCOMPRESS() on MySQL,
+# and the uncompress()/compress() functions registered below on SQLite. The
+# keyword search triggers and the migrations rely on that.
+#
+# zlib rather than zstd: zstd isn't in the standard library before Python
+# 3.14 and no database could read it server-side.
+
+COMPRESSION_LEVEL = int(os.getenv("CONTENT_COMPRESSION_LEVEL", "6"))
+
+_LENGTH = struct.Struct("<I")
+
+
+def compress(text: Optional[str]) -> Optional[bytes]:
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if not data:
+        return b""  # like COMPRESS('')
+    return _LENGTH.pack(len(data)) + zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def decompress(value: Union[bytes, str, None]) -> Optional[str]:
+    # str: a row written before compression, not migrated yet
+    if value is None or isinstance(value, str):
+        return value
+    if not value:
+        return ""
+    (length,) = _LENGTH.unpack_from(value)
+    return zlib.decompress(memoryview(value)[_LENGTH.size:], bufsize=max(length, 1)).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed: LONGBLOB on MySQL, BLOB elsewhere. Reads and writes str."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        return compress(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress(value)
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    # MySQL has COMPRESS()/UNCOMPRESS() built in; give SQLite the same
+    if isinstance(dbapi_connection, (sqlite3.Connection, AsyncAdapt_aiosqlite_connection)):
+        dbapi_connection.create_function("compress", 1, compress, deterministic=True)
+        dbapi_connection.create_function("uncompress", 1, decompress, deterministic=True)
@@ -2,6 +2,7 @@ import os
 import urllib.parse
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker,declarative_base
 
 
@@ -23,6 +24,22 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine)
 
+# Optional async data layer (ASYNC_DB=1): the routers await queries on the
+# event loop instead of holding a threadpool thread for each request
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+ASYNC_SQLALCHEMY_DATABASE_URL=f"mysql+aiomysql://{db_user}:{encoded_password}@{db_host}/{db_name}"
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+
+# created only in async mode, so the sync app doesn't need aiomysql
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL, pool_size=ASYNC_DB_POOL_SIZE, max_overflow=ASYNC_DB_POOL_SIZE
+) if ASYNC_DB else None
+
+# expire_on_commit=False: attributes can't lazy-load after commit in async
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+) if ASYNC_DB else None
+
 Base = declarative_base()
 
 def get_db():
@@ -30,4 +47,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()  # Close the connection when done!
\ No newline at end of file
+        db.close()  # Close the connection when done!
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
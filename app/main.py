@@ -1,24 +1,95 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.database import engine, Base
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
+from app.database import engine, Base, ASYNC_DB, async_engine
+from app.metrics import MetricsMiddleware, render_metrics
+from app.responses import GZIP_LEVEL, GZIP_MIN_SIZE
+from app.tracing import TracingMiddleware
 from app.routers import users, documents, search, ai
+from app.services.vector_service import get_vector_service, is_vector_service_ready
+from app.services.agent_service import get_agent_graph
+from app.services.indexing_service import shutdown_chunking_pool
 import os
+import threading
+import time
 
 # Only create tables if not in test environment
 # Tests will create their own tables with their own engine
 if os.getenv("TESTING") != "1":
     Base.metadata.create_all(bind=engine)
 
+# Warm-up state reported by /readyz
+_warm_up_state = {"status": "idle", "error": None, "seconds": None}
+
+
+def warm_up():
+    """
+    Load the embedding model, FAISS index and agent graph.
+
+    Runs in a background thread at startup so routes that don't need
+    embeddings (users, documents, health) serve immediately.
+    """
+    _warm_up_state["status"] = "loading"
+    start = time.perf_counter()
+    try:
+        get_vector_service()
+        get_agent_graph()
+        _warm_up_state["status"] = "ready"
+    except Exception as e:
+        print(f"Warm-up error: {type(e).__name__}: {str(e)}")
+        _warm_up_state["status"] = "failed"
+        _warm_up_state["error"] = str(e)
+    _warm_up_state["seconds"] = round(time.perf_counter() - start, 3)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tests don't need the model; anything that does loads it lazily
+    if os.getenv("TESTING") != "1" and os.getenv("WARM_START", "1") == "1":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+    shutdown_chunking_pool()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 # initialize app
-app = FastAPI(title="Document Management API")
+app = FastAPI(title="Document Management API", lifespan=lifespan)
+# innermost, so request metrics and traces include the compression time
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
-#include routers
-app.include_router(users.router)
-app.include_router(documents.router)
-app.include_router(search.router)
+#include routers (their async data layer versions with ASYNC_DB=1)
+for module in (users, documents, search):
+    app.include_router(module.async_router if ASYNC_DB else module.router)
 app.include_router(ai.router)
 
 @app.get("/")
 def read_root():
     return {
         "message":"Welcome to the Document Management API"
-    }
\ No newline at end of file
+    }
+
+@app.get("/healthz", tags=["Health"])
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz", tags=["Health"])
+def readyz():
+    """Readiness: embedding model and vector index are loaded"""
+    # a failed warm-up (e.g. the agent graph) is not ready even if the index loaded
+    if _warm_up_state["status"] != "failed" and is_vector_service_ready():
+        return {"status": "ready", "warm_up_seconds": _warm_up_state["seconds"]}
+    return JSONResponse(
+        status_code=503,
+        content={"status": _warm_up_state["status"], "error": _warm_up_state["error"]}
+    )
+
+@app.get("/metrics", tags=["Health"])
+def metrics():
+    """Prometheus metrics: per-route and per-stage latency, DB queries, index size"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,109 @@
+"""
+Schema migrations for existing databases.
+
+Base.metadata.create_all only creates missing tables; indexes and column
+changes added to app.models later have to be applied to databases created
+before them. Every migration is idempotent, so running them all again is
+safe.
+
+usage: python -m app.migrations [--list] [name ...]
+"""
+import argparse
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from app import models
+
+
+def add_search_indexes(conn: Connection):
+    """(user_id, created_at) index, plus FULLTEXT (MySQL) or FTS5 (SQLite) for keyword search"""
+    existing = {index["name"] for index in inspect(conn).get_indexes("documents")}
+    if "ix_documents_user_created" not in existing:
+        conn.execute(text("CREATE INDEX ix_documents_user_created ON documents (user_id, created_at)"))
+
+    if conn.dialect.name == "mysql":
+        # superseded by documents_search once content is compressed
+        if "ix_documents_fulltext" not in existing and not inspect(conn).has_table("documents_search"):
+            # builds the index over every row; can take minutes on large tables
+            conn.execute(text("CREATE FULLTEXT INDEX ix_documents_fulltext ON documents (title, content)"))
+    elif conn.dialect.name == "sqlite":
+        if not inspect(conn).has_table("documents_fts"):
+            for statement in models.SQLITE_FTS_DDL:
+                conn.execute(text(statement))
+            # index the rows that existed before the triggers
+            conn.execute(text(
+                "INSERT INTO documents_fts(rowid, title, content) SELECT id, title, uncompress(content) FROM documents"
+            ))
+
+
+def compress_document_content(conn: Connection):
+    """Compress documents.content (app.compression) and move keyword search to indexes that read it"""
+    if conn.dialect.name == "mysql":
+        content = next(c for c in inspect(conn).get_columns("documents") if c["name"] == "content")
+        if "BLOB" in str(content["type"]).upper():
+            return
+        # MySQL DDL commits as it goes and rewrites the table: run it in a maintenance window
+        if "ix_documents_fulltext" in {index["name"] for index in inspect(conn).get_indexes("documents")}:
+            conn.execute(text("DROP INDEX ix_documents_fulltext ON documents"))
+        conn.execute(text("ALTER TABLE documents MODIFY content LONGBLOB"))
+        conn.execute(text("UPDATE documents SET content = COMPRESS(content) WHERE content IS NOT NULL"))
+        conn.execute(text(models.MYSQL_SEARCH_TABLE_DDL))
+        for statement in models.MYSQL_SEARCH_TRIGGERS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text(
+            "INSERT IGNORE INTO documents_search (id, title, content) "
+            "SELECT id, title, CONVERT(UNCOMPRESS(content) USING utf8mb4) FROM documents"
+        ))
+    elif conn.dialect.name == "sqlite":
+        # the external-content FTS table reads documents.content directly, so
+        # it can't index compressed rows: swap it for the contentless one
+        fts_sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'documents_fts'")).scalar()
+        if fts_sql and "content='documents'" in fts_sql:
+            for trigger in ("insert", "update", "delete"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS documents_fts_{trigger}"))
+            conn.execute(text("DROP TABLE documents_fts"))
+        # SQLite columns aren't typed: rows still stored as text are the old ones
+        conn.execute(text("UPDATE documents SET content = compress(content) WHERE typeof(content) = 'text'"))
+        add_search_indexes(conn)
+
+
+def add_documents_version(conn: Connection):
+    """users.documents_version, the ETag of a user's document listings (app.caching)"""
+    if "documents_version" not in {column["name"] for column in inspect(conn).get_columns("users")}:
+        conn.execute(text("ALTER TABLE users ADD COLUMN documents_version INTEGER NOT NULL DEFAULT 0"))
+
+
+MIGRATIONS = {
+    "add_search_indexes": add_search_indexes,
+    "compress_document_content": compress_document_content,
+    "add_documents_version": add_documents_version,
+}
+
+
+def run_migrations(engine: Engine, names=None):
+    """Apply the named migrations (default: all, in order), each in its own transaction"""
+    for name in names or MIGRATIONS:
+        with engine.begin() as conn:
+            print(f"Applying {name}...")
+            MIGRATIONS[name](conn)
+
+
+def main():
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", help="migrations to apply (default: all)")
+    parser.add_argument("--list", action="store_true", help="list migrations and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, migration in MIGRATIONS.items():
+            print(f"{name}: {migration.__doc__}")
+        return
+    unknown = [name for name in args.names if name not in MIGRATIONS]
+    if unknown:
+        parser.error(f"unknown migrations: {', '.join(unknown)} (see --list)")
+    run_migrations(engine, args.names)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, DDL, Index, event
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime, timezone
+from .compression import CompressedText
 from .database import Base
 
 class User(Base):
@@ -13,6 +13,8 @@ class User(Base):
     email = Column(String(100), unique=True, index=True, nullable=False)
     # Use lambda so timestamp is generated per-record, not at class definition
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # bumped on every change to the user's documents; their listings' ETag (app.caching)
+    documents_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     #Relationships
     documents = relationship("Document", back_populates="owner", cascade="all, delete-orphan")
@@ -24,7 +26,9 @@ class Document(Base):
     #Columns
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100),nullable=False)
-    content = Column(LONGTEXT, nullable=True)  # Changed to LONGTEXT for large documents
+    # Compressed (LONGBLOB on MySQL), see app.compression. Deferred: loaded and
+    # decompressed only by queries that ask for it with undefer(Document.content)
+    content = deferred(Column(CompressedText, nullable=True))
     # Use lambda for per-record timestamp generation
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
@@ -34,5 +38,61 @@ class Document(Base):
     #Relationships
     owner = relationship("User", back_populates="documents")
 
+    __table_args__ = (
+        # a user's documents, newest/oldest first, without a filesort
+        Index("ix_documents_user_created", "user_id", "created_at"),
+    )
+
+
+# Keyword search (GET /documents/search) indexes, kept in sync by triggers on
+# every insert/update/delete. The triggers decompress content in the database.
+#
+# SQLite: a contentless FTS5 index (content=''): only the index is stored,
+# not a second copy of the text. Deleting needs the old values, hence
+# uncompress(old.content).
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+    "title, content, content='', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS documents_fts_insert AFTER INSERT ON documents BEGIN "
+    "INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, uncompress(new.content)); END",
+    "CREATE TRIGGER IF NOT EXISTS documents_fts_delete AFTER DELETE ON documents BEGIN "
+    "INSERT INTO documents_fts(documents_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, uncompress(old.content)); END",
+    "CREATE TRIGGER IF NOT EXISTS documents_fts_update AFTER UPDATE ON documents BEGIN "
+    "INSERT INTO documents_fts(documents_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, uncompress(old.content)); "
+    "INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, uncompress(new.content)); END",
+]
+
+# MySQL: InnoDB can only FULLTEXT-index text stored in a table, so the plain
+# text lives in documents_search, next to (not in) the documents rows that
+# every listing and ORM load reads.
+MYSQL_SEARCH_TABLE_DDL = (
+    "CREATE TABLE IF NOT EXISTS documents_search ("
+    "id INT NOT NULL PRIMARY KEY, title VARCHAR(100) NOT NULL, content LONGTEXT, "
+    "FULLTEXT KEY ix_documents_search_fulltext (title, content))"
+)
+MYSQL_SEARCH_TRIGGERS_DDL = [
+    "CREATE TRIGGER documents_search_insert AFTER INSERT ON documents FOR EACH ROW "
+    "INSERT INTO documents_search (id, title, content) "
+    "VALUES (NEW.id, NEW.title, CONVERT(UNCOMPRESS(NEW.content) USING utf8mb4))",
+    "CREATE TRIGGER documents_search_update AFTER UPDATE ON documents FOR EACH ROW "
+    "UPDATE documents_search SET title = NEW.title, content = CONVERT(UNCOMPRESS(NEW.content) USING utf8mb4) "
+    "WHERE id = NEW.id",
+    "CREATE TRIGGER documents_search_delete AFTER DELETE ON documents FOR EACH ROW "
+    "DELETE FROM documents_search WHERE id = OLD.id",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Document.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in [MYSQL_SEARCH_TABLE_DDL] + MYSQL_SEARCH_TRIGGERS_DDL:
+    event.listen(Document.__table__, "after_create", DDL(statement).execute_if(dialect="mysql"))
+event.listen(
+    Document.__table__, "before_drop", DDL("DROP TABLE IF EXISTS documents_fts").execute_if(dialect="sqlite")
+)
+event.listen(
+    Document.__table__, "before_drop", DDL("DROP TABLE IF EXISTS documents_search").execute_if(dialect="mysql")
+)
+
 
 
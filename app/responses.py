@@ -0,0 +1,24 @@
+import os
+import orjson
+from fastapi.responses import JSONResponse
+
+# Large response bodies (search results with chunk text, listings with full
+# OCR content) are gzipped above this size, at this level. Level 9
+# (starlette's default) costs ~4x the CPU of 5 for a few % smaller bodies,
+# see benchmarks/bench_serialization.py
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON via orjson, for data the route built itself and trusts.
+
+    Return it from the route instead of the data: FastAPI then skips
+    validating the data against response_model (still declared, for the
+    OpenAPI schema) and serializing it again. orjson handles datetimes and
+    numpy scalars (FAISS scores) natively.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from typing import Optional
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status, UploadFile, File, Form, Header, Query
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app import models, schemas, database
-from app.services import ocr_service
+from app import caching, models, schemas, database
+from app.services import keyword_search, ocr_service, upload_service
+from app.services.ocr_preprocessing import DEFAULT_DOC_TYPE, OCR_PROFILES
 
 router = APIRouter(prefix="/documents",tags=["Documents"])
+# same routes on the async data layer, mounted instead of router when ASYNC_DB=1
+async_router = APIRouter(prefix="/documents",tags=["Documents"])
+
+ALLOWED_UPLOAD_TYPES = ["application/pdf", "image/png", "image/jpeg"]
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
 get_db=database.get_db
 
 @router.post("/", response_model=schemas.DocumentResponse, status_code=status.HTTP_201_CREATED)
@@ -22,45 +34,113 @@ def create_document(doc: schemas.DocumentCreate, db: Session = Depends(get_db)):
     # Let FK constraint validate user existence (avoids extra DB query)
     try:
         db.add(new_doc)
+        db.execute(caching.bump_versions([doc.user_id]))
         db.commit()
         db.refresh(new_doc)
     except IntegrityError:
         db.rollback()
         # FK constraint failed = user_id doesn't exist
         raise HTTPException(status_code=404, detail="User not found")
+    caching.forget_versions([doc.user_id])
 
     return new_doc
 
+@router.get("/search", response_model=schemas.KeywordSearchResponse)
+def search_documents_by_keyword(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    user_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Keyword search over titles and content, using the database's full-text
+    index (no embeddings). Every word must match; the last one may be
+    incomplete (prefix match).
+
+    Searches scoped to a user are ETag'd with their documents version.
+    """
+    if user_id is not None:
+        version = caching.documents_version(db, user_id)
+        if version is not None:
+            not_modified = caching.conditional(request, response, user_id, version)
+            if not_modified:
+                return not_modified
+    statement = keyword_search.build_query(db.get_bind().dialect.name, q, user_id, limit)
+    rows = db.execute(statement).all() if statement is not None else []
+    return keyword_search.build_response(q, rows)
+
 @router.post("/upload",response_model=schemas.OCRResponse, status_code=status.HTTP_200_OK)
 async def upload_document(
     file : UploadFile = File(...),
     title : str = Form(...),  #Title via Form
     user_id : int = Form(...), #User ID via Form
+    doc_type : str = Form(DEFAULT_DOC_TYPE), #OCR settings: document, receipt, form or photo
     db : Session = Depends(get_db) #dependency to get DB session
     ):
     """
     Upload a file (PDF or Image) and extract text using OCR.
+
+    The route is async to await the upload; the sync DB session and the OCR
+    run in the threadpool so they don't block the event loop. The file is
+    read into memory, so it's limited to 10 MB: larger files go through the
+    resumable /documents/uploads routes.
     """
     # Validation check for file type
-    if file.content_type not in ["application/pdf", "image/png", "image/jpeg"]:
+    if file.content_type not in ALLOWED_UPLOAD_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported file type. Only PDF and images are allowed.")
+    _check_doc_type(doc_type)
     
     # Validation check if user exists
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await run_in_threadpool(lambda: db.query(models.User).filter(models.User.id == user_id).first())
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    content = await _read_upload(file)
+    extracted_text = await run_in_threadpool(_extract_text, file.content_type, content, doc_type)
+
+    # Save to database
+    new_doc = models.Document(
+        title=title,
+        content=extracted_text, #retrieved via OCR
+        user_id=user_id
+    )
+
+    def save():
+        db.add(new_doc)
+        db.execute(caching.bump_versions([user_id]))
+        db.commit()
+        db.refresh(new_doc)
+    await run_in_threadpool(save)
+    caching.forget_versions([user_id])
+
+    return _ocr_response(new_doc, file, extracted_text)
+
+
+async def _read_upload(file: UploadFile) -> bytes:
     # Check file size (limit to 10 MB)
     content = await file.read()
 
-    if len(content) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="File size exceeds 10 MB limit.") #413 Payload Too Large
-    
+    if len(content) > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail="File size exceeds 10 MB limit. Use /documents/uploads for larger files."
+        ) #413 Payload Too Large
+    return content
+
+
+def _check_doc_type(doc_type: str):
+    if doc_type not in OCR_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown doc_type. Use one of: {', '.join(OCR_PROFILES)}.")
+
+
+def _extract_text(content_type: str, content: bytes, doc_type: str) -> str:
+    """OCR (blocking: call it from the threadpool)"""
     try:
-        if file.content_type == "application/pdf":
-            extracted_text = ocr_service.process_pdf(content)
+        if content_type == "application/pdf":
+            return ocr_service.process_pdf(content, doc_type)
         else:
-            extracted_text = ocr_service.process_image(content)
+            return ocr_service.process_image(content, doc_type)
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
@@ -69,17 +149,7 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=f"OCR processing error: {str(e)}")
 
 
-    # Save to database
-    new_doc = models.Document(
-        title=title,
-        content=extracted_text, #retrieved via OCR
-        user_id=user_id
-    )
-    db.add(new_doc)
-    db.commit()
-    db.refresh(new_doc)
-
-    # Return OCR response
+def _ocr_response(new_doc: models.Document, file: UploadFile, extracted_text: str) -> dict:
     return {
         "document_id": new_doc.id,
         "filename": file.filename,
@@ -87,3 +157,250 @@ async def upload_document(
         "extracted_text": extracted_text
     }
 
+
+# ---------- resumable uploads (see app/services/upload_service.py) ----------
+
+@router.post("/uploads", response_model=schemas.UploadStatus, status_code=status.HTTP_201_CREATED)
+def start_upload(body: schemas.UploadInit, db: Session = Depends(get_db)):
+    """
+    Start a resumable upload (up to MAX_RESUMABLE_UPLOAD_BYTES). Send the
+    file in chunks with PUT /documents/uploads/{upload_id}, then complete it.
+    """
+    if body.content_type not in ALLOWED_UPLOAD_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type. Only PDF and images are allowed.")
+    _check_doc_type(body.doc_type)
+    if db.get(models.User, body.user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    upload = upload_service.create(
+        body.filename, body.content_type, body.size, body.title, body.user_id, body.doc_type
+    )
+    return upload_service.status(upload)
+
+@router.put("/uploads/{upload_id}", response_model=schemas.UploadStatus)
+@async_router.put("/uploads/{upload_id}", response_model=schemas.UploadStatus)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),  # Upload-Offset: where this chunk goes
+    chunk_sha256: str = Header(..., alias="X-Chunk-SHA256", pattern="^[0-9a-fA-F]{64}$"),
+):
+    """
+    Append one chunk (the raw request body) at Upload-Offset, which must be
+    the upload's current offset (else 409, with the offset to resume from
+    in the Upload-Offset header). A chunk whose sha256 isn't X-Chunk-SHA256
+    is dropped (400): send it again.
+    """
+    upload = await upload_service.write_chunk(upload_id, upload_offset, chunk_sha256, request)
+    return upload_service.status(upload)
+
+@router.get("/uploads/{upload_id}", response_model=schemas.UploadStatus)
+@async_router.get("/uploads/{upload_id}", response_model=schemas.UploadStatus)
+def get_upload(upload_id: str):
+    """
+    Upload progress: the offset to resume from, then the OCR status
+    (processing, done or failed) once completed
+    """
+    return upload_service.status(upload_service.load(upload_id))
+
+@router.post("/uploads/{upload_id}/complete", response_model=schemas.UploadStatus,
+             status_code=status.HTTP_202_ACCEPTED)
+def complete_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    body: Optional[schemas.UploadComplete] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Finish an upload: creates the document (no content yet) and OCRs the
+    file in the background. Poll GET /documents/uploads/{upload_id} until
+    its status is done. Completing it again returns that status.
+    """
+    with upload_service.exclusive(upload_id):
+        # loaded under the claim: a concurrent complete sees this one's result
+        upload = upload_service.load(upload_id)
+        if upload["status"] != "uploading":
+            return upload_service.status(upload)
+        upload_service.finish(upload, body.sha256 if body else None)
+        new_doc = models.Document(title=upload["title"], content=None, user_id=upload["user_id"])
+        try:
+            db.add(new_doc)
+            db.execute(caching.bump_versions([upload["user_id"]]))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="User not found")
+        caching.forget_versions([upload["user_id"]])
+        upload_service.mark(upload, status="processing", document_id=new_doc.id)
+
+    background_tasks.add_task(_ocr_upload, upload, db.get_bind())
+    return upload_service.status(upload)
+
+
+def _extract_file_text(upload: dict) -> str:
+    path = upload_service.data_path(upload["upload_id"])
+    doc_type = upload.get("doc_type", DEFAULT_DOC_TYPE)  # uploads started before doc_type existed
+    if upload["content_type"] == "application/pdf":
+        return ocr_service.process_pdf_file(path, doc_type)
+    return ocr_service.process_image_file(path, doc_type)
+
+
+def _ocr_upload(upload: dict, bind):
+    """Background task: OCR a completed upload into its document, on a session of its own"""
+    try:
+        text = _extract_file_text(upload)
+        with Session(bind=bind) as db:
+            db.execute(_set_content(upload["document_id"], text))
+            db.execute(caching.bump_versions([upload["user_id"]]))
+            db.commit()
+    except Exception as e:
+        # failed, not left "processing": the client stops polling
+        print(f"OCR Error: {type(e).__name__}: {str(e)}")
+        upload_service.mark(upload, status="failed", error=f"OCR processing error: {str(e)}")
+        return
+    _ocr_done(upload)
+
+
+def _set_content(document_id: int, text: str):
+    return update(models.Document).where(models.Document.id == document_id).values(content=text)
+
+
+def _ocr_done(upload: dict):
+    caching.forget_versions([upload["user_id"]])
+    upload_service.mark(upload, status="done")
+    upload_service.discard_data(upload)
+
+
+# ---------- async data layer (ASYNC_DB=1) ----------
+
+@async_router.post("/", response_model=schemas.DocumentResponse, status_code=status.HTTP_201_CREATED)
+async def create_document_async(doc: schemas.DocumentCreate, db: AsyncSession = Depends(database.get_async_db)):
+    """
+    Create a new document for an existing user
+    """
+    new_doc = models.Document(title=doc.title, content=doc.content, user_id=doc.user_id)
+
+    # Let FK constraint validate user existence (avoids extra DB query)
+    # No refresh: id and created_at are set by the flush, and refresh would
+    # expire the deferred content, which can't lazy-load in async
+    try:
+        db.add(new_doc)
+        await db.execute(caching.bump_versions([doc.user_id]))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="User not found")
+    caching.forget_versions([doc.user_id])
+
+    return new_doc
+
+@async_router.get("/search", response_model=schemas.KeywordSearchResponse)
+async def search_documents_by_keyword_async(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    user_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    """
+    Keyword search over titles and content (see search_documents_by_keyword)
+    """
+    if user_id is not None:
+        version = await caching.documents_version_async(db, user_id)
+        if version is not None:
+            not_modified = caching.conditional(request, response, user_id, version)
+            if not_modified:
+                return not_modified
+    statement = keyword_search.build_query(db.get_bind().dialect.name, q, user_id, limit)
+    rows = (await db.execute(statement)).all() if statement is not None else []
+    return keyword_search.build_response(q, rows)
+
+@async_router.post("/upload",response_model=schemas.OCRResponse, status_code=status.HTTP_200_OK)
+async def upload_document_async(
+    file : UploadFile = File(...),
+    title : str = Form(...),
+    user_id : int = Form(...),
+    doc_type : str = Form(DEFAULT_DOC_TYPE),
+    db : AsyncSession = Depends(database.get_async_db)
+    ):
+    """
+    Upload a file (PDF or Image) and extract text using OCR.
+    """
+    if file.content_type not in ALLOWED_UPLOAD_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type. Only PDF and images are allowed.")
+    _check_doc_type(doc_type)
+
+    if await db.get(models.User, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    content = await _read_upload(file)
+    extracted_text = await run_in_threadpool(_extract_text, file.content_type, content, doc_type)
+
+    new_doc = models.Document(title=title, content=extracted_text, user_id=user_id)
+    db.add(new_doc)
+    await db.execute(caching.bump_versions([user_id]))
+    await db.commit()
+    await db.refresh(new_doc)
+    caching.forget_versions([user_id])
+
+    return _ocr_response(new_doc, file, extracted_text)
+
+@async_router.post("/uploads", response_model=schemas.UploadStatus, status_code=status.HTTP_201_CREATED)
+async def start_upload_async(body: schemas.UploadInit, db: AsyncSession = Depends(database.get_async_db)):
+    """
+    Start a resumable upload (see start_upload)
+    """
+    if body.content_type not in ALLOWED_UPLOAD_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type. Only PDF and images are allowed.")
+    _check_doc_type(body.doc_type)
+    if await db.get(models.User, body.user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    upload = upload_service.create(
+        body.filename, body.content_type, body.size, body.title, body.user_id, body.doc_type
+    )
+    return upload_service.status(upload)
+
+@async_router.post("/uploads/{upload_id}/complete", response_model=schemas.UploadStatus,
+                   status_code=status.HTTP_202_ACCEPTED)
+async def complete_upload_async(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    body: Optional[schemas.UploadComplete] = None,
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    """
+    Finish an upload (see complete_upload)
+    """
+    with upload_service.exclusive(upload_id):
+        upload = upload_service.load(upload_id)
+        if upload["status"] != "uploading":
+            return upload_service.status(upload)
+        await run_in_threadpool(upload_service.finish, upload, body.sha256 if body else None)
+        new_doc = models.Document(title=upload["title"], content=None, user_id=upload["user_id"])
+        try:
+            db.add(new_doc)
+            await db.execute(caching.bump_versions([upload["user_id"]]))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="User not found")
+        caching.forget_versions([upload["user_id"]])
+        upload_service.mark(upload, status="processing", document_id=new_doc.id)
+
+    background_tasks.add_task(_ocr_upload_async, upload, db.bind)
+    return upload_service.status(upload)
+
+
+async def _ocr_upload_async(upload: dict, bind):
+    """Background task: _ocr_upload on the async engine"""
+    try:
+        text = await run_in_threadpool(_extract_file_text, upload)
+        async with AsyncSession(bind=bind) as db:
+            await db.execute(_set_content(upload["document_id"], text))
+            await db.execute(caching.bump_versions([upload["user_id"]]))
+            await db.commit()
+    except Exception as e:
+        print(f"OCR Error: {type(e).__name__}: {str(e)}")
+        upload_service.mark(upload, status="failed", error=f"OCR processing error: {str(e)}")
+        return
+    _ocr_done(upload)
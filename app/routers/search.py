@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app import models, schemas
-from app.database import get_db
-from app.services.vector_service import vector_service
-from app.services.chunking_service import chunking_service
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
+from app import caching, models, schemas
+from app.responses import ORJSONResponse
+from app.database import get_async_db, get_db
+from app.services.vector_service import get_vector_service
+from app.services import indexing_service
 
 router = APIRouter()
+# same routes on the async data layer, mounted instead of router when ASYNC_DB=1
+async_router = APIRouter()
 
 @router.post("/documents/index", response_model=schemas.IndexResponse)
 def index_documents(
@@ -14,59 +20,105 @@ def index_documents(
 ):
     """Updated: Index docs with chunking(efficient for large docs)
 
-    1. retrieve docs from db
-    2. chunk doc into smaller pieces
-    3. index all chunks in faiss with metadata
-    4. save to disk
-    
+    1. retrieve all requested docs from db in one query
+    2. chunk docs into smaller pieces (in parallel, see indexing_service)
+    3. index all chunks in faiss with metadata, embedded as one stream
+    4. save to disk once
     """
-    indexed_count = 0
-    failed_ids = []
-    
+    vector_service = get_vector_service()
+
+    documents = _fetch_documents(db, set(request.document_ids), with_content=True)
+    to_index = _documents_to_index(request, documents)
+    indexed_ids, _, partial_ids = indexing_service.index_documents(vector_service, to_index)
+
+    owners = _indexed_owners(documents, indexed_ids + partial_ids)
+    if owners:
+        db.execute(caching.bump_versions(owners))
+        db.commit()
+        _index_changed(owners)
+    return _index_response(request, indexed_ids, partial_ids)
+
+
+def _indexed_owners(documents: dict, indexed_ids: list) -> set:
+    return {documents[doc_id].user_id for doc_id in indexed_ids}
+
+
+def _index_changed(owners: set):
+    # after the owners' version bump is committed
+    caching.forget_versions(owners)
+    caching.index_changed()
+
+
+def _documents_to_index(request: schemas.IndexRequest, documents: dict) -> list:
+    """(doc_id, user_id, content) for the requested docs that exist and have content"""
+    to_index = []
     for doc_id in request.document_ids:
-        # Get document
-        document = db.query(models.Document).filter(
-            models.Document.id == doc_id
-        ).first()
-        
-        #print(f"DEBUG: Doc {doc_id} - Found: {document is not None}")
-        
+        document = documents.get(doc_id)
         if not document:
             print(f"DEBUG: Doc {doc_id} - Not found")
-            failed_ids.append(doc_id)
             continue
-        
-        #print(f"DEBUG: Doc {doc_id} - Content length: {len(document.content) if document.content else 0}")
-        
         if not document.content or not document.content.strip():
             #print(f"DEBUG: Doc {doc_id} - No content")
-            failed_ids.append(doc_id)
             continue
-        
-        try:
-            #1. Chunk the document
-            chunks = chunking_service.chunk_text(document.content, doc_id, document.user_id)
-
-            if not chunks:
-                #print(f"DEBUG: Doc {doc_id} - No chunks created")
-                failed_ids.append(doc_id)
-                continue
-            #2. Index all chunks
-            vector_service.add_chunks(chunks)
-            indexed_count += 1
-        
-        except Exception as e:
-            #print(f"DEBUG: Doc {doc_id} - Indexing failed: {str(e)}")
-            failed_ids.append(doc_id)
-            
-    
-    
+        to_index.append((doc_id, document.user_id, document.content))
+    return to_index
+
+
+def _index_response(request: schemas.IndexRequest, indexed_ids: list, partial_ids: list) -> dict:
+    indexed_count = len(indexed_ids)
+    done = set(indexed_ids) | set(partial_ids)
+    failed_ids = [doc_id for doc_id in request.document_ids if doc_id not in done]
+
+    message = f"Indexed {indexed_count}/{len(request.document_ids)} documents"
+    if partial_ids:
+        message += f", {len(partial_ids)} only partly"
     return {
         "indexed_count": indexed_count,
         "failed_ids": failed_ids,
-        "message": f"Indexed {indexed_count}/{len(request.document_ids)} documents"
+        "partial_ids": partial_ids,
+        "message": message
+    }
+
+
+def _build_search_response(query: str, chunk_results: list[dict], doc_map: dict) -> dict:
+    """
+    Attach document titles to chunk results; chunks of deleted docs are dropped.
+
+    Plain dicts in the SearchResponse shape, sent as ORJSONResponse: built
+    here from trusted data, so not validated again against response_model.
+    """
+    results = []
+    for chunk in chunk_results:
+        doc = doc_map.get(chunk['doc_id'])
+        if doc:
+            results.append({
+                "document_id": chunk['doc_id'],
+                "chunk_id": chunk['chunk_id'],
+                "title": doc.title,
+                "content": chunk['text'], # (updated to chunk text, not full doc)
+                "similarity_score": chunk['similarity_score']
+            })
+
+    return {
+        "query": query,
+        "results": results,
+        "total_results": len(results)
     }
 
+
+def _fetch_documents(db: Session, doc_ids: set, with_content: bool = False) -> dict:
+    """Load the given documents with one IN query, keyed by id (content only if asked: it's deferred)"""
+    if not doc_ids:
+        return {}
+    query = db.query(models.Document)
+    if with_content:
+        query = query.options(undefer(models.Document.content))
+    documents = query.filter(
+        models.Document.id.in_(doc_ids)
+    ).all()
+    return {doc.id: doc for doc in documents}
+
+
 @router.post("/search", response_model=schemas.SearchResponse)
 def search_documents(
     request: schemas.SearchRequest,
@@ -76,44 +128,123 @@ def search_documents(
    Search relvant doc chunks by semantic similarity
 
    this returns chunks(not full docs as in previous version) with metadata
+
+   identical requests within SEARCH_CACHE_TTL are answered from app.caching
     """
+    cache_key = caching.search_key(request)
+    cached = caching.search_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
     # Search FAISS for similar document IDs (filter by user_id if provided)
     user_id = getattr(request, 'user_id', None)
-    chunk_results : list[dict] = vector_service.search(request.query, top_k=request.top_k, user_id=user_id)
-
-    if not chunk_results:
-        return {
-            "query": request.query,
-            "results": [],
-            "total_results": 0
-        }
-    
-    # Get unique document IDs to fetch titles
-    doc_ids = list(set([chunk['doc_id'] for chunk in chunk_results]))
-
-    # Fetch full documents from DB
-    documents = db.query(models.Document).filter(
-        models.Document.id.in_(doc_ids)
-    ).all()
+    vector_service = get_vector_service()
+    chunk_results : list[dict] = vector_service.search(
+        request.query, top_k=request.top_k, user_id=user_id, min_score=request.min_score
+    )
 
-    # Create lookup map
-    doc_map: dict = {doc.id: doc for doc in documents}
+    # Fetch titles for the unique document IDs
+    doc_map = _fetch_documents(db, {chunk['doc_id'] for chunk in chunk_results})
+    result = _build_search_response(request.query, chunk_results, doc_map)
+    caching.search_cache.set(cache_key, result)
+    return ORJSONResponse(result)
 
-    # Build results with chunk data
-    results = []
-    for chunk in chunk_results:
-        doc = doc_map.get(chunk['doc_id'])
-        if doc:
-            results.append(schemas.SearchResult(
-                document_id=chunk['doc_id'],
-                chunk_id=chunk['chunk_id'],
-                title=doc.title,
-                content=chunk['text'], # (updated to chunk text, not full doc)
-                similarity_score=chunk['similarity_score']
-            ))
-    
-    return {
-        "query": request.query,
-        "results": results,
-        "total_results": len(results)
-    }
+
+@router.post("/search/batch", response_model=schemas.BatchSearchResponse)
+def search_documents_batch(
+    request: schemas.BatchSearchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Run many searches at once (e.g. analytics jobs).
+
+    All queries are embedded in one encode call and searched in one FAISS
+    call, and titles for every hit come from one Document query.
+    """
+    vector_service = get_vector_service()
+    batch_results = vector_service.search_batch([
+        {'query': q.query, 'top_k': q.top_k, 'user_id': q.user_id, 'min_score': q.min_score}
+        for q in request.queries
+    ])
+
+    doc_map = _fetch_documents(
+        db, {chunk['doc_id'] for chunk_results in batch_results for chunk in chunk_results}
+    )
+    return ORJSONResponse({
+        "responses": [
+            _build_search_response(q.query, chunk_results, doc_map)
+            for q, chunk_results in zip(request.queries, batch_results)
+        ]
+    })
+
+
+# ---------- async data layer (ASYNC_DB=1) ----------
+# DB queries are awaited; embedding, FAISS and chunking are CPU work and
+# run in the threadpool as before.
+
+async def _fetch_documents_async(db: AsyncSession, doc_ids: set, with_content: bool = False) -> dict:
+    """Load the given documents with one IN query, keyed by id (content only if asked: it's deferred)"""
+    if not doc_ids:
+        return {}
+    statement = select(models.Document).where(models.Document.id.in_(doc_ids))
+    if with_content:
+        statement = statement.options(undefer(models.Document.content))
+    result = await db.execute(statement)
+    return {doc.id: doc for doc in result.scalars()}
+
+
+@async_router.post("/documents/index", response_model=schemas.IndexResponse)
+async def index_documents_async(request: schemas.IndexRequest, db: AsyncSession = Depends(get_async_db)):
+    """Index docs with chunking (see index_documents)"""
+    documents = await _fetch_documents_async(db, set(request.document_ids), with_content=True)
+    to_index = _documents_to_index(request, documents)
+    indexed_ids, _, partial_ids = await run_in_threadpool(
+        lambda: indexing_service.index_documents(get_vector_service(), to_index)
+    )
+
+    owners = _indexed_owners(documents, indexed_ids + partial_ids)
+    if owners:
+        await db.execute(caching.bump_versions(owners))
+        await db.commit()
+        _index_changed(owners)
+    return _index_response(request, indexed_ids, partial_ids)
+
+
+@async_router.post("/search", response_model=schemas.SearchResponse)
+async def search_documents_async(request: schemas.SearchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Search relevant doc chunks by semantic similarity (cached, see search_documents)"""
+    cache_key = caching.search_key(request)
+    cached = caching.search_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
+    chunk_results = await run_in_threadpool(
+        lambda: get_vector_service().search(
+            request.query, top_k=request.top_k, user_id=request.user_id, min_score=request.min_score
+        )
+    )
+    doc_map = await _fetch_documents_async(db, {chunk['doc_id'] for chunk in chunk_results})
+    result = _build_search_response(request.query, chunk_results, doc_map)
+    caching.search_cache.set(cache_key, result)
+    return ORJSONResponse(result)
+
+
+@async_router.post("/search/batch", response_model=schemas.BatchSearchResponse)
+async def search_documents_batch_async(request: schemas.BatchSearchRequest,
+                                       db: AsyncSession = Depends(get_async_db)):
+    """Run many searches at once (see search_documents_batch)"""
+    batch_results = await run_in_threadpool(
+        lambda: get_vector_service().search_batch([
+            {'query': q.query, 'top_k': q.top_k, 'user_id': q.user_id, 'min_score': q.min_score}
+            for q in request.queries
+        ])
+    )
+    doc_map = await _fetch_documents_async(
+        db, {chunk['doc_id'] for chunk_results in batch_results for chunk in chunk_results}
+    )
+    return ORJSONResponse({
+        "responses": [
+            _build_search_response(q.query, chunk_results, doc_map)
+            for q, chunk_results in zip(request.queries, batch_results)
+        ]
+    })
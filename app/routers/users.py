@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
 from sqlalchemy.exc import IntegrityError
 from typing import List
 
-from app import models, schemas, database
+from app import caching, models, schemas, database
+from app.responses import ORJSONResponse
 
 router = APIRouter(prefix="/users", tags=["Users"])
+# same routes on the async data layer, mounted instead of router when ASYNC_DB=1
+async_router = APIRouter(prefix="/users", tags=["Users"])
 
 # Dependency to get DB session
 get_db = database.get_db
@@ -25,26 +30,86 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         db.refresh(new_user)
     except IntegrityError as e:
         db.rollback()
-        # Check which constraint was violated
-        error_msg = str(e.orig).lower()
-        if "email" in error_msg:
-            raise HTTPException(status_code=400, detail="Email already registered")
-        elif "username" in error_msg:
-            raise HTTPException(status_code=400, detail="Username already taken")
-        else:
-            raise HTTPException(status_code=400, detail="Database constraint violation")
+        raise _constraint_error(e)
 
     return new_user
 
+def _constraint_error(e: IntegrityError) -> HTTPException:
+    """400 naming the unique constraint that was violated"""
+    # Check which constraint was violated
+    error_msg = str(e.orig).lower()
+    if "email" in error_msg:
+        return HTTPException(status_code=400, detail="Email already registered")
+    elif "username" in error_msg:
+        return HTTPException(status_code=400, detail="Username already taken")
+    else:
+        return HTTPException(status_code=400, detail="Database constraint violation")
+
 @router.get("/{user_id}/documents", response_model=List[schemas.DocumentResponse])
-def get_user_documents(user_id: int,db: Session = Depends(get_db)):
+def get_user_documents(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Fetch all documents belonging to a specific user.
+
+    ETag'd with the user's documents version: If-None-Match with the
+    current one gets a 304 (usually without a DB query, see app.caching).
     """
-    #1. Check if user exists(optional)
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    #1. Check if user exists: only users have a version
+    version = caching.documents_version(db, user_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="User not found")
+    not_modified = caching.conditional(request, response, user_id, version)
+    if not_modified:
+        return not_modified
     
     # 2. Fetch documents via relationship or direct query
-    return db.query(models.Document).filter(models.Document.user_id == user_id).all()
+    # ordered by the (user_id, created_at) index
+    documents = db.query(models.Document).options(undefer(models.Document.content)).filter(
+        models.Document.user_id == user_id
+    ).order_by(models.Document.created_at).all()
+    return _documents_response(documents, response)
+
+
+def _documents_response(documents, response: Response) -> ORJSONResponse:
+    """List of DocumentResponse, serialized straight from the rows (see app.responses)"""
+    return ORJSONResponse(
+        [{"id": doc.id, "title": doc.title, "content": doc.content, "created_at": doc.created_at} for doc in documents],
+        headers=response.headers,  # the ETag
+    )
+
+
+# ---------- async data layer (ASYNC_DB=1) ----------
+
+@async_router.post("/", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
+async def create_user_async(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_async_db)):
+    """
+    Create a new user
+    """
+    new_user = models.User(username=user.username, email=user.email)
+    try:
+        db.add(new_user)
+        await db.commit()
+        await db.refresh(new_user)
+    except IntegrityError as e:
+        await db.rollback()
+        raise _constraint_error(e)
+
+    return new_user
+
+@async_router.get("/{user_id}/documents", response_model=List[schemas.DocumentResponse])
+async def get_user_documents_async(user_id: int, request: Request, response: Response,
+                                   db: AsyncSession = Depends(database.get_async_db)):
+    """
+    Fetch all documents belonging to a specific user (ETag'd, see get_user_documents).
+    """
+    version = await caching.documents_version_async(db, user_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    not_modified = caching.conditional(request, response, user_id, version)
+    if not_modified:
+        return not_modified
+
+    result = await db.execute(
+        select(models.Document).options(undefer(models.Document.content))
+        .where(models.Document.user_id == user_id).order_by(models.Document.created_at)
+    )
+    return _documents_response(result.scalars().all(), response)
@@ -54,6 +54,34 @@ class OCRResponse(BaseModel):
     extracted_text: str
 
 
+# RESUMABLE UPLOAD SCHEMAS
+
+class UploadInit(BaseModel):
+    """Start a resumable upload of a file of the given size"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str
+    size: int = Field(..., gt=0)  # bytes
+    title: str = Field(..., min_length=1, max_length=200)
+    user_id: int
+    doc_type: str = "document"  # OCR settings: document, receipt, form or photo
+
+class UploadComplete(BaseModel):
+    """Finish an upload; with sha256, the whole file is checked against it"""
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")
+
+class UploadStatus(BaseModel):
+    """Where a resumable upload is at"""
+    upload_id: str
+    filename: str
+    content_type: str
+    size: int
+    offset: int  # bytes received; the next chunk starts here
+    chunk_size: int  # suggested chunk size
+    status: str  # uploading, processing (OCR), done or failed
+    document_id: Optional[int] = None  # set on completion
+    error: Optional[str] = None
+
+
 # VECTOR SEARCH SCHEMAS
 
 class IndexRequest(BaseModel):
@@ -64,6 +92,8 @@ class IndexResponse(BaseModel):
     """Response after indexing"""
     indexed_count: int
     failed_ids: List[int] = []
+    # failed after some of their chunks were indexed: indexing them again adds those twice
+    partial_ids: List[int] = []
     message: str
 
 class SearchRequest(BaseModel):
@@ -71,6 +101,8 @@ class SearchRequest(BaseModel):
     query: str
     top_k: int = 5
     user_id: Optional[int] = None  # Filter results by user  
+    # Drop chunks whose cosine similarity is below this cutoff
+    min_score: Optional[float] = Field(None, ge=-1.0, le=1.0)
 
 class SearchResult(BaseModel):
     """Single search result"""
@@ -78,7 +110,7 @@ class SearchResult(BaseModel):
     chunk_id: int 
     title: str
     content: str
-    similarity_score: float
+    similarity_score: float  # cosine similarity in [-1, 1], higher is better
 
 class SearchResponse(BaseModel):
     """Search Response"""
@@ -86,6 +118,30 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     total_results: int
 
+class BatchSearchRequest(BaseModel):
+    """Many searches in one request (embedded and searched together)"""
+    queries: List[SearchRequest] = Field(..., min_length=1, max_length=1000)
+
+class BatchSearchResponse(BaseModel):
+    """One SearchResponse per query, in request order"""
+    responses: List[SearchResponse]
+
+
+# KEYWORD SEARCH SCHEMAS
+
+class KeywordSearchResult(BaseModel):
+    """Document matching every query term"""
+    document_id: int
+    title: str
+    created_at: datetime
+    score: float  # full-text relevance (bm25 on SQLite), higher is better
+
+class KeywordSearchResponse(BaseModel):
+    """Keyword search response"""
+    query: str
+    results: List[KeywordSearchResult]
+    total_results: int
+
 
 
 # AI agent SCHEMAS
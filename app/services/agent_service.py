@@ -1,8 +1,12 @@
 from typing import TypedDict, Literal, List, Dict, Optional
-from langchain_openai import AzureChatOpenAI
-from langgraph.graph import StateGraph, END
-from app.services.vector_service import vector_service
+from app.metrics import timed
+from app.tracing import current_request_id, span, traced
+from app.services.vector_service import get_vector_service
 import os
+import threading
+
+# Chunks below this cosine similarity are not worth sending to the LLM
+MIN_RELEVANCE_SCORE = float(os.getenv("AGENT_MIN_SCORE", "0.3"))
 
 # Agent state definition:
 class AgentState(TypedDict):
@@ -16,6 +20,8 @@ class AgentState(TypedDict):
 
 #intitalise azure openai llm
 def get_llm():
+    from langchain_openai import AzureChatOpenAI
+
     return AzureChatOpenAI(
         azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
         api_key=os.getenv("AZURE_OPENAI_KEY"),
@@ -24,7 +30,18 @@ def get_llm():
         temperature=0.7
     )
 
+def invoke_llm(llm, prompt: str, name: str):
+    """llm.invoke in a span recording latency and token usage"""
+    with span(name, prompt_chars=len(prompt)) as s:
+        response = llm.invoke(prompt)
+        usage = getattr(response, "usage_metadata", None) or {}
+        s.set(input_tokens=usage.get("input_tokens"), output_tokens=usage.get("output_tokens"))
+    return response
+
+
 #node-1:classify intent
+@timed("agent_classify_intent")
+@traced("agent.classify_intent")
 def classify_intent(state: AgentState) -> AgentState:
     """Determine what type of query this is"""
 
@@ -43,7 +60,7 @@ Rules:
 
 Output ONLY one word: "search" or "generate".
 """
-    response=llm.invoke(prompt)
+    response=invoke_llm(llm, prompt, "llm.classify")
     intent=response.content.strip().lower()
 
     #default to search
@@ -55,17 +72,21 @@ Output ONLY one word: "search" or "generate".
 
 
 #node-2: search documents(only for 'document_question' intent)
+@timed("agent_search_documents")
+@traced("agent.search_documents")
 def search_documents(state: AgentState) -> AgentState:
     """query faiss to find relevant chunks"""
 
     query=state["query"]
     user_id=state.get("user_id")
-    #search faiss with user filter
-    chunks=vector_service.search(query, top_k=5, user_id=user_id)
+    #search faiss with user filter, dropping irrelevant chunks
+    chunks=get_vector_service().search(query, top_k=5, user_id=user_id, min_score=MIN_RELEVANCE_SCORE)
     state["chunks"]=chunks
     return state
 
 #node-3: generate answer
+@timed("agent_generate_answer")
+@traced("agent.generate_answer")
 def generate_answer(state: AgentState) -> AgentState:
     """
     Generates the final answer.
@@ -89,7 +110,7 @@ I searched their documents but found no relevant matches.
 Please answer the question generally based on your own knowledge.
 Start your answer by saying: "I couldn't find specific details in your documents, but generally..."
 """
-            response = llm.invoke(prompt)
+            response = invoke_llm(llm, prompt, "llm.generate")
             answer = response.content.strip()
         else:
             # Sub-branch: Found documents. Use them.
@@ -106,7 +127,7 @@ Context:
 
 User Question: {query}
 """
-            response = llm.invoke(prompt)
+            response = invoke_llm(llm, prompt, "llm.generate")
             answer = response.content.strip()
             
             # Prepare sources for the UI
@@ -125,7 +146,7 @@ User Question: {query}
 
 User Message: {query}
 """
-        response = llm.invoke(prompt)
+        response = invoke_llm(llm, prompt, "llm.generate")
         answer = response.content.strip()
         
     state["answer"] = answer
@@ -153,6 +174,9 @@ def create_agent_graph():
                                     ↓
                                 END
     """
+    # imported here so that importing the app doesn't pay for langgraph
+    from langgraph.graph import StateGraph, END
+
     workflow=StateGraph(AgentState)
     #add nodes
     workflow.add_node("classify_intent", classify_intent)
@@ -180,8 +204,19 @@ def create_agent_graph():
     return workflow.compile()
 
 
-#gloabal agent instance
-agent_graph=create_agent_graph()
+#gloabal agent instance, compiled on first use (or by the startup warm-up)
+_agent_graph = None
+_agent_graph_lock = threading.Lock()
+
+
+def get_agent_graph():
+    """Return the compiled agent graph, building it on first call"""
+    global _agent_graph
+    if _agent_graph is None:
+        with _agent_graph_lock:
+            if _agent_graph is None:
+                _agent_graph = create_agent_graph()
+    return _agent_graph
 
 
 #main function to invoke the agent
@@ -210,21 +245,26 @@ def ask_agent(query: str, user_id: int = None) -> Dict:
         "user_id": user_id
     }
     
-    # Run the graph
-    try:
+    # Run the graph (each node and LLM call is a child span of agent.ask)
+    with span("agent.ask", user_id=user_id, query_chars=len(query)) as ask_span:
+        try:
+            final_state = get_agent_graph().invoke(initial_state)
+            ask_span.set(intent=final_state["intent"], chunks=len(final_state["chunks"]))
+        except Exception as e:
+            # the caller gets a generic answer; the trace keeps the real error
+            ask_span.fail(e)
+            print(f"Agent error (request {current_request_id()}): {type(e).__name__}: {e}")
+            final_state = None
 
-        final_state = agent_graph.invoke(initial_state)
-    
+    if final_state is None:
         return {
-            "query": final_state["query"],
-            "answer": final_state["answer"],
-            "sources": final_state["sources"],
-            "intent": final_state["intent"]
-        }
-    except Exception as e:
-        print(f"Agent error: {str(e)}")
-        return{
             "query": query,
             "answer": "Sorry, I encountered an error while processing your request.",
-            "sources": []   
+            "sources": []
         }
+    return {
+        "query": final_state["query"],
+        "answer": final_state["answer"],
+        "sources": final_state["sources"],
+        "intent": final_state["intent"]
+    }
@@ -1,22 +1,56 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Dict
+import os
+import re
+from typing import List, Dict, Iterable, Iterator, Tuple
+from app.metrics import timed
+from app.services.embedding_backends import MODEL_NAME
+from app.services.text_splitter import TextSplitter
+
+# Characters handed to the splitter at a time, in chunk_size units; memory
+# for chunking a document is bounded by this, not by the document length
+# (native mode only, compat mode splits the whole text at once)
+WINDOW_CHUNKS = 32
+
+# "native" (fast single pass) or "compat" (same chunks as LangChain's
+# RecursiveCharacterTextSplitter, which this service used before)
+SPLITTER_MODE = os.getenv("TEXT_SPLITTER_MODE", "native")
+
+# What chunk sizes count:
+#   "chars"  -> characters (2000 chars, ~500 tokens)
+#   "tokens" -> word-pieces of the embedding model's tokenizer. all-MiniLM-L6-v2
+#               only embeds the first 256 (incl. [CLS]/[SEP]), so character
+#               chunks lose about half their text to truncation while it is
+#               still stored and sent to the LLM; token chunks fit the window
+CHUNK_UNIT = os.getenv("CHUNK_UNIT", "chars")
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "254"))
+CHUNK_TOKEN_OVERLAP = int(os.getenv("CHUNK_TOKEN_OVERLAP", "25"))
+# only used to size splitter windows when counting tokens
+CHARS_PER_TOKEN = 4
+
+_NON_SPACE = re.compile(r"\S")
 
 class ChunkingService:
     """
-    Service to chunk text using LangChain's RecursiveCharacterTextSplitter, respects semantic boundaries (paragraphs, sentences).
+    Service to chunk text with a recursive character splitter (see text_splitter), respects semantic boundaries (paragraphs, sentences).
     """
 
-    def __init__(self,chunk_size: int = 500, overlap: int =50) -> None:
+    def __init__(self,chunk_size: int = 500, overlap: int =50, mode: str = SPLITTER_MODE,
+                 tokenizer=None) -> None:
         """
         arguments:
-            chunk_size: No.of words per chunk
-            overlap: No.of words to overlap b/w chunks
+            chunk_size: No.of characters (or tokens) per chunk
+            overlap: No.of characters (or tokens) to overlap b/w chunks
+            mode: "native" or "compat" splitter (see TextSplitter)
+            tokenizer: model name or tokenizer; sizes then count its tokens
         """
-        self.splitter = RecursiveCharacterTextSplitter(
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.window_size = chunk_size * WINDOW_CHUNKS * (CHARS_PER_TOKEN if tokenizer else 1)
+        self.splitter = TextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=overlap,
             separators=["\n\n", "\n", ". ", " ", ""],
-            length_function=len # uses char length for splitting
+            mode=mode,
+            tokenizer=tokenizer
         )
     
     def chunk_text(self, text: str, doc_id: int, user_id: int) -> List[Dict]:
@@ -35,28 +69,78 @@ class ChunkingService:
                 'char_count':500}, ...]  ---> list of dicts with chunk metadata
         """
 
+        return list(self.iter_chunks(text, doc_id, user_id))
+
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (start, end) character offsets of each chunk in text, lazily.
+
+        The splitter only ever sees a window of about WINDOW_CHUNKS chunks. The last chunks of a window may have been cut by the
+        window edge, so they are held back and the next window starts where
+        the first held-back chunk starts (its overlap included).
+
+        Compat mode splits the whole text in one go instead: LangChain's
+        split-and-merge isn't local, so windows would change its chunks.
+        """
         if not text or not text.strip():
-            return []
-        
-        chunk_texts = self.splitter.split_text(text)
+            return
+
+        if self.splitter.mode == "compat":
+            with timed("chunk_text"):
+                spans = self.splitter.split_spans(text)
+            yield from spans
+            return
+
+        window_size = self.window_size
+        pos = 0
+        while pos < len(text):
+            at_end = pos + window_size >= len(text)
+            with timed("chunk_text"):  # one sample per window
+                spans = self.splitter.split_spans(text, pos, pos + window_size)
 
-        # add chunk metadata
+            if not spans:
+                # only whitespace in this window: skip to the next text, if any
+                next_text = _NON_SPACE.search(text, pos + window_size)
+                if at_end or next_text is None:
+                    return
+                pos = next_text.start()
+                continue
+            keep = spans if at_end else spans[:max(1, len(spans) - 2)]
+            yield from keep
 
-        chunks = []
-        for idx, chunk_text in enumerate(chunk_texts):
-            chunks.append({
-                'text': chunk_text,
+            if at_end:
+                return
+            pos = spans[len(keep)][0] if len(keep) < len(spans) else keep[-1][1]
+
+    def iter_chunks(self, text: str, doc_id: int, user_id: int) -> Iterator[Dict]:
+        """
+        Lazily yield the same dicts as chunk_text, plus start_char/end_char.
+
+        Only one chunk's text is copied out of the document at a time.
+        """
+        return self.chunks_from_spans(text, self.iter_spans(text), doc_id, user_id)
+
+    def chunks_from_spans(self, text: str, spans: Iterable[Tuple[int, int]],
+                          doc_id: int, user_id: int) -> Iterator[Dict]:
+        """Build chunk dicts for spans computed elsewhere (e.g. in a worker process)"""
+        for idx, (start, end) in enumerate(spans):
+            yield {
+                'text': text[start:end],
                 'doc_id': doc_id,
                 'chunk_id': idx,
                 'user_id': user_id,
-                'char_count': len(chunk_text)
-            })
-        
-        return chunks
+                'char_count': end - start,
+                'start_char': start,
+                'end_char': end
+            }
     
 
 # Global instance
-chunking_service = ChunkingService(chunk_size=2000, overlap=200) #2000 chars ~ 500 tokens
+if CHUNK_UNIT == "tokens":
+    chunking_service = ChunkingService(chunk_size=CHUNK_TOKENS, overlap=CHUNK_TOKEN_OVERLAP,
+                                       tokenizer=MODEL_NAME)
+else:
+    chunking_service = ChunkingService(chunk_size=2000, overlap=200) #2000 chars ~ 500 tokens
 
         
     
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import Dict, List
+from app.metrics import timed
+
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# Which backend VectorService uses: "torch", "torch-int8", "onnx", "onnx-int8"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# Pre-quantized ONNX export shipped in the model repo; pick the one matching
+# the CPU (avx2 / avx512 / avx512_vnni / arm64)
+ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+ENCODE_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+
+class EmbeddingBackend(ABC):
+    """
+    Turns texts into L2-normalized float32 vectors.
+
+    VectorService only talks to this interface, so the inference runtime can
+    be swapped per deployment without touching indexing or search.
+    """
+
+    name = "base"
+    dimension = 384
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = ENCODE_BATCH_SIZE) -> np.ndarray:
+        """Return a (len(texts), dimension) float32 matrix of unit vectors"""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """
+    all-MiniLM-L6-v2 through sentence-transformers.
+
+    arguments:
+        runtime: "torch" or "onnx" (onnx needs `pip install sentence-transformers[onnx]`)
+        quantize: int8 weights - dynamic quantization of the Linear layers for
+                  torch, the pre-quantized ONNX_INT8_FILE export for onnx
+    """
+
+    def __init__(self, runtime: str = "torch", quantize: bool = False, model_name: str = MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = runtime + ("-int8" if quantize else "")
+        model_kwargs = {"file_name": ONNX_INT8_FILE} if runtime == "onnx" and quantize else None
+        self.model = SentenceTransformer(model_name, backend=runtime, model_kwargs=model_kwargs)
+
+        if runtime == "torch" and quantize:
+            import torch
+
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    @timed("model_encode")
+    def encode(self, texts: List[str], batch_size: int = ENCODE_BATCH_SIZE) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32)
+
+
+BACKENDS = {
+    "torch": lambda: SentenceTransformerBackend("torch"),
+    "torch-int8": lambda: SentenceTransformerBackend("torch", quantize=True),
+    "onnx": lambda: SentenceTransformerBackend("onnx"),
+    "onnx-int8": lambda: SentenceTransformerBackend("onnx", quantize=True),
+}
+
+
+def create_embedding_backend(name: str = EMBEDDING_BACKEND) -> EmbeddingBackend:
+    """Build the backend registered under name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def check_parity(candidate: EmbeddingBackend, reference: EmbeddingBackend,
+                 texts: List[str]) -> Dict[str, float]:
+    """
+    Compare a backend against the fp32 reference on the same texts.
+
+    Both produce unit vectors, so the row-wise dot product is the cosine
+    agreement; anything much below ~0.99 will visibly change rankings.
+    """
+    cosines = np.sum(candidate.encode(texts) * reference.encode(texts), axis=1)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+    }
@@ -0,0 +1,149 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from typing import List, Tuple
+from app.services.chunking_service import ChunkingService, chunking_service
+
+# Chunks embedded and added per step. Together with the chunker's window this
+# bounds peak memory while indexing, whatever the document size.
+INDEX_WINDOW_CHUNKS = int(os.getenv("INDEX_WINDOW_CHUNKS", "64"))
+
+# Processes splitting documents in index_documents (the splitter is pure
+# Python, so threads wouldn't help): 0 = one per CPU, 1 = no pool
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", "0"))
+
+_chunking_pool: ProcessPoolExecutor = None
+_chunking_pool_lock = threading.Lock()
+
+
+def get_chunking_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool for chunking, started on first bulk index"""
+    global _chunking_pool
+    if _chunking_pool is None:
+        with _chunking_pool_lock:
+            if _chunking_pool is None:
+                # spawn, not fork: the API process has model and server threads
+                _chunking_pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+    return _chunking_pool
+
+
+def shutdown_chunking_pool():
+    """Stop the chunking workers (app shutdown); the next bulk index starts new ones"""
+    global _chunking_pool
+    with _chunking_pool_lock:
+        if _chunking_pool is not None:
+            _chunking_pool.shutdown()
+            _chunking_pool = None
+
+
+def _chunk_spans(chunker: ChunkingService, text: str) -> List[Tuple[int, int]]:
+    """Runs in a pool worker; only offsets travel back, not chunk texts"""
+    return list(chunker.iter_spans(text))
+
+
+def index_document(vector_service, text: str, doc_id: int, user_id: int,
+                   chunker: ChunkingService = chunking_service,
+                   window: int = INDEX_WINDOW_CHUNKS, save: bool = True) -> int:
+    """
+    Chunk, embed and index one document, a window of chunks at a time.
+
+    Only `window` chunk texts and their embeddings are alive at once. The
+    index file is written once at the end (or not at all with save=False,
+    when the caller saves after a batch of documents).
+
+    returns: number of chunks indexed (0 for empty text)
+    """
+    chunks = chunker.iter_chunks(text, doc_id, user_id)
+    count = 0
+    while True:
+        batch = list(islice(chunks, window))
+        if not batch:
+            break
+        vector_service.add_chunks(batch, save=False)
+        count += len(batch)
+
+    if count and save:
+        vector_service.save()
+    return count
+
+
+def index_documents(vector_service, documents: List[Tuple[int, int, str]],
+                    chunker: ChunkingService = chunking_service,
+                    window: int = INDEX_WINDOW_CHUNKS,
+                    workers: int = INDEX_WORKERS) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Index many documents: chunked in parallel, embedded as one stream.
+
+    arguments:
+        documents: [(doc_id, user_id, text), ...]
+
+    Documents are split in a process pool while the main process embeds.
+    Chunks from consecutive documents share embedding batches of `window`
+    chunks, so small documents don't each pay for a separate encode call,
+    and the index file is saved once at the end.
+
+    A batch that fails is retried one document at a time, so one bad
+    document doesn't fail its neighbours. A document that fails stops
+    there; if earlier batches already indexed some of its chunks (they
+    can't be taken back out) it is reported as partial, not failed:
+    indexing it again would add those chunks twice.
+
+    returns: (indexed doc ids, failed doc ids, partially indexed doc ids),
+             each in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    span_futures = None
+    if workers > 1 and len(documents) > 1:
+        pool = get_chunking_pool(workers)
+        span_futures = [pool.submit(_chunk_spans, chunker, text) for _, _, text in documents]
+
+    failed = set()
+    added = [0] * len(documents)  # chunks of each document in the index
+
+    def chunk_stream():
+        for i, (doc_id, user_id, text) in enumerate(documents):
+            try:
+                # all spans first: a document that can't be split adds nothing
+                spans = span_futures[i].result() if span_futures else list(chunker.iter_spans(text))
+            except Exception as e:
+                print(f"Chunking failed for document {doc_id}: {e}")
+                failed.add(i)
+                continue
+            if not spans:
+                failed.add(i)
+            for chunk in chunker.chunks_from_spans(text, spans, doc_id, user_id):
+                if i in failed:  # an earlier batch of it failed
+                    break
+                yield i, chunk
+
+    def add(batch):
+        vector_service.add_chunks([chunk for _, chunk in batch], save=False)
+        for i, _ in batch:
+            added[i] += 1
+
+    stream = chunk_stream()
+    tried = False
+    while True:
+        batch = list(islice(stream, window))
+        if not batch:
+            break
+        tried = True
+        try:
+            add(batch)
+        except Exception:
+            for i in dict.fromkeys(i for i, _ in batch):
+                try:
+                    add([item for item in batch if item[0] == i])
+                except Exception as e:
+                    print(f"Indexing failed for document {documents[i][0]}: {e}")
+                    failed.add(i)
+
+    if tried:
+        vector_service.save()
+
+    indexed_ids = [doc[0] for i, doc in enumerate(documents) if i not in failed]
+    failed_ids = [doc[0] for i, doc in enumerate(documents) if i in failed and not added[i]]
+    partial_ids = [doc[0] for i, doc in enumerate(documents) if i in failed and added[i]]
+    return indexed_ids, failed_ids, partial_ids
@@ -0,0 +1,89 @@
+import re
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+# Keyword search over document titles and content, answered by the database's
+# full-text index: MySQL FULLTEXT (documents_search) or SQLite FTS5
+# (documents_fts), see app.models. No embedding model involved.
+#
+# Every term must match. Only the last one matches as a prefix ("tax invo"
+# finds "tax invoice", as you type): expanding a short prefix touches every
+# word it starts, which made common-word queries several times slower.
+# Other dialects fall back to LIKE scans over titles only: content is stored
+# compressed (app.compression) and only the indexes above see its text.
+
+MAX_TERMS = 10
+
+# InnoDB doesn't index words shorter than innodb_ft_min_token_size (3)
+MYSQL_MIN_TERM_LENGTH = 3
+
+_WORD = re.compile(r"\w+")
+
+
+def parse_terms(query: str) -> List[str]:
+    """Words of the query, lowercased; punctuation and search operators are dropped"""
+    return [word.lower() for word in _WORD.findall(query)][:MAX_TERMS]
+
+
+def build_query(dialect: str, query: str, user_id: Optional[int], limit: int) -> Optional[TextClause]:
+    """
+    Statement returning (id, title, created_at, score) rows, best match first.
+
+    returns: None when the query has no searchable words
+    """
+    terms = parse_terms(query)
+    params = {"limit": limit}
+    user_filter = ""
+    if user_id is not None:
+        user_filter = "AND d.user_id = :user_id"
+        params["user_id"] = user_id
+
+    if dialect == "mysql":
+        terms = [t for t in terms if len(t) >= MYSQL_MIN_TERM_LENGTH]
+        if not terms:
+            return None
+        params["q"] = " ".join(f"+{t}" for t in terms) + "*"
+        match = "MATCH(s.title, s.content) AGAINST (:q IN BOOLEAN MODE)"
+        sql = f"""
+            SELECT d.id, d.title, d.created_at, {match} AS score
+            FROM documents_search s JOIN documents d ON d.id = s.id
+            WHERE {match} {user_filter}
+            ORDER BY score DESC
+            LIMIT :limit"""
+
+    elif dialect == "sqlite":
+        if not terms:
+            return None
+        params["q"] = " ".join(f'"{t}"' for t in terms) + "*"
+        # title matches weigh twice as much as content matches
+        sql = f"""
+            SELECT d.id, d.title, d.created_at, -bm25(documents_fts, 2.0, 1.0) AS score
+            FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+            WHERE documents_fts MATCH :q {user_filter}
+            ORDER BY score DESC
+            LIMIT :limit"""
+
+    else:
+        if not terms:
+            return None
+        conditions = []
+        for i, term in enumerate(terms):
+            params[f"t{i}"] = f"%{term}%"
+            conditions.append(f"lower(d.title) LIKE :t{i}")
+        sql = f"""
+            SELECT d.id, d.title, d.created_at, 0.0 AS score
+            FROM documents d
+            WHERE {" AND ".join(conditions)} {user_filter}
+            ORDER BY d.created_at DESC
+            LIMIT :limit"""
+
+    return text(sql).bindparams(**params)
+
+
+def build_response(query: str, rows) -> dict:
+    results = [
+        {"document_id": row.id, "title": row.title, "created_at": row.created_at, "score": float(row.score)}
+        for row in rows
+    ]
+    return {"query": query, "results": results, "total_results": len(results)}
@@ -0,0 +1,193 @@
+import os
+import io
+from abc import ABC, abstractmethod
+import queue
+import re
+import shlex
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+from PIL import Image
+
+# Which backend ocr_service uses: "tesserocr" (falls back to "subprocess" when
+# tesserocr isn't installed), "subprocess" or "pytesseract"
+OCR_BACKEND = os.getenv("OCR_BACKEND", "tesserocr").lower()
+# Pages OCR'd at once (tesseract processes, or engines in the tesserocr pool)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "120"))  # seconds per page
+
+
+class OCRBackend(ABC):
+    """
+    Reads the text of one (preprocessed) page.
+
+    ocr_service only talks to this interface, so how Tesseract is run can
+    be swapped per deployment without touching preprocessing or the routes.
+    lang and config are Tesseract's (-l, and --oem/--psm/-c options).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def image_to_string(self, image: Image.Image, lang: str, config: str) -> str:
+        """The page's text, as Tesseract prints it"""
+
+
+class SubprocessBackend(OCRBackend):
+    """
+    A tesseract process per page, the page piped in and the text read back
+    in memory (`tesseract stdin stdout`): no temp files, unlike pytesseract.
+    At most `workers` processes run at once, each single-threaded
+    (OMP_THREAD_LIMIT=1) so parallel pages don't fight over the cores.
+    """
+
+    name = "subprocess"
+
+    def __init__(self, tesseract_cmd: str = "tesseract", workers: int = OCR_WORKERS):
+        self.tesseract_cmd = tesseract_cmd
+        self._slots = threading.Semaphore(workers)
+        self._env = {**os.environ, "OMP_THREAD_LIMIT": "1"} if workers > 1 else None
+
+    def image_to_string(self, image: Image.Image, lang: str, config: str) -> str:
+        command = [self.tesseract_cmd, "stdin", "stdout", "-l", lang, *shlex.split(config)]
+        with self._slots:
+            try:
+                result = subprocess.run(
+                    command, input=encode_page(image), capture_output=True, timeout=OCR_TIMEOUT, env=self._env
+                )
+            except subprocess.TimeoutExpired:
+                raise TimeoutError(f"tesseract took longer than {OCR_TIMEOUT:g}s")
+        if result.returncode != 0:
+            raise RuntimeError(f"tesseract failed: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout.decode()
+
+
+def encode_page(image: Image.Image) -> bytes:
+    """The page as PNM (PBM/PGM/PPM): no compression to spend time on, and leptonica reads it from memory"""
+    if image.mode not in ("1", "L", "RGB"):
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    image.save(out, format="PPM")
+    return out.getvalue()
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    A pool of Tesseract engines kept loaded in-process (tesserocr bindings,
+    `pip install tesserocr`): no process start and no language data load
+    per page. tesserocr releases the GIL while recognizing, so `workers`
+    threads OCR in parallel. Engines are per (lang, config), created as needed.
+
+    tessdata is the language data directory; the tesserocr wheels don't know
+    the system's, so without it (or TESSDATA_PREFIX) engines can't load.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, workers: int = OCR_WORKERS, tessdata: Optional[str] = None):
+        if workers > 1:
+            # set before the library loads: one OpenMP thread per engine
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        from tesserocr import PyTessBaseAPI
+
+        self._api = PyTessBaseAPI
+        self.workers = workers
+        self.tessdata = tessdata
+        self._pools: Dict[Tuple[str, str], queue.Queue] = {}
+        self._created: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _engine(self, key: Tuple[str, str]):
+        """An idle engine for (lang, config): a new one while under `workers`, else wait for one"""
+        with self._lock:
+            pool = self._pools.setdefault(key, queue.Queue())
+            create = pool.empty() and self._created.get(key, 0) < self.workers
+            if create:
+                self._created[key] = self._created.get(key, 0) + 1
+        if create:
+            # loads the language data: once per engine, not per page
+            oem, psm, variables = parse_config(key[1])
+            path = {"path": self.tessdata} if self.tessdata else {}
+            try:
+                return self._api(lang=key[0], oem=oem, psm=psm, variables=variables, **path)
+            except BaseException:
+                with self._lock:
+                    self._created[key] -= 1  # give the slot back (e.g. a missing language pack)
+                raise
+        try:
+            return pool.get(timeout=OCR_TIMEOUT)
+        except queue.Empty:
+            raise TimeoutError(f"no OCR engine free after {OCR_TIMEOUT:g}s")
+
+    def image_to_string(self, image: Image.Image, lang: str, config: str) -> str:
+        key = (lang, config)
+        api = self._engine(key)
+        try:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._pools[key].put(api)
+
+
+def parse_config(config: str) -> Tuple[int, int, Dict[str, str]]:
+    """(oem, psm, -c variables) of a Tesseract command line config; Tesseract's defaults when missing"""
+    oem, psm, variables = 3, 3, {}
+    args = shlex.split(config)
+    for flag, value in zip(args, args[1:]):
+        if flag == "--oem":
+            oem = int(value)
+        elif flag == "--psm":
+            psm = int(value)
+        elif flag == "-c":
+            name, _, setting = value.partition("=")
+            variables[name] = setting
+    return oem, psm, variables
+
+
+class PytesseractBackend(OCRBackend):
+    """pytesseract.image_to_string: temp files in and out, a process per page (the original path)"""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image, lang: str, config: str) -> str:
+        import pytesseract
+
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+def find_tessdata(tesseract_cmd: str) -> Optional[str]:
+    """The language data directory the tesseract command uses (TESSDATA_PREFIX if set)"""
+    if os.getenv("TESSDATA_PREFIX"):
+        return os.environ["TESSDATA_PREFIX"]
+    try:
+        result = subprocess.run([tesseract_cmd, "--list-langs"], stdin=subprocess.DEVNULL, capture_output=True,
+                                text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    # List of available languages in "/usr/share/tesseract-ocr/5/tessdata/" (3):
+    match = re.search(r'"(.+?)"', result.stdout + result.stderr)
+    return match.group(1) if match else None
+
+
+def tesserocr_or_subprocess(tesseract_cmd: str) -> OCRBackend:
+    """The engine pool when tesserocr is installed, else a tesseract process per page"""
+    try:
+        return TesserocrBackend(tessdata=find_tessdata(tesseract_cmd))
+    except ImportError as e:
+        print(f"tesserocr not available ({e}), OCR runs a tesseract process per page")
+        return SubprocessBackend(tesseract_cmd)
+
+
+BACKENDS = {
+    "subprocess": lambda tesseract_cmd: SubprocessBackend(tesseract_cmd),
+    "tesserocr": tesserocr_or_subprocess,
+    "pytesseract": lambda tesseract_cmd: PytesseractBackend(),
+}
+
+
+def create_ocr_backend(name: str = OCR_BACKEND, tesseract_cmd: str = "tesseract") -> OCRBackend:
+    """Build the backend registered under name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR_BACKEND: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](tesseract_cmd)
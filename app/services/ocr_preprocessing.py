@@ -0,0 +1,162 @@
+"""
+Image cleanup before Tesseract, and Tesseract settings per document type.
+
+preprocess() turns a page (scan, phone photo, rendered PDF page) into what
+Tesseract reads best and fastest:
+
+  grayscale   one channel instead of three
+  downscale   to OCR_TARGET_DPI: a 12 MP photo of a page is ~400 dpi, and
+              Tesseract's time grows with the pixels, not with the text.
+              Photos don't record a DPI; theirs is estimated from the
+              height of their text lines
+  deskew      straighten pages scanned or photographed at an angle (up to
+              OCR_MAX_SKEW degrees); tilted lines break line finding
+  binarize    black on white: no gray background, shadows or paper texture
+              left to misread. Otsu's global threshold for scans, a local
+              one for photos and receipts (uneven lighting)
+
+Each step can be switched off by env; OCR_PREPROCESS=0 skips them all.
+See benchmarks/bench_ocr_preprocessing.py for time per page and accuracy.
+"""
+import os
+from typing import Optional
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "1") == "1"
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))  # also the PDF render resolution
+OCR_DESKEW = os.getenv("OCR_DESKEW", "1") == "1"
+OCR_MAX_SKEW = float(os.getenv("OCR_MAX_SKEW", "5"))  # degrees
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "1") == "1"
+OCR_LANG = os.getenv("OCR_LANG", "eng")  # installed language packs, e.g. "eng+deu"
+
+# for images that don't record their DPI (photos): the main band of a text
+# line (x-height for lower case, cap height for capitals) is ~0.6 em, and
+# body text is ~11 pt. Smaller print makes the guess low: less downscaling
+TEXT_PT = 11
+TEXT_BAND_EM = 0.6
+
+# local thresholding (Bradley): ink is darker than the mean of the pixels
+# within ADAPTIVE_RADIUS_INCHES by more than ADAPTIVE_OFFSET
+ADAPTIVE_RADIUS_INCHES = 0.1
+ADAPTIVE_OFFSET = 0.15
+
+# Tesseract settings per document type: page segmentation mode (--psm),
+# LSTM engine only (--oem 1), and no dictionaries where text is mostly
+# codes and amounts that a dictionary would only "correct"
+NO_DICTIONARIES = "-c load_system_dawg=0 -c load_freq_dawg=0"
+OCR_PROFILES = {
+    "document": "--oem 1 --psm 3",  # printed pages: full layout analysis
+    "receipt": f"--oem 1 --psm 4 {NO_DICTIONARIES}",  # one column of lines of varying size
+    "form": f"--oem 1 --psm 11 {NO_DICTIONARIES}",  # scattered fields, no reading order
+    "photo": "--oem 1 --psm 3",  # a page photographed with a phone: like document, uneven lighting
+}
+DEFAULT_DOC_TYPE = "document"
+# binarized with a local threshold: lit unevenly (phone photos, curled thermal paper)
+ADAPTIVE_DOC_TYPES = ("receipt", "photo")
+
+
+def tesseract_args(doc_type: str = DEFAULT_DOC_TYPE) -> dict:
+    """pytesseract.image_to_string keyword arguments for a document type"""
+    return {"lang": OCR_LANG, "config": OCR_PROFILES[doc_type]}
+
+
+def effective_dpi(image: Image.Image) -> Optional[float]:
+    """The image's DPI if it records a plausible one (scans do, photos don't)"""
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] >= 72:
+        return float(dpi[0])
+    return None
+
+
+def adaptive_ink(gray: Image.Image, radius: int) -> np.ndarray:
+    """Ink mask: pixels darker than their neighbourhood's mean by ADAPTIVE_OFFSET"""
+    mean = np.asarray(gray.filter(ImageFilter.BoxBlur(radius)), dtype=np.float32)
+    return np.asarray(gray, dtype=np.float32) < mean * (1 - ADAPTIVE_OFFSET)
+
+
+def text_dpi(gray: Image.Image, angle: float = 0.0) -> Optional[float]:
+    """
+    DPI of an image that doesn't record one, from the height of its text
+    lines (see TEXT_PT); None when it finds no lines of text.
+
+    On a small straightened copy, rows with a fair share of ink form one
+    run per text line: the median run height is the lines' main band.
+    """
+    scale = min(1.0, 1500 / max(gray.size))
+    small = gray.resize((max(1, round(gray.width * scale)), max(1, round(gray.height * scale))), Image.BILINEAR)
+    if angle:
+        small = small.rotate(angle, resample=Image.BILINEAR, fillcolor=255)
+    rows = adaptive_ink(small, max(4, min(small.size) // 30)).sum(axis=1)
+    active = np.concatenate(([0], rows > max(2, 0.2 * np.percentile(rows, 95)), [0])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(active))
+    runs = edges[1::2] - edges[::2]
+    runs = runs[runs >= 2]
+    if len(runs) < 3:
+        return None
+    band = float(np.median(runs)) / scale
+    return band / (TEXT_BAND_EM * TEXT_PT / 72)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Gray level splitting ink from paper (Otsu: maximum between-class variance)"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    below = np.cumsum(hist)  # pixels at or below each level
+    below_sum = np.cumsum(hist * np.arange(256))
+    total, total_sum = below[-1], below_sum[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_sum * below - below_sum * total) ** 2 / (below * (total - below))
+    return int(np.nanargmax(between)) if np.isfinite(between).any() else 127
+
+
+def deskew_angle(gray: Image.Image, threshold: int, max_skew: float = OCR_MAX_SKEW) -> float:
+    """
+    Rotation (degrees, counter-clockwise) that straightens the text lines.
+
+    Projection profile on a small copy: at the right angle the text lines
+    are rows full of ink between empty rows, so row sums change the most
+    from one row to the next. Coarse 0.5 degree steps, then 0.1 around
+    the best.
+    """
+    small = gray.copy()
+    small.thumbnail((1000, 1000))
+    ink = small.point(lambda p: 255 if p <= threshold else 0)  # rotation fills with 0: no ink
+
+    def score(angle: float) -> float:
+        rows = np.asarray(ink.rotate(angle, resample=Image.NEAREST), dtype=np.float32).sum(axis=1)
+        return float(np.square(np.diff(rows)).sum())
+
+    # ties (a blank page) go to the smallest rotation
+    coarse = max(sorted(np.arange(-max_skew, max_skew + 0.25, 0.5), key=abs), key=score)
+    fine = sorted(np.arange(coarse - 0.4, coarse + 0.45, 0.1), key=lambda angle: abs(angle - coarse))
+    return round(float(max(fine, key=score)), 1)
+
+
+def preprocess(image: Image.Image, dpi: Optional[float] = None, doc_type: str = DEFAULT_DOC_TYPE) -> Image.Image:
+    """
+    Grayscale, downscaled, deskewed and binarized copy of a page.
+
+    dpi: known resolution (a rendered PDF); else the image's own, else
+    estimated from its text. Pages whose DPI can't be told stay full size.
+    """
+    if not OCR_PREPROCESS:
+        return image
+    dpi = dpi or effective_dpi(image)
+    gray = ImageOps.exif_transpose(image).convert("L")  # photos: stored sideways plus an orientation tag
+
+    threshold = otsu_threshold(np.asarray(gray))
+    angle = deskew_angle(gray, threshold) if OCR_DESKEW else 0.0
+    dpi = dpi or text_dpi(gray, angle)
+    if dpi and dpi > OCR_TARGET_DPI * 1.1:
+        scale = OCR_TARGET_DPI / dpi
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        gray = gray.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+    if angle:
+        gray = gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    if OCR_BINARIZE and doc_type in ADAPTIVE_DOC_TYPES:
+        radius = max(4, round(ADAPTIVE_RADIUS_INCHES * min(dpi or OCR_TARGET_DPI, OCR_TARGET_DPI)))
+        gray = Image.fromarray(np.where(adaptive_ink(gray, radius), 0, 255).astype(np.uint8))
+    elif OCR_BINARIZE:
+        gray = gray.point(lambda p: 255 if p > threshold else 0)
+    return gray
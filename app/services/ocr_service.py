@@ -1,11 +1,15 @@
 import pytesseract
 from PIL import Image
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_path
 import io
 import shutil
 import os
+import threading
 from dotenv import load_dotenv
 import pypdf
+from app.metrics import timed
+from app.services.ocr_backends import OCRBackend, create_ocr_backend
+from app.services.ocr_preprocessing import DEFAULT_DOC_TYPE, OCR_TARGET_DPI, preprocess, tesseract_args
 
 load_dotenv()
 
@@ -23,26 +27,55 @@ else:
         raise EnvironmentError("Tesseract executable not found. Please set TESSERACT_PATH in .env or add Tesseract to system PATH.")
     
 
-def process_image(image_bytes: bytes) -> str:
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_ocr_backend() -> OCRBackend:
+    """The process's OCR backend (OCR_BACKEND, see ocr_backends), created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_ocr_backend(tesseract_cmd=pytesseract.pytesseract.tesseract_cmd)
+    return _backend
+
+
+def _ocr(image: Image.Image, doc_type: str, dpi=None) -> str:
+    """Preprocessed image through Tesseract with the document type's settings"""
+    return get_ocr_backend().image_to_string(preprocess(image, dpi, doc_type), **tesseract_args(doc_type))
+
+
+@timed("ocr_process_image")
+def process_image(image_bytes: bytes, doc_type: str = DEFAULT_DOC_TYPE) -> str:
     """Reads text from an image files(png,jpg) bytes"""
     try:
         image = Image.open(io.BytesIO(image_bytes))
-        text = pytesseract.image_to_string(image)
+        text = _ocr(image, doc_type)
         return text.strip()
     except Exception as e:
         raise ValueError(f"Error processing image: {str(e)}")
-    
 
-def process_pdf(pdf_bytes: bytes) -> str:
+
+@timed("ocr_process_image")
+def process_image_file(path: str, doc_type: str = DEFAULT_DOC_TYPE) -> str:
+    """Same as process_image for an image on disk"""
+    try:
+        with Image.open(path) as image:
+            return _ocr(image, doc_type).strip()
+    except Exception as e:
+        raise ValueError(f"Error processing image: {str(e)}")
+
+
+def _pdf_text(source):
     """
     Smart Processing (Fixed for short text):
     1. Checks if the PDF has ANY selectable text.
-    2. If yes -> Returns text instantly (No OCR).
-    3. If no (or only whitespace) -> Runs standard OCR.
+    2. If yes -> Returns the text (No OCR).
+    3. If no (or only whitespace) -> Returns None, run OCR.
     """
     try:
-        pdf_file = io.BytesIO(pdf_bytes)
-        reader = pypdf.PdfReader(pdf_file)
+        reader = pypdf.PdfReader(source)
         full_text = []
         has_actual_text = False
 
@@ -60,29 +93,69 @@ def process_pdf(pdf_bytes: bytes) -> str:
     except Exception as e:
         #fallback to ocr
         pass
+    return None
 
-    #Fallback to OCR
-    
+
+def _poppler_path():
     # Auto-detect Poppler: If POPPLER_PATH is set and exists, use it.
     # Otherwise, assume poppler is in system PATH (Docker or Linux environment)
-    poppler_path = None
     if POPPLER_PATH and os.path.exists(POPPLER_PATH):
-        poppler_path = POPPLER_PATH
-    
+        return POPPLER_PATH
+    return None
+
+
+def _ocr_pages(pages, doc_type: str) -> str:
+    ocr_text = []
+    for i, page in enumerate(pages):
+        text = _ocr(page, doc_type, dpi=OCR_TARGET_DPI)
+        ocr_text.append(f"--- Page {i+1} ---\n{text}")
+    return "\n\n".join(ocr_text)
+
+
+def _pdf_error(e: Exception) -> Exception:
+    if "poppler" in str(e).lower():
+        return EnvironmentError("Error with Poppler. Ensure Poppler is installed and POPPLER_PATH is correct.")
+    return ValueError(f"Error processing PDF: {str(e)}")
+
+
+@timed("ocr_process_pdf")
+def process_pdf(pdf_bytes: bytes, doc_type: str = DEFAULT_DOC_TYPE) -> str:
+    """
+    Text of a PDF: its selectable text if it has any, else OCR of every
+    page rendered in grayscale at OCR_TARGET_DPI.
+    """
+    text = _pdf_text(io.BytesIO(pdf_bytes))
+    if text is not None:
+        return text
+
+    #Fallback to OCR
     try:
-        pages = convert_from_bytes(pdf_bytes, dpi=300, poppler_path=poppler_path)
-        ocr_text = []
-        for i, page in enumerate(pages):
-            text = pytesseract.image_to_string(page)
-            ocr_text.append(f"--- Page {i+1} ---\n{text}")
-        
-        return "\n\n".join(ocr_text)
-        
+        pages = convert_from_bytes(pdf_bytes, dpi=OCR_TARGET_DPI, grayscale=True, poppler_path=_poppler_path())
+        return _ocr_pages(pages, doc_type)
     except Exception as e:
-        if "poppler" in str(e).lower():
-            raise EnvironmentError("Error with Poppler. Ensure Poppler is installed and POPPLER_PATH is correct.")
-        raise ValueError(f"Error processing PDF: {str(e)}")
-    
+        raise _pdf_error(e)
 
 
+@timed("ocr_process_pdf")
+def process_pdf_file(path: str, doc_type: str = DEFAULT_DOC_TYPE) -> str:
+    """
+    Same as process_pdf for a PDF on disk (resumable uploads, up to
+    hundreds of MB). Pages are rendered one at a time: a 300 dpi page is
+    ~9 MB of gray pixels, so a long scan must never be rendered whole.
+    """
+    text = _pdf_text(path)
+    if text is not None:
+        return text
 
+    try:
+        poppler_path = _poppler_path()
+        page_count = pdfinfo_from_path(path, poppler_path=poppler_path)["Pages"]
+        pages = (
+            convert_from_path(
+                path, dpi=OCR_TARGET_DPI, grayscale=True, first_page=n, last_page=n, poppler_path=poppler_path
+            )[0]
+            for n in range(1, page_count + 1)
+        )
+        return _ocr_pages(pages, doc_type)
+    except Exception as e:
+        raise _pdf_error(e)
@@ -0,0 +1,181 @@
+"""
+Local search server: one process owns the embedding model and FAISS index.
+
+API workers started with VECTOR_SERVICE_SOCKET (or VECTOR_SERVICE_URL) talk
+to it through RemoteVectorService instead of each loading their own copy,
+so memory doesn't grow with --workers and there is a single index writer.
+
+usage:
+    python -m app.services.search_server --uds /tmp/vector.sock
+    VECTOR_SERVICE_SOCKET=/tmp/vector.sock uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Tuple
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from app.metrics import MetricsMiddleware, render_metrics
+from app.responses import ORJSONResponse
+from app.schemas import SearchRequest
+from app.tracing import TracingMiddleware, bind
+from app.services.vector_service import get_local_vector_service
+
+# Concurrent /search calls arriving within this window are embedded and
+# searched together
+MAX_BATCH_SIZE = int(os.getenv("SEARCH_SERVER_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.getenv("SEARCH_SERVER_MAX_WAIT_MS", "5"))
+
+
+class SearchBatcher:
+    """
+    Collects concurrent search requests and runs them as one batch.
+
+    A single background thread drains the queue: it takes the first waiting
+    request, keeps collecting for up to max_wait_ms (or max_batch_size
+    requests) and hands the lot to search_batch, traced under the first
+    request's trace.
+    """
+
+    def __init__(self, search_batch: Callable[[List[Dict]], List[List[Dict]]],
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.search_batch = search_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[Dict, Future, Callable] | None]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="search-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, request: Dict) -> Future:
+        """Queue one search; the future resolves to its result list"""
+        future: Future = Future()
+        self._queue.put((request, future, bind(self.search_batch)))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # finish this batch, then stop
+                    break
+                batch.append(item)
+
+            try:
+                results = batch[0][2]([request for request, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+class BatchSearchRequest(BaseModel):
+    requests: List[SearchRequest]
+
+class AddChunksRequest(BaseModel):
+    chunks: List[Dict]
+    save: bool = True
+
+
+_batcher: SearchBatcher = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _batcher
+    # Load model + index before accepting traffic from the workers
+    service = await asyncio.to_thread(get_local_vector_service)
+    _batcher = SearchBatcher(service.search_batch)
+    yield
+    _batcher.close()
+
+
+app = FastAPI(title="Vector Search Server", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)  # spans under the API request's X-Request-ID
+
+
+# search results go out as ORJSONResponse: plain dicts with numpy scores,
+# no response model to validate, and jsonable_encoder is the slow path
+@app.post("/search")
+async def search(request: SearchRequest):
+    """Single search, batched with any other in-flight searches"""
+    return ORJSONResponse(await asyncio.wrap_future(_batcher.submit(request.model_dump())))
+
+
+@app.post("/search/batch")
+def search_batch(request: BatchSearchRequest):
+    """Many searches from one caller, already a batch"""
+    return ORJSONResponse(get_local_vector_service().search_batch([r.model_dump() for r in request.requests]))
+
+
+@app.post("/chunks")
+def add_chunks(request: AddChunksRequest):
+    """Embed and index chunks; this process is the only index writer"""
+    get_local_vector_service().add_chunks(request.chunks, save=request.save)
+    return {"added": len(request.chunks)}
+
+
+@app.post("/save")
+def save():
+    """Write the index file after add_chunks calls with save=False"""
+    get_local_vector_service().save()
+    return {"status": "saved"}
+
+
+@app.get("/readyz")
+def readyz():
+    if _batcher is None:
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Shared embedding/search server")
+    parser.add_argument("--uds", help="unix socket path (preferred on one host)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    # Always exactly one process: it is the single owner of the index
+    if args.uds:
+        uvicorn.run(app, uds=args.uds)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
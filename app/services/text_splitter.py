@@ -0,0 +1,235 @@
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple, Union
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+Span = Tuple[int, int]
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer(name: str):
+    """Fast (Rust) tokenizer of a Hugging Face model, loaded once per process"""
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(name, use_fast=True)
+
+
+class TextSplitter:
+    """
+    Recursive character splitter working on character offsets.
+
+    Same separator hierarchy and chunk_size/chunk_overlap meaning as
+    LangChain's RecursiveCharacterTextSplitter (with keep_separator=True,
+    strip_whitespace=True and length_function=len, as ChunkingService used
+    it), but it never copies the text: it returns (start, end) spans.
+
+    modes:
+        "native" -> one greedy forward pass. Each chunk ends where the
+                    highest-priority separator last occurs within chunk_size
+                    (str.rfind over that range only), and the next chunk
+                    starts at the first occurrence of that separator inside
+                    the overlap. Chunks are close to LangChain's but not
+                    always identical.
+        "compat" -> LangChain's recursive split-and-merge on offsets;
+                    output is identical to split_text of the LangChain
+                    splitter.
+
+    With a tokenizer (native mode only), chunk_size and chunk_overlap count
+    tokens instead of characters. Each range is tokenized once, in a single
+    call, and every length check after that is a lookup in its offsets.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int,
+                 separators: Optional[List[str]] = None, mode: str = "native",
+                 tokenizer: Union[str, Callable, None] = None):
+        """
+        arguments:
+            tokenizer: Hugging Face model name (loaded lazily, once per
+                       process, so pickling the splitter stays cheap) or a
+                       fast tokenizer object
+        """
+        if mode not in ("native", "compat"):
+            raise ValueError(f"Unknown splitter mode: {mode} (use 'native' or 'compat')")
+        if tokenizer is not None and mode != "native":
+            raise ValueError("Token lengths are only supported in native mode")
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) is larger than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(DEFAULT_SEPARATORS if separators is None else separators)
+        self.mode = mode
+        self._patterns = [re.compile(re.escape(s)) if s else None for s in self.separators]
+        self._tokenizer = tokenizer
+
+    @property
+    def tokenizer(self):
+        if isinstance(self._tokenizer, str):
+            return load_tokenizer(self._tokenizer)
+        return self._tokenizer
+
+    def split_text(self, text: str) -> List[str]:
+        """Chunk texts, like RecursiveCharacterTextSplitter.split_text"""
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def split_spans(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Span]:
+        """
+        (start, end) offsets of the chunks of text[start:end], relative to text.
+
+        Splitting a range gives the same chunks as splitting the sliced
+        string, without making the slice.
+        """
+        end = len(text) if end is None else min(end, len(text))
+        if start >= end:
+            return []
+        spans: List[Span] = []
+        if self.mode == "compat":
+            self._split_compat(text, start, end, 0, spans)
+        else:
+            self._split_native(text, start, end, spans)
+        return spans
+
+    # -- shared helpers --
+
+    @staticmethod
+    def _strip(text: str, start: int, end: int) -> Optional[Span]:
+        """Offsets of text[start:end].strip(), None if nothing is left"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if start < end else None
+
+    def _token_offsets(self, text: str, start: int, end: int) -> Tuple[List[int], List[int]]:
+        """Start and end char offsets of every token in text[start:end]"""
+        encoding = self.tokenizer(text[start:end], add_special_tokens=False, return_offsets_mapping=True,
+                                  return_attention_mask=False, return_token_type_ids=False, verbose=False)
+        offsets = encoding["offset_mapping"]
+        return [start + a for a, _ in offsets], [start + b for _, b in offsets]
+
+    def _rulers(self, text: str, start: int, end: int):
+        """
+        (limit, back) functions for the native pass:
+            limit(pos)  -> furthest cut for a chunk starting at pos
+            back(cut)   -> where the overlap before cut begins
+        """
+        if self._tokenizer is None:
+            return (lambda pos: pos + self.chunk_size), (lambda cut: cut - self.chunk_overlap)
+
+        starts, ends = self._token_offsets(text, start, end)
+
+        def limit(pos: int) -> int:
+            # chunk may hold the chunk_size tokens from the first one ending after pos
+            last = bisect_right(ends, pos) + self.chunk_size
+            return starts[last] if last < len(starts) else end
+
+        def back(cut: int) -> int:
+            first = bisect_left(starts, cut) - self.chunk_overlap
+            return starts[first] if 0 <= first < len(starts) else start
+
+        return limit, back
+
+    def _boundaries(self, text: str, level: int, start: int, end: int) -> List[int]:
+        """Where separator `level` starts inside [start, end) (it stays with the next piece)"""
+        return [m.start() for m in self._patterns[level].finditer(text, start, end)]
+
+    # -- native: single greedy pass --
+
+    def _split_native(self, text: str, start: int, end: int, spans: List[Span]):
+        limit_of, back_of = self._rulers(text, start, end)
+        pos = start
+        while pos < end and text[pos].isspace():
+            pos += 1
+        while pos < end:
+            limit = limit_of(pos)
+            sep = None
+            if limit >= end:
+                chunk_end = end
+            else:
+                chunk_end = limit  # no separator fits (and no "" level): hard cut
+                for candidate in self.separators:
+                    if candidate == "":  # any character boundary
+                        sep = candidate
+                        break
+                    # last occurrence starting in (pos, limit]; it goes with the next chunk
+                    p = text.rfind(candidate, pos + 1, min(limit + len(candidate), end))
+                    if p != -1:
+                        chunk_end, sep = p, candidate
+                        break
+
+            span = self._strip(text, pos, chunk_end)
+            if span:
+                spans.append(span)
+            if chunk_end >= end:
+                return
+
+            # start the next chunk inside the overlap, on the separator this
+            # chunk was cut at
+            next_pos = chunk_end
+            if self.chunk_overlap and sep is not None:
+                overlap_start = max(back_of(chunk_end), pos + 1)
+                if sep == "":
+                    next_pos = overlap_start
+                else:
+                    p = text.find(sep, overlap_start, chunk_end)
+                    if p != -1:
+                        next_pos = p
+            pos = next_pos
+            while pos < end and text[pos].isspace():
+                pos += 1
+
+    # -- compat: LangChain's algorithm on offsets --
+
+    def _split_compat(self, text: str, start: int, end: int, level: int, spans: List[Span]):
+        """RecursiveCharacterTextSplitter._split_text for text[start:end]"""
+        # first separator (from this level down) that occurs in the range
+        sep_level = len(self.separators) - 1
+        has_next = False
+        for i in range(level, len(self.separators)):
+            if self.separators[i] == "":
+                sep_level = i
+                break
+            if self._patterns[i].search(text, start, end):
+                sep_level = i
+                has_next = i + 1 < len(self.separators)
+                break
+
+        if self.separators[sep_level] == "":
+            cuts = list(range(start, end + 1))
+        else:
+            cuts = [start] + self._boundaries(text, sep_level, start, end) + [end]
+        splits = [(a, b) for a, b in zip(cuts, cuts[1:]) if a < b]
+
+        good: List[Span] = []
+        for a, b in splits:
+            if b - a < self.chunk_size:
+                good.append((a, b))
+                continue
+            if good:
+                self._merge_compat(text, good, spans)
+                good = []
+            if not has_next:
+                spans.append((a, b))  # LangChain keeps these unstripped
+            else:
+                self._split_compat(text, a, b, sep_level + 1, spans)
+        if good:
+            self._merge_compat(text, good, spans)
+
+    def _merge_compat(self, text: str, splits: List[Span], spans: List[Span]):
+        """TextSplitter._merge_splits for adjacent splits (separator length 0)"""
+        first = 0  # current doc is splits[first:j]
+        total = 0
+        for j, (a, b) in enumerate(splits):
+            length = b - a
+            if total + length > self.chunk_size and first < j:
+                span = self._strip(text, splits[first][0], splits[j - 1][1])
+                if span:
+                    spans.append(span)
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    total -= splits[first][1] - splits[first][0]
+                    first += 1
+            total += length
+        span = self._strip(text, splits[first][0], splits[-1][1])
+        if span:
+            spans.append(span)
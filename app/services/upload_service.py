@@ -0,0 +1,215 @@
+"""
+Resumable uploads: large files arrive in chunks and go straight to disk.
+
+    POST /documents/uploads                 start: file name, type, size, title, owner
+    PUT  /documents/uploads/{id}            one chunk at Upload-Offset, with X-Chunk-SHA256
+    GET  /documents/uploads/{id}            offset to resume from, OCR status
+    POST /documents/uploads/{id}/complete   create the document, OCR it in the background
+
+An upload is a directory under UPLOAD_DIR: the file received so far (data),
+its metadata (upload.json) and a lock file (lock, see exclusive). A chunk is streamed into the file at its
+offset and cut off again if its checksum doesn't match (or the client goes
+away), so the file only ever holds verified chunks and its size is the
+offset to resume from, after a dropped connection or a server restart.
+No chunk or file is ever held in memory whole.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+MAX_RESUMABLE_UPLOAD_BYTES = int(os.getenv("MAX_RESUMABLE_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+# chunk size suggested to clients; a chunk may be up to 4x that
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+MAX_CHUNK_BYTES = 4 * UPLOAD_CHUNK_BYTES
+WRITE_BUFFER_BYTES = 1024 * 1024  # chunk bytes collected before each disk write
+# unfinished (or finished) uploads are deleted this long after their last change
+UPLOAD_EXPIRY_SECONDS = float(os.getenv("UPLOAD_EXPIRY_HOURS", "24")) * 3600
+
+
+def _upload_dir(upload_id: str) -> str:
+    # ids are uuid4 hex; anything else names no upload (and can't escape UPLOAD_DIR)
+    if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return os.path.join(UPLOAD_DIR, upload_id)
+
+
+def data_path(upload_id: str) -> str:
+    return os.path.join(_upload_dir(upload_id), "data")
+
+
+def create(filename: str, content_type: str, size: int, title: str, user_id: int, doc_type: str) -> dict:
+    if size > MAX_RESUMABLE_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"File size exceeds {MAX_RESUMABLE_UPLOAD_BYTES // (1024 * 1024)} MB limit."
+        )
+    purge_expired()
+    upload = {
+        "upload_id": uuid.uuid4().hex,
+        "filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "title": title,
+        "user_id": user_id,
+        "doc_type": doc_type,
+        "status": "uploading",  # -> processing (OCR) -> done | failed
+        "document_id": None,
+        "error": None,
+    }
+    os.makedirs(_upload_dir(upload["upload_id"]))
+    open(data_path(upload["upload_id"]), "wb").close()
+    save(upload)
+    return upload
+
+
+def load(upload_id: str) -> dict:
+    try:
+        with open(os.path.join(_upload_dir(upload_id), "upload.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+def save(upload: dict):
+    # write-then-rename: a crash never leaves half an upload.json
+    path = os.path.join(_upload_dir(upload["upload_id"]), "upload.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(upload, f)
+    os.replace(path + ".tmp", path)
+
+
+def mark(upload: dict, **changes):
+    upload.update(changes)
+    save(upload)
+
+
+def received(upload: dict) -> int:
+    """Bytes received so far: the offset the next chunk must start at"""
+    try:
+        return os.path.getsize(data_path(upload["upload_id"]))
+    except FileNotFoundError:
+        return upload["size"]  # OCR'd and deleted
+
+
+def status(upload: dict) -> dict:
+    return {**upload, "offset": received(upload), "chunk_size": UPLOAD_CHUNK_BYTES}
+
+
+@contextmanager
+def exclusive(upload_id: str):
+    """
+    Claim the upload for one chunk (or the completion) at a time: a client
+    retrying a chunk while the first attempt is still streaming gets a 409
+    instead of both writing the file. An flock on the upload's lock file,
+    so it holds across API worker processes (and threads: every claim opens
+    the file anew); the OS drops it if the process dies.
+    """
+    try:
+        lock = open(os.path.join(_upload_dir(upload_id), "lock"), "a")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    with lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise HTTPException(status_code=409, detail="Upload is busy with another request")
+        yield
+
+
+async def write_chunk(upload_id: str, offset: int, checksum: str, request: Request) -> dict:
+    """
+    Stream the request body into the file at offset, keeping it only if its
+    sha256 is checksum; returns the upload. The body is read on the event
+    loop, hashing and disk writes happen in the threadpool, WRITE_BUFFER_BYTES
+    at a time.
+    """
+    if int(request.headers.get("content-length") or 0) > MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=413, detail=f"Chunks are limited to {MAX_CHUNK_BYTES} bytes.")
+
+    with exclusive(upload_id):
+        upload = load(upload_id)
+        if upload["status"] != "uploading":
+            raise HTTPException(status_code=409, detail="Upload already completed")
+        f = await run_in_threadpool(open, data_path(upload_id), "r+b")
+        try:
+            current = await run_in_threadpool(f.seek, 0, os.SEEK_END)
+            if offset != current:
+                raise HTTPException(
+                    status_code=409, detail=f"Upload is at offset {current}", headers={"Upload-Offset": str(current)}
+                )
+            digest = hashlib.sha256()
+
+            def append(data: bytes):
+                digest.update(data)
+                f.write(data)
+
+            buffer = bytearray()
+            written = 0
+            try:
+                async for piece in request.stream():
+                    written += len(piece)
+                    if written > MAX_CHUNK_BYTES or offset + written > upload["size"]:
+                        raise HTTPException(status_code=413, detail="Chunk goes past the declared size or chunk limit.")
+                    buffer += piece
+                    if len(buffer) >= WRITE_BUFFER_BYTES:
+                        await run_in_threadpool(append, bytes(buffer))
+                        buffer.clear()
+                await run_in_threadpool(append, bytes(buffer))
+                if digest.hexdigest() != checksum.lower():
+                    raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+            except BaseException:
+                # bad chunk, client gone, cancelled: back to the last good offset
+                # (not awaited: a cancelled request must still get here)
+                f.truncate(offset)
+                raise
+        finally:
+            f.close()
+    return upload
+
+
+def file_sha256(upload_id: str) -> str:
+    digest = hashlib.sha256()
+    with open(data_path(upload_id), "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finish(upload: dict, sha256: Optional[str] = None):
+    """Check the file is all there (blocking: the whole-file checksum reads it)"""
+    if upload["status"] != "uploading":
+        raise HTTPException(status_code=409, detail="Upload already completed")
+    size = received(upload)
+    if size != upload["size"]:
+        raise HTTPException(status_code=409, detail=f"Upload incomplete: {size} of {upload['size']} bytes")
+    if sha256 and file_sha256(upload["upload_id"]) != sha256.lower():
+        raise HTTPException(status_code=400, detail="File checksum mismatch")
+
+
+def discard_data(upload: dict):
+    """Delete the file once its text is in the database (upload.json stays, for status)"""
+    try:
+        os.remove(data_path(upload["upload_id"]))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired():
+    """Delete uploads untouched for UPLOAD_EXPIRY_SECONDS (abandoned, or long finished)"""
+    if not os.path.isdir(UPLOAD_DIR):
+        return
+    cutoff = time.time() - UPLOAD_EXPIRY_SECONDS
+    for entry in os.scandir(UPLOAD_DIR):
+        # chunks touch data, status changes upload.json
+        changed = [os.path.getmtime(path) for path in (os.path.join(entry.path, "data"),
+                   os.path.join(entry.path, "upload.json")) if os.path.exists(path)]
+        if entry.is_dir() and max(changed, default=0) < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
@@ -0,0 +1,84 @@
+import os
+import threading
+import httpx
+from typing import List, Dict, Optional
+from app.tracing import REQUEST_ID_HEADER, current_request_id
+
+# Where the shared search server listens (see app/services/search_server.py).
+# Set one of these in the API workers to use it instead of a local model.
+VECTOR_SERVICE_URL = os.getenv("VECTOR_SERVICE_URL")
+VECTOR_SERVICE_SOCKET = os.getenv("VECTOR_SERVICE_SOCKET")
+VECTOR_SERVICE_TIMEOUT = float(os.getenv("VECTOR_SERVICE_TIMEOUT", "60"))
+
+
+class RemoteVectorService:
+    """
+    Client for the local search server.
+
+    Same search/add_chunks interface as VectorService, but the model and the
+    FAISS index live in one server process shared by every API worker.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, socket_path: Optional[str] = None,
+                 timeout: float = VECTOR_SERVICE_TIMEOUT):
+        transport = httpx.HTTPTransport(uds=socket_path) if socket_path else None
+        # httpx needs a host even over a unix socket; it is ignored there
+        self.client = httpx.Client(
+            base_url=base_url or "http://search-server",
+            transport=transport,
+            timeout=timeout
+        )
+
+    def _post(self, path: str, payload: Dict):
+        # the server traces its spans (embedding, FAISS) under the caller's request id
+        request_id = current_request_id()
+        headers = {REQUEST_ID_HEADER: request_id} if request_id else None
+        response = self.client.post(path, json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, query: str, top_k: int = 5, user_id: int = None,
+               min_score: Optional[float] = None) -> List[Dict]:
+        """Search for similar chunks (see VectorService.search)"""
+        return self._post("/search", {
+            "query": query, "top_k": top_k, "user_id": user_id, "min_score": min_score
+        })
+
+    def search_batch(self, requests: List[Dict]) -> List[List[Dict]]:
+        """Run many searches in one round trip (see VectorService.search_batch)"""
+        return self._post("/search/batch", {"requests": requests})
+
+    def add_chunks(self, chunks: List[Dict], save: bool = True):
+        """Embed and index chunks in the server (the single writer)"""
+        if not chunks:
+            return
+        self._post("/chunks", {"chunks": chunks, "save": save})
+
+    def save(self):
+        """Have the server write its index file"""
+        self._post("/save", {})
+
+    def is_ready(self) -> bool:
+        """True once the server has its model and index loaded"""
+        try:
+            return self.client.get("/readyz", timeout=2).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+
+_remote_vector_service: Optional[RemoteVectorService] = None
+_remote_vector_service_lock = threading.Lock()
+
+
+def get_remote_vector_service() -> Optional[RemoteVectorService]:
+    """Return the shared client, or None when no search server is configured"""
+    global _remote_vector_service
+    if not (VECTOR_SERVICE_URL or VECTOR_SERVICE_SOCKET):
+        return None
+    if _remote_vector_service is None:
+        with _remote_vector_service_lock:
+            if _remote_vector_service is None:
+                _remote_vector_service = RemoteVectorService(
+                    base_url=VECTOR_SERVICE_URL, socket_path=VECTOR_SERVICE_SOCKET
+                )
+    return _remote_vector_service
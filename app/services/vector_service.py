@@ -1,9 +1,55 @@
 import os
+import fcntl
+import threading
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 import json
+from app.metrics import timed
+from app.tracing import span
+from app.services.embedding_backends import EmbeddingBackend, create_embedding_backend
+from app.services.rwlock import ReadWriteLock
+from app.services.vector_storage import ChunkStore, VectorFile
+
+# Index layout, picked when a new index is created:
+#   "flat" -> exact inner-product search (IndexFlatIP), 4 bytes/dim
+#   "hnsw" -> approximate graph search on inner product (IndexHNSWFlat)
+#   "fp16" -> scalar quantizer, 2 bytes/dim
+#   "sq8"  -> scalar quantizer, 1 byte/dim (trained)
+#   "pq"   -> product quantizer, VECTOR_PQ_M bytes per vector (trained)
+# Embeddings are L2-normalized, so inner product == cosine similarity.
+INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat").lower()
+HNSW_M = int(os.getenv("VECTOR_HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+PQ_M = int(os.getenv("VECTOR_PQ_M", "48"))
+
+# Compressed indexes keep the full-precision vectors in an on-disk memmap.
+# Trained quantizers are trained once VECTOR_TRAIN_SIZE vectors exist (until
+# then search is exact over the memmap). With VECTOR_RERANK_FACTOR > 1 the
+# top_k * factor candidates are re-scored exactly from the memmap.
+TRAIN_SIZE = int(os.getenv("VECTOR_TRAIN_SIZE", "10000"))
+MAX_TRAIN_SAMPLE = 100_000
+RERANK_FACTOR = int(os.getenv("VECTOR_RERANK_FACTOR", "0"))
+
+# Directory holding the index, metadata and vector files
+VECTOR_DATA_DIR = os.getenv("VECTOR_DATA_DIR", ".")
+
+# Map the saved index read-only instead of reading it into RAM: start-up is
+# constant time and processes on one host share the page cache. The first
+# write in a process copies the index into memory.
+MMAP_INDEX = os.getenv("VECTOR_MMAP", "0") == "1"
+# IO_FLAG_MMAP_IFC (faiss >= 1.9) maps the codes in place; plain IO_FLAG_MMAP
+# still copies flat indexes into RAM
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+
+def embed_queries(embedder: EmbeddingBackend, queries: List[str]) -> np.ndarray:
+    """Embed queries in one call; blank queries keep the zero vector like generate_embedding"""
+    query_embeddings = np.zeros((len(queries), embedder.dimension), dtype=np.float32)
+    non_blank = [i for i, q in enumerate(queries) if q and q.strip()]
+    if non_blank:
+        with span("embedding.encode", queries=len(non_blank)):
+            query_embeddings[non_blank] = embedder.encode([queries[i] for i in non_blank])
+    return query_embeddings
 
 
 class VectorService:
@@ -12,55 +58,187 @@ class VectorService:
 
     Previously in phase 3,we indexed whole documents as single vectors.
     Now,we chunk documents into smaller parts and index each chunk separately.
+
+    Thread-safe: sync endpoints call it from the threadpool. Searches share a
+    read lock; adding chunks takes the write lock only to append to the index
+    and metadata (embedding happens before, saving after), so searches never
+    wait on an embedding run or a file write.
+
+    Process-safe for writes: API workers sharing a data dir write one at a
+    time. A process takes the dir's writer lock (flock) before its first
+    unsaved change, catching up on other processes' saves first, and keeps
+    it until save() has written everything. The metadata files are appended
+    as chunks are added, so without this two processes' index files and
+    records would get out of step.
     """
 
-    def __init__(self):
-        self.model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        self.dimension = 384
-        
-        #Create FAISS index
-        self.index = faiss.IndexFlatL2(self.dimension)
+    def __init__(self, index_type: str = INDEX_TYPE, embedder: Optional[EmbeddingBackend] = None,
+                 data_dir: str = VECTOR_DATA_DIR, rerank_factor: int = RERANK_FACTOR,
+                 train_size: int = TRAIN_SIZE, mmap: bool = MMAP_INDEX):
+        # The backend (torch / onnx / int8, see embedding_backends) is only
+        # built here, so importing this module never loads a model
+        self.embedder = embedder or create_embedding_backend()
+        self.dimension = self.embedder.dimension
+        self.index_type = index_type
+        self.rerank_factor = rerank_factor
+        self.train_size = train_size
+        self.mmap = mmap
+        self._index_mapped = False
+        self._lock = ReadWriteLock()
+        self._save_lock = threading.Lock()  # one index file write at a time
+        # writer lock on the data dir, open while this process has unsaved changes
+        self._writer_file = None
+        self._claim_lock = threading.Lock()
+        self._claimed = 0  # adds started while holding the writer lock
+        self._applied = 0  # adds finished
 
-        # Map FAISS IDs to chunk metadata
-        self.chunk_metadata: List[Dict] = []
+        #Create FAISS index
+        self.index = self._create_index()
 
         # File paths for saving/loading index
-        self.index_path = "faiss_index.bin"
-        self.metadata_path = "chunk_metadata.json"
+        os.makedirs(data_dir, exist_ok=True)
+        self.index_path = os.path.join(data_dir, "faiss_index.bin")
+        self.metadata_path = os.path.join(data_dir, "chunk_metadata.json")  # legacy JSON format
+        self.vectors_path = os.path.join(data_dir, "faiss_vectors.f32")
+        self.writer_lock_path = os.path.join(data_dir, "writer.lock")
 
-        #Load existing index if it exits
-        self._load_index()
+        # Map FAISS IDs to chunk metadata (memory-mapped, see ChunkStore)
+        self.chunk_metadata = ChunkStore(
+            os.path.join(data_dir, "chunk_meta.bin"), os.path.join(data_dir, "chunk_text.bin")
+        )
+
+        #Load existing index if it exits (not while another process is mid-write:
+        #its appended metadata would look like an interrupted save)
+        with open(self.writer_lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._load_index()
+            self._disk_state = self._index_file_state()
+
+    def _create_index(self) -> faiss.Index:
+        """Build an empty inner-product index of the configured type"""
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+            return index
+        if self.index_type == "fp16":
+            return faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        if self.index_type == "sq8":
+            return faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        if self.index_type == "pq":
+            return faiss.IndexPQ(self.dimension, PQ_M, 8, faiss.METRIC_INNER_PRODUCT)
+        if self.index_type != "flat":
+            raise ValueError(f"Unknown VECTOR_INDEX_TYPE: {self.index_type}")
+        return faiss.IndexFlatIP(self.dimension)
+
+    def _to_similarity(self, distance: float) -> float:
+        """
+        Convert a raw FAISS distance to cosine similarity in [-1, 1].
+
+        IP indexes already return the cosine of normalized vectors. Older
+        indexes saved as IndexFlatL2 return squared L2 distance, which for
+        unit vectors is 2 - 2*cos.
+        """
+        if self.index.metric_type == faiss.METRIC_L2:
+            return 1.0 - float(distance) / 2.0
+        return float(distance)
 
     def _load_index(self):
         """Load saved index & metadata from disk"""
-        if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
-            self.index = faiss.read_index(self.index_path)
-            with open(self.metadata_path, 'r', encoding = 'utf-8') as f:
-                self.chunk_metadata = json.load(f)
+        if os.path.exists(self.index_path):
+            if self.mmap:
+                self.index = faiss.read_index(self.index_path, MMAP_FLAGS)
+                self._index_mapped = True
+            else:
+                self.index = faiss.read_index(self.index_path)
+
+            # one-time conversion from the old JSON metadata file
+            if len(self.chunk_metadata) == 0 and os.path.exists(self.metadata_path):
+                with open(self.metadata_path, 'r', encoding = 'utf-8') as f:
+                    self.chunk_metadata.extend(json.load(f))
+
+        # Full-precision copy of every vector, only for compressed indexes
+        self.vectors: Optional[VectorFile] = None
+        if isinstance(self.index, (faiss.IndexScalarQuantizer, faiss.IndexPQ)):
+            self.vectors = VectorFile(self.vectors_path, self.dimension)
 
-    def _save_index(self):
-        """Save current index & metadata to disk"""
+        # Metadata and vectors are appended before the index file is replaced,
+        # so after an interrupted save they can be ahead of it: trim them back
+        if self.vectors is not None and not self.index.is_trained:
+            count = min(len(self.chunk_metadata), len(self.vectors))
+        else:
+            count = min(len(self.chunk_metadata), self.index.ntotal)
+        self.chunk_metadata.truncate(count)
+        if self.vectors is not None:
+            self.vectors.truncate(count)
 
-        faiss.write_index(self.index, self.index_path)
-        with open(self.metadata_path, 'w', encoding = 'utf-8') as f:
-            json.dump(self.chunk_metadata, f, ensure_ascii=False, indent=4)
+    @timed("index_save")
+    def _save_index(self, data: np.ndarray):
+        """
+        Save a serialized index to disk (metadata is appended as chunks are added).
+
+        Written to a temp file and renamed over the old one, so a crash never
+        leaves a torn index and processes that mapped the old file keep a
+        consistent view.
+        """
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        data.tofile(tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def _index_file_state(self):
+        """Identifies the index file on disk: another process's save replaces it"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _claim_data_dir(self):
+        """Take the data dir's writer lock before a change (waits for another process's save)"""
+        with self._claim_lock:
+            if self._writer_file is None:
+                lock = open(self.writer_lock_path, 'a')
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._writer_file = lock
+            self._claimed += 1
+
+    def _catch_up(self):
+        """Reload index and metadata if another process saved since we last did (write lock held)"""
+        if self._index_file_state() != self._disk_state:
+            self.chunk_metadata.refresh()
+            self._load_index()
+            self._disk_state = self._index_file_state()
+
+    def _ensure_writable(self):
+        """
+        Load a memory-mapped index into RAM before the first write.
+
+        A mapped index can't grow (faiss aborts, and clone_index does too),
+        but it is exactly the saved file, so reading that file gives a
+        writable copy.
+        """
+        if self._index_mapped:
+            self.index = faiss.read_index(self.index_path)
+            self._index_mapped = False
     
     def generate_embedding(self, text: str) -> np.ndarray:
         """Convert text to vector(384 numbers)"""
         if not text or not text.strip():
             return np.zeros(self.dimension, dtype=np.float32)
         
-        #model converts text to numbers
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.astype(np.float32)
+        #model converts text to numbers (unit length, so dot product == cosine)
+        return self.embedder.encode([text])[0]
     
-    def add_chunks(self, chunks: List[Dict]):
+    def add_chunks(self, chunks: List[Dict], save: bool = True):
         """
         Add multiple chunks to the index.
         
         arguments:
             chunks: List of chunk dicts from chunking_service
                     [{text: "...", doc_id: 1, chunk_id: 0}, ...]
+            save: write the index file now; pass False when adding in
+                  windows and call save() once at the end
         
         This replaces add_document() from Phase 3.
         Now we index chunks, not full documents.
@@ -70,27 +248,108 @@ class VectorService:
         
         # generate embeddings for all chunks
         texts = [chunk['text'] for chunk in chunks]
-        embeddings = self.model.encode(texts, convert_to_numpy=True).astype(np.float32)
+        self.add_embedded(chunks, self.embedder.encode(texts), save=save)
 
-        # add to FAISS
-        self.index.add(embeddings)
+    def add_embedded(self, chunks: List[Dict], embeddings: np.ndarray, save: bool = True):
+        """Add chunks whose embeddings were already computed (one row per chunk)"""
+        if not chunks:
+            return
 
-        # store metadata for each chunk
+        self._claim_data_dir()
+        try:
+            with self._lock.write():
+                self._catch_up()
+                # add to FAISS
+                self._ensure_writable()
+                if self.vectors is not None:
+                    self._add_compressed(embeddings)
+                else:
+                    self.index.add(embeddings)
 
-        for chunk in chunks:
-            self.chunk_metadata.append({
-                'doc_id': chunk['doc_id'],
-                'chunk_id': chunk['chunk_id'],
-                'user_id': chunk.get('user_id'),
-                'text': chunk['text']
-            })
+                # store metadata for each chunk
+                self.chunk_metadata.extend(chunks)
+        finally:
+            with self._claim_lock:
+                self._applied += 1
 
-        # save index
-        self._save_index()
+        if save:
+            self.save()
+
+    def save(self):
+        """
+        Write the index file.
+
+        Only the in-memory snapshot is taken under the read lock; the disk
+        write happens outside it, so an add waiting for the lock (and every
+        search queued behind that add) doesn't wait on the disk. Nothing to
+        write without unsaved changes; once everything added is written the
+        data dir's writer lock is released.
+        """
+        with self._save_lock:
+            if self._writer_file is None:
+                return
+            with self._lock.read():
+                data = faiss.serialize_index(self.index)
+                applied = self._applied
+            self._save_index(data)
+            with self._claim_lock:
+                self._disk_state = self._index_file_state()
+                if applied == self._claimed:
+                    self._writer_file.close()  # releases the flock
+                    self._writer_file = None
     
-    def search(self, query: str, top_k: int = 5, user_id: int = None) -> List[Dict]:
+    def _add_compressed(self, embeddings: np.ndarray):
+        """Keep full-precision vectors on disk; train the quantizer once there are enough"""
+        self.vectors.append(embeddings)
+
+        if self.index.is_trained:
+            self.index.add(embeddings)
+        elif len(self.vectors) >= self.train_size:
+            all_vectors = np.asarray(self.vectors.rows())
+            sample = all_vectors
+            if len(all_vectors) > MAX_TRAIN_SAMPLE:
+                rng = np.random.default_rng(0)
+                sample = all_vectors[rng.choice(len(all_vectors), MAX_TRAIN_SAMPLE, replace=False)]
+            self.index.train(sample)
+            # everything added before training goes in now
+            self.index.add(all_vectors)
+
+    @timed("faiss_search")
+    def _search_vectors(self, query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """FAISS search, scored exactly from the full-precision vectors when configured"""
+        with span("faiss.search", queries=len(query_embeddings), k=k, ntotal=self.index.ntotal):
+            return self._search_index(query_embeddings, k)
+
+    def _search_index(self, query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.vectors is None:
+            return self.index.search(query_embeddings, k)
+
+        if not self.index.is_trained:
+            # not enough vectors to train the quantizer yet: exact search over the memmap
+            return faiss.knn(query_embeddings, np.asarray(self.vectors.rows()), k,
+                             metric=faiss.METRIC_INNER_PRODUCT)
+
+        if self.rerank_factor <= 1:
+            return self.index.search(query_embeddings, k)
+
+        _, candidates = self.index.search(query_embeddings, min(k * self.rerank_factor, self.index.ntotal))
+        distances = np.zeros((len(query_embeddings), k), dtype=np.float32)
+        indices = np.full((len(query_embeddings), k), -1, dtype=np.int64)
+        for row, ids in enumerate(candidates):
+            ids = ids[ids != -1]
+            exact = self.vectors.take(ids) @ query_embeddings[row]
+            best = np.argsort(-exact)[:k]
+            distances[row, :len(best)] = exact[best]
+            indices[row, :len(best)] = ids[best]
+        return distances, indices
+
+    def search(self, query: str, top_k: int = 5, user_id: int = None,
+               min_score: Optional[float] = None) -> List[Dict]:
         """
         Search for similar chunks.
+
+        similarity_score is cosine similarity in [-1, 1] (higher is better).
+        Chunks scoring below min_score are dropped.
         
         Returns: List of chunk results with metadata
         [
@@ -103,20 +362,77 @@ class VectorService:
             ...
         ]
         """
+        return self.search_batch([{
+            'query': query, 'top_k': top_k, 'user_id': user_id, 'min_score': min_score
+        }])[0]
+
+    def search_batch(self, requests: List[Dict]) -> List[List[Dict]]:
+        """
+        Run many searches with one encode call and one FAISS search.
+
+        arguments:
+            requests: [{'query': str, 'top_k': int, 'user_id': int|None,
+                        'min_score': float|None}, ...]
+
+        returns: one result list per request, same shape as search()
+        """
         #no docs indexed yet
-        if self.index.ntotal == 0:
-            return []
-        
-        #query to vector
-        query_embedding = self.generate_embedding(query).reshape(1,-1)
+        if not self.chunk_metadata or not requests:
+            return [[] for _ in requests]
+
+        query_embeddings = embed_queries(self.embedder, [r['query'] for r in requests])
+        return self.search_embeddings(query_embeddings, requests)
+
+    def search_embeddings(self, query_embeddings: np.ndarray, requests: List[Dict]) -> List[List[Dict]]:
+        """search_batch for queries that are already embedded (one row per request)"""
+        with self._lock.read():
+            if not self.chunk_metadata or not requests:
+                return [[] for _ in requests]
+
+            #search in FAISS once for the largest top_k; each row is trimmed below
+            max_k = min(max(r.get('top_k', 5) for r in requests), len(self.chunk_metadata))
+            distances, indices = self._search_vectors(query_embeddings, max_k)
+
+            return [
+                self._collect_results(indices[row], distances[row], r.get('top_k', 5),
+                                      r.get('user_id'), r.get('min_score'))
+                for row, r in enumerate(requests)
+            ]
+
+    def _code_size(self) -> int:
+        """Bytes per stored vector (HNSW keeps its vectors in a flat storage index)"""
+        codes = faiss.downcast_index(self.index.storage) if hasattr(self.index, "hnsw") else self.index
+        return getattr(codes, "code_size", self.dimension * 4)
+
+    def index_bytes(self) -> int:
+        """Memory held by the index: the vector codes, plus the graph for HNSW"""
+        size = self.index.ntotal * self._code_size()
+        if hasattr(self.index, "hnsw"):
+            hnsw = self.index.hnsw
+            size += (hnsw.neighbors.size() + hnsw.levels.size()) * 4 + hnsw.offsets.size() * 8
+        return size
 
-        #search in FAISS and it returns distances and internal IDs
-        distances, indices = self.index.search(query_embedding,min(top_k,self.index.ntotal))
+    def stats(self) -> Dict:
+        """Index size figures for the /metrics gauges"""
+        return {
+            'vectors': self.index.ntotal,
+            'index_bytes': self.index_bytes(),
+            'metadata_bytes': self.chunk_metadata.nbytes()
+        }
 
+    def _collect_results(self, indices: np.ndarray, distances: np.ndarray, top_k: int,
+                         user_id: Optional[int], min_score: Optional[float]) -> List[Dict]:
+        """Turn one row of FAISS output into chunk results"""
         #convert faiss IDs to document IDs
         results = []
-        for idx, distance in zip(indices[0], distances[0]):
-            if idx != -1: #-1 refers to empty slot
+        for idx, distance in zip(indices[:top_k], distances[:top_k]):
+            if idx != -1 and idx < len(self.chunk_metadata): #-1 refers to empty slot
+                score = self._to_similarity(distance)
+
+                # results are sorted best-first, so nothing after this passes either
+                if min_score is not None and score < min_score:
+                    break
+
                 meta = self.chunk_metadata[idx]
                 
                 # Filter by user_id if provided
@@ -127,15 +443,56 @@ class VectorService:
                     'doc_id': meta['doc_id'],
                     'chunk_id': meta['chunk_id'],
                     'text': meta['text'],
-                    'similarity_score': float(distance)
+                    'similarity_score': score
                 })
             
         return results
     
-# create single instance
-vector_service = VectorService()
+# Single shared instance, built on first use (or by the startup warm-up in
+# app.main) so that importing the app never blocks on the model or index
+_vector_service: Optional[VectorService] = None
+_vector_service_lock = threading.Lock()
 
-         
-        
-        
-        
+
+def get_local_vector_service() -> VectorService:
+    """
+    Return this process's VectorService, loading model & index on first call.
+
+    With VECTOR_SHARDS set this is a ShardedVectorService (same interface,
+    one index per user or user bucket).
+    """
+    global _vector_service
+    if _vector_service is None:
+        with _vector_service_lock:
+            if _vector_service is None:
+                from app.services.vector_shards import SHARD_MODE, ShardedVectorService
+
+                _vector_service = ShardedVectorService() if SHARD_MODE else VectorService()
+    return _vector_service
+
+
+def get_vector_service():
+    """
+    Return the vector service the API should use.
+
+    When VECTOR_SERVICE_URL or VECTOR_SERVICE_SOCKET is set, a client for the
+    shared search server (app.services.search_server) is returned, so N
+    uvicorn workers share one model and one index. Otherwise the model and
+    index are loaded in this process.
+    """
+    from app.services.vector_client import get_remote_vector_service
+
+    remote = get_remote_vector_service()
+    if remote is not None:
+        return remote
+    return get_local_vector_service()
+
+
+def is_vector_service_ready() -> bool:
+    """True once the model and index are loaded (here or in the search server)"""
+    from app.services.vector_client import get_remote_vector_service
+
+    remote = get_remote_vector_service()
+    if remote is not None:
+        return remote.is_ready()
+    return _vector_service is not None
@@ -0,0 +1,201 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from app.tracing import bind
+from app.services.embedding_backends import EmbeddingBackend, create_embedding_backend
+from app.services.vector_service import VectorService, VECTOR_DATA_DIR, embed_queries
+
+# Sharding of the vector index by owner:
+#   ""     -> off, one global index (VectorService)
+#   "user" -> one shard per user_id
+#   "<N>"  -> N shards, user_id hashed into a bucket
+# Chunks without a user_id go to a "shared" shard.
+SHARD_MODE = os.getenv("VECTOR_SHARDS", "").lower()
+# Loaded shards are evicted least-recently-used past either limit
+MAX_LOADED_SHARDS = int(os.getenv("VECTOR_MAX_LOADED_SHARDS", "64"))
+SHARD_MEMORY_MB = float(os.getenv("VECTOR_SHARD_MEMORY_MB", "0"))  # 0 = no memory budget
+SEARCH_THREADS = int(os.getenv("VECTOR_SHARD_SEARCH_THREADS", "8"))
+
+
+class ShardedVectorService:
+    """
+    Vector index partitioned by user_id, with the VectorService interface.
+
+    Each shard is a VectorService persisted in its own directory under
+    <data_dir>/shards and sharing one embedding model. A user's search only
+    touches that user's shard, so its cost doesn't depend on how much other
+    tenants have indexed. Searches without a user_id (admin / cross-user)
+    fan out to every shard on a thread pool and merge the top_k.
+    """
+
+    def __init__(self, mode: str = SHARD_MODE, embedder: Optional[EmbeddingBackend] = None,
+                 data_dir: str = VECTOR_DATA_DIR, max_loaded: int = MAX_LOADED_SHARDS,
+                 memory_budget_mb: float = SHARD_MEMORY_MB, **shard_kwargs):
+        if mode != "user" and not mode.isdigit():
+            raise ValueError(f"Unknown VECTOR_SHARDS: {mode} (use 'user' or a shard count)")
+        self.mode = mode
+        self.embedder = embedder or create_embedding_backend()
+        self.dimension = self.embedder.dimension
+        self.shards_dir = os.path.join(data_dir, "shards")
+        self.max_loaded = max_loaded
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.shard_kwargs = shard_kwargs
+
+        os.makedirs(self.shards_dir, exist_ok=True)
+        self._shards: "OrderedDict[str, VectorService]" = OrderedDict()
+        self._shards_lock = threading.Lock()
+        # held while a shard is written or opened, so an evicted instance
+        # finishes its append before the same files are loaded again
+        self._shard_write_locks: Dict[str, threading.RLock] = {}
+        # shards added to with save=False, kept until saved even if evicted
+        self._unsaved: Dict[str, VectorService] = {}
+        self._pool = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="shard-search")
+
+    def shard_key(self, user_id: Optional[int]) -> str:
+        """Name (and directory) of the shard holding user_id's chunks"""
+        if user_id is None:
+            return "shared"
+        if self.mode == "user":
+            return f"user_{user_id}"
+        return f"bucket_{zlib.crc32(str(user_id).encode()) % int(self.mode)}"
+
+    def shard_keys(self) -> List[str]:
+        """Every shard that exists on disk"""
+        return sorted(os.listdir(self.shards_dir))
+
+    def _write_lock(self, key: str) -> threading.RLock:
+        with self._shards_lock:
+            return self._shard_write_locks.setdefault(key, threading.RLock())
+
+    def _shard(self, key: str) -> VectorService:
+        """Return a loaded shard, loading it (and evicting LRU ones) if needed"""
+        with self._shards_lock:
+            shard = self._shards.get(key)
+            if shard is not None:
+                self._shards.move_to_end(key)
+                return shard
+
+        with self._write_lock(key):
+            with self._shards_lock:
+                shard = self._shards.get(key)
+                if shard is not None:  # loaded by another thread meanwhile
+                    self._shards.move_to_end(key)
+                    return shard
+                # evicted before save(): that instance is newer than the files
+                shard = self._unsaved.get(key)
+
+            if shard is None:
+                shard = VectorService(embedder=self.embedder, data_dir=os.path.join(self.shards_dir, key),
+                                      **self.shard_kwargs)
+            with self._shards_lock:
+                self._shards[key] = shard
+                self._evict()
+            return shard
+
+    def _evict(self):
+        """Drop least recently used shards until under both limits (keeps the newest)"""
+        def loaded_bytes():
+            return sum(s.index_bytes() for s in self._shards.values())
+
+        while len(self._shards) > 1 and (
+            len(self._shards) > self.max_loaded
+            or (self.memory_budget and loaded_bytes() > self.memory_budget)
+        ):
+            # shards persist on save, so dropping one loses nothing (unsaved
+            # ones stay in _unsaved); searches holding a reference finish normally
+            self._shards.popitem(last=False)
+
+    def loaded_shards(self) -> List[str]:
+        with self._shards_lock:
+            return list(self._shards)
+
+    def stats(self) -> Dict:
+        """Index size figures of the loaded shards, for the /metrics gauges"""
+        with self._shards_lock:
+            shards = list(self._shards.values())
+        totals = {'vectors': 0, 'index_bytes': 0, 'metadata_bytes': 0}
+        for shard in shards:
+            for key, value in shard.stats().items():
+                totals[key] += value
+        return totals
+
+    def add_chunks(self, chunks: List[Dict], save: bool = True):
+        """Embed all chunks in one call, then append each group to its shard"""
+        if not chunks:
+            return
+        embeddings = self.embedder.encode([chunk['text'] for chunk in chunks])
+
+        groups: Dict[str, List[int]] = {}
+        for i, chunk in enumerate(chunks):
+            groups.setdefault(self.shard_key(chunk.get('user_id')), []).append(i)
+
+        for key, rows in groups.items():
+            with self._write_lock(key):
+                shard = self._shard(key)
+                shard.add_embedded([chunks[i] for i in rows], embeddings[rows], save=save)
+                with self._shards_lock:
+                    if not save:
+                        self._unsaved[key] = shard
+                    self._evict()  # the shard grew: recheck the memory budget
+
+    def save(self):
+        """Write every shard added to with save=False"""
+        with self._shards_lock:
+            keys = list(self._unsaved)
+        for key in keys:
+            with self._write_lock(key):
+                with self._shards_lock:
+                    shard = self._unsaved.pop(key, None)
+                if shard is not None:
+                    shard.save()
+
+    def search(self, query: str, top_k: int = 5, user_id: int = None,
+               min_score: Optional[float] = None) -> List[Dict]:
+        """Search one user's shard, or every shard when user_id is None"""
+        return self.search_batch([{
+            'query': query, 'top_k': top_k, 'user_id': user_id, 'min_score': min_score
+        }])[0]
+
+    def search_batch(self, requests: List[Dict]) -> List[List[Dict]]:
+        """Run many searches with one encode call, grouped by shard"""
+        if not requests:
+            return []
+        query_embeddings = embed_queries(self.embedder, [r['query'] for r in requests])
+        results: List[List[Dict]] = [[] for _ in requests]
+
+        # per-user requests: one shard each
+        groups: Dict[str, List[int]] = {}
+        cross_user: List[int] = []
+        for row, r in enumerate(requests):
+            if r.get('user_id') is None:
+                cross_user.append(row)
+            else:
+                groups.setdefault(self.shard_key(r['user_id']), []).append(row)
+
+        for key, rows in groups.items():
+            if not os.path.isdir(os.path.join(self.shards_dir, key)):
+                continue  # user has nothing indexed; don't create an empty shard
+            found = self._shard(key).search_embeddings(query_embeddings[rows], [requests[i] for i in rows])
+            for row, chunk_results in zip(rows, found):
+                results[row] = chunk_results
+
+        # cross-user requests: fan out to every shard and merge
+        if cross_user:
+            sub_requests = [requests[i] for i in cross_user]
+            sub_embeddings = query_embeddings[cross_user]
+            per_shard = self._pool.map(
+                bind(lambda key: self._shard(key).search_embeddings(sub_embeddings, sub_requests)),
+                self.shard_keys()
+            )
+            merged: List[List[Dict]] = [[] for _ in cross_user]
+            for shard_results in per_shard:
+                for i, chunk_results in enumerate(shard_results):
+                    merged[i].extend(chunk_results)
+            for i, row in enumerate(cross_user):
+                merged[i].sort(key=lambda c: c['similarity_score'], reverse=True)
+                results[row] = merged[i][:requests[row].get('top_k', 5)]
+
+        return results
@@ -0,0 +1,163 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional
+
+
+class VectorFile:
+    """
+    Append-only float32 matrix on disk, read back through np.memmap.
+
+    Holds the full-precision embeddings next to a compressed FAISS index:
+    rows are only paged in when they are read (training, exact re-ranking),
+    so they cost disk, not RAM.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.row_bytes = dimension * np.dtype(np.float32).itemsize
+        self._count = os.path.getsize(path) // self.row_bytes if os.path.exists(path) else 0
+        self._view: Optional[np.memmap] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, vectors: np.ndarray):
+        """Append rows (n, dimension) to the end of the file"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with open(self.path, 'ab') as f:
+            f.write(vectors.tobytes())
+        self._count += len(vectors)
+        self._view = None
+
+    def truncate(self, count: int):
+        """Drop rows past count (e.g. left over from an interrupted save)"""
+        if count < self._count:
+            with open(self.path, 'r+b') as f:
+                f.truncate(count * self.row_bytes)
+            self._count = count
+            self._view = None
+
+    def rows(self) -> np.ndarray:
+        """Read-only (len, dimension) view of every row"""
+        if self._count == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        if self._view is None:
+            self._view = np.memmap(self.path, dtype=np.float32, mode='r',
+                                   shape=(self._count, self.dimension))
+        return self._view
+
+    def take(self, ids: np.ndarray) -> np.ndarray:
+        """Rows for the given ids, copied into memory"""
+        return np.asarray(self.rows()[ids])
+
+
+# One fixed-size record per chunk; text lives in a separate blob file
+CHUNK_RECORD = np.dtype([
+    ('doc_id', '<i8'),
+    ('chunk_id', '<i8'),
+    ('user_id', '<i8'),      # NO_USER when the chunk has no owner
+    ('text_offset', '<i8'),
+    ('text_length', '<i8'),
+])
+NO_USER = -1
+
+
+class ChunkStore:
+    """
+    Chunk metadata stored as two append-only files read through np.memmap:
+
+        records_path  fixed-size CHUNK_RECORD rows (doc, chunk, user, text span)
+        text_path     UTF-8 chunk texts back to back
+
+    Opening takes constant time (nothing is parsed), only the rows a search
+    touches are paged in, and the page cache is shared between processes.
+    Indexing like a list returns the same dicts the old JSON file held.
+    """
+
+    def __init__(self, records_path: str, text_path: str):
+        self.records_path = records_path
+        self.text_path = text_path
+        self._count = os.path.getsize(records_path) // CHUNK_RECORD.itemsize if os.path.exists(records_path) else 0
+        self._text_size = os.path.getsize(text_path) if os.path.exists(text_path) else 0
+        self._records: Optional[np.memmap] = None
+        self._text: Optional[np.memmap] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def refresh(self):
+        """Pick up records another process appended to the files"""
+        self._count = os.path.getsize(self.records_path) // CHUNK_RECORD.itemsize if os.path.exists(self.records_path) else 0
+        self._text_size = os.path.getsize(self.text_path) if os.path.exists(self.text_path) else 0
+        self._records = None
+        self._text = None
+
+    def __getitem__(self, idx: int) -> Dict:
+        if not 0 <= idx < self._count:
+            raise IndexError(idx)
+        record = self.records()[idx]
+        start = int(record['text_offset'])
+        text = bytes(self._text_view()[start:start + int(record['text_length'])]).decode('utf-8')
+        user_id = int(record['user_id'])
+        return {
+            'doc_id': int(record['doc_id']),
+            'chunk_id': int(record['chunk_id']),
+            'user_id': None if user_id == NO_USER else user_id,
+            'text': text
+        }
+
+    def nbytes(self) -> int:
+        """Size of the records and text files"""
+        return self._count * CHUNK_RECORD.itemsize + self._text_size
+
+    def records(self) -> np.ndarray:
+        """Read-only view of every record (e.g. records()['user_id'])"""
+        if self._count == 0:
+            return np.zeros(0, dtype=CHUNK_RECORD)
+        if self._records is None:
+            self._records = np.memmap(self.records_path, dtype=CHUNK_RECORD, mode='r', shape=(self._count,))
+        return self._records
+
+    def _text_view(self) -> np.ndarray:
+        if self._text_size == 0:
+            return np.zeros(0, dtype=np.uint8)
+        if self._text is None:
+            self._text = np.memmap(self.text_path, dtype=np.uint8, mode='r', shape=(self._text_size,))
+        return self._text
+
+    def extend(self, chunks: List[Dict]):
+        """
+        Append chunk dicts ({doc_id, chunk_id, user_id, text}).
+
+        Text is written before the records that point at it, so an
+        interrupted append never leaves a record without its text.
+        """
+        if not chunks:
+            return
+        encoded = [chunk['text'].encode('utf-8') for chunk in chunks]
+        records = np.zeros(len(chunks), dtype=CHUNK_RECORD)
+        offset = self._text_size
+        for i, (chunk, data) in enumerate(zip(chunks, encoded)):
+            user_id = chunk.get('user_id')
+            records[i] = (chunk['doc_id'], chunk['chunk_id'],
+                          NO_USER if user_id is None else user_id, offset, len(data))
+            offset += len(data)
+
+        with open(self.text_path, 'ab') as f:
+            f.write(b"".join(encoded))
+        with open(self.records_path, 'ab') as f:
+            f.write(records.tobytes())
+
+        self._count += len(chunks)
+        self._text_size = offset
+        self._records = None
+        self._text = None
+
+    def truncate(self, count: int):
+        """Drop records past count (e.g. left over from an interrupted save)"""
+        if count < self._count:
+            with open(self.records_path, 'r+b') as f:
+                f.truncate(count * CHUNK_RECORD.itemsize)
+            self._count = count
+            self._records = None
@@ -0,0 +1,234 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Request tracing.
+#
+# TracingMiddleware gives every request an id (the caller's X-Request-ID, or
+# a new one) and span() records timed, nested operations under it. The
+# current trace lives in contextvars, so threadpool endpoints and LangGraph
+# nodes see it without passing it around; plain thread pools need bind().
+#
+# Finished spans are appended as JSON lines shaped like OTLP spans (traceId,
+# spanId, parentSpanId, start/end in unix nanos, attributes, status) to
+# TRACE_EXPORT_PATH, for a collector to tail. Unset = spans are kept only
+# for the request's Server-Timing header.
+
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+# Add a Server-Timing header (total ms per span name) to every response
+SERVER_TIMING = os.getenv("TRACE_SERVER_TIMING", "0") == "1"
+
+REQUEST_ID_HEADER = "x-request-id"
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        """Add attributes (e.g. token counts known only after the call)"""
+        self.attributes.update(attributes)
+
+    def fail(self, exc: BaseException):
+        """Mark the span failed, for errors that are handled rather than raised"""
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class _NoopSpan:
+    """Returned by span() outside a traced request"""
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, exc: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans of one request"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.spans: List[Span] = []  # finished spans; list.append is thread-safe
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+_export_lock = threading.Lock()
+_export_file = None
+
+
+def current_request_id() -> Optional[str]:
+    trace = _trace.get()
+    return trace.request_id if trace else None
+
+
+def _export(span: Span):
+    global _export_file
+    if not TRACE_EXPORT_PATH:
+        return
+    line = json.dumps(span.to_dict(), default=str) + "\n"
+    with _export_lock:
+        if _export_file is None:
+            _export_file = open(TRACE_EXPORT_PATH, "a", buffering=1, encoding="utf-8")
+        _export_file.write(line)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the block as a child of the current span:
+
+        with span("llm.generate", prompt_chars=len(prompt)) as s:
+            response = llm.invoke(prompt)
+            s.set(output_tokens=...)
+
+    Outside a traced request it does nothing.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(name, trace.request_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        trace.spans.append(current)
+        _export(current)
+
+
+def traced(name: str):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func):
+    """
+    func, run under the caller's trace and span.
+
+    For work handed to a ThreadPoolExecutor, whose threads don't inherit
+    the submitting thread's contextvars.
+    """
+    trace, parent = _trace.get(), _current_span.get()
+    if trace is None:
+        return func
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        trace_token, span_token = _trace.set(trace), _current_span.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_span.reset(span_token)
+            _trace.reset(trace_token)
+    return run
+
+
+def server_timing(trace: Trace) -> str:
+    """Server-Timing header value: total duration per span name, slowest first"""
+    totals: Dict[str, float] = {}
+    for s in trace.spans:
+        totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+    return ", ".join(
+        f"{name};dur={ms:.1f}" for name, ms in sorted(totals.items(), key=lambda item: -item[1])
+    )
+
+
+class TracingMiddleware:
+    """
+    Starts a trace per HTTP request, with a root span named after the route.
+
+    The request id is echoed in the X-Request-ID response header; with
+    TRACE_SERVER_TIMING=1 a Server-Timing header carries the breakdown.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:64]
+                break
+        trace = Trace(request_id or uuid.uuid4().hex)
+        trace_token = _trace.set(trace)
+        root = Span(f"{scope['method']} {scope['path']}", trace.request_id, None, {"http.method": scope["method"]})
+        span_token = _current_span.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode(), trace.request_id.encode("latin-1")))
+                if SERVER_TIMING and trace.spans:
+                    headers.append((b"server-timing", server_timing(trace).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.fail(e)
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            root.end_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _trace.reset(trace_token)
+            _export(root)
@@ -0,0 +1,157 @@
+"""
+Sync vs async data layer: the same routes served by the threadpool
+(SessionLocal) and on the event loop (AsyncSessionLocal, ASYNC_DB=1).
+
+Builds both apps in-process over one local database, then sends --requests
+requests with --concurrency in flight at once (httpx over ASGI, one event
+loop, like a uvicorn worker) and reports requests/s and p50/p99 latency for:
+
+  list    GET /users/{id}/documents
+  create  POST /documents/ (SQLite has one writer at a time, so this
+          mostly measures its write lock; use a server for writes)
+
+The default database is a SQLite file (aiosqlite for the async side).
+Local SQLite answers in microseconds, so nothing waits on it; with
+--db-latency-ms every statement first sleeps in the thread that runs it
+(the request's threadpool thread, or aiosqlite's worker), like a round
+trip to a database server. Pass --sync-url/--async-url (e.g.
+mysql+pymysql://... and mysql+aiomysql://...) to measure a real server.
+
+usage: python -m benchmarks.bench_async_db [--requests 2000] [--concurrency 200] [--db-latency-ms 2]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("TESTING", "1")  # no warm-up thread, no MySQL
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base, get_async_db, get_db
+from app.routers import documents, users
+from benchmarks.bench_embedding import make_texts
+
+USERS = 50
+
+
+def add_latency(sync_engine, latency_ms: float):
+    """Sleep before every SQLite statement, in the thread executing it"""
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_conn, connection_record):
+        aiosqlite_conn = getattr(dbapi_conn, "driver_connection", None)
+        sqlite_conn = aiosqlite_conn._conn if aiosqlite_conn is not None else dbapi_conn
+        sqlite_conn.set_trace_callback(lambda statement: time.sleep(latency_ms / 1000))
+
+
+def build_app(async_mode: bool, sync_url: str, async_url: str, pool_size: int, latency_ms: float) -> FastAPI:
+    app = FastAPI()
+    if async_mode:
+        engine = create_async_engine(async_url, pool_size=pool_size, connect_args=_connect_args(async_url))
+        if latency_ms and async_url.startswith("sqlite"):
+            add_latency(engine.sync_engine, latency_ms)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def get_bench_db():
+            async with Session() as db:
+                yield db
+        app.dependency_overrides[get_async_db] = get_bench_db
+    else:
+        engine = create_engine(sync_url, pool_size=pool_size, connect_args=_connect_args(sync_url))
+        if latency_ms and sync_url.startswith("sqlite"):
+            add_latency(engine, latency_ms)
+        Session = sessionmaker(bind=engine)
+
+        def get_bench_db():
+            with Session() as db:
+                yield db
+        app.dependency_overrides[get_db] = get_bench_db
+
+    for module in (users, documents):
+        app.include_router(module.async_router if async_mode else module.router)
+    return app
+
+
+def _connect_args(url: str) -> dict:
+    # long busy timeout: concurrent inserts queue on SQLite's write lock
+    return {"check_same_thread": False, "timeout": 60} if url.startswith("sqlite") else {}
+
+
+def seed(sync_url: str):
+    engine = create_engine(sync_url, connect_args=_connect_args(sync_url))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([models.User(id=u + 1, username=f"bench{u}", email=f"bench{u}@example.com") for u in range(USERS)])
+        texts = make_texts(USERS * 5, words_per_text=30)
+        db.add_all([models.Document(title=f"doc {i}", content=t, user_id=i % USERS + 1) for i, t in enumerate(texts)])
+        db.commit()
+    engine.dispose()
+
+
+async def run(app: FastAPI, make_request, requests: int, concurrency: int):
+    """(requests/s, latencies in ms) with `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await make_request(client, i)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await one(0)  # warm-up: first connection, route compilation
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return requests / (time.perf_counter() - start), latencies
+
+
+SCENARIOS = {
+    "list": lambda client, i: client.get(f"/users/{i % USERS + 1}/documents"),
+    "create": lambda client, i: client.post(
+        "/documents/", json={"title": f"new {i}", "content": "benchmark document", "user_id": i % USERS + 1}
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--sync-url")
+    parser.add_argument("--async-url")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="emulated round trip per statement (SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        sync_url = args.sync_url or f"sqlite:///{work_dir}/bench.db"
+        async_url = args.async_url or f"sqlite+aiosqlite:///{work_dir}/bench.db"
+
+        print(f"{args.requests} requests, {args.concurrency} concurrent, {sync_url.split(':')[0]}, "
+              f"+{args.db_latency_ms} ms per statement")
+        print(f"{'scenario':<10}{'layer':<8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+        for name, make_request in SCENARIOS.items():
+            for async_mode in (False, True):
+                seed(sync_url)
+                # a pool per in-flight request: a smaller sync pool stalls, as sessions
+                # waiting for a threadpool thread to close them hold their connections
+                app = build_app(async_mode, sync_url, async_url, pool_size=args.concurrency,
+                                latency_ms=args.db_latency_ms)
+                rps, latencies = asyncio.run(run(app, make_request, args.requests, args.concurrency))
+                p50, p99 = np.percentile(latencies, [50, 99])
+                layer = "async" if async_mode else "sync"
+                print(f"{name:<10}{layer:<8}{rps:>9.1f}{p50:>9.1f}{p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
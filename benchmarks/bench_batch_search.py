@@ -0,0 +1,87 @@
+"""
+Batch search benchmark: looping POST /search vs one POST /search/batch.
+
+Runs the API in-process (TestClient, SQLite in memory) over an index of
+--chunks synthetic chunks, then sends the same --queries searches both ways
+and reports queries/sec. Uses the configured embedding backend; with
+--random-embeddings the encoder is replaced by random unit vectors to
+isolate FAISS, DB and HTTP overhead (e.g. where the model can't be
+downloaded).
+
+usage: python -m benchmarks.bench_batch_search [--chunks 20000] [--queries 1000] [--random-embeddings]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("TESTING", "1")  # no warm-up thread, no MySQL
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.routers.search as search_router
+from app import models
+from app.database import Base, get_db
+from app.main import app
+from app.services.embedding_backends import create_embedding_backend
+from app.services.vector_service import VectorService
+from benchmarks.bench_embedding import make_texts
+from benchmarks.common import RandomBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--random-embeddings", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    docs = max(1, args.chunks // 10)
+    with Session() as db:
+        db.add(models.User(id=1, username="bench", email="bench@example.com"))
+        db.add_all([models.Document(id=i + 1, title=f"doc {i}", content="", user_id=1) for i in range(docs)])
+        db.commit()
+
+    def get_bench_db():
+        with Session() as db:
+            yield db
+
+    embedder = RandomBackend() if args.random_embeddings else create_embedding_backend()
+    with tempfile.TemporaryDirectory() as data_dir:
+        service = VectorService(embedder=embedder, data_dir=data_dir)
+        texts = make_texts(args.chunks, words_per_text=40)
+        service.add_chunks([{'text': t, 'doc_id': i % docs + 1, 'chunk_id': i // docs, 'user_id': 1}
+                            for i, t in enumerate(texts)])
+
+        app.dependency_overrides[get_db] = get_bench_db
+        search_router.get_vector_service = lambda: service
+        client = TestClient(app)
+        queries = [{"query": q, "top_k": 5, "user_id": 1} for q in make_texts(args.queries, 8, seed=1)]
+
+        client.post("/search", json=queries[0])  # warm-up
+        start = time.perf_counter()
+        for q in queries:
+            client.post("/search", json=q).raise_for_status()
+        single_qps = len(queries) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(0, len(queries), args.batch_size):
+            client.post("/search/batch", json={"queries": queries[i:i + args.batch_size]}).raise_for_status()
+        batch_qps = len(queries) / (time.perf_counter() - start)
+
+    print(f"{args.chunks} chunks, {args.queries} queries, batch size {args.batch_size}, "
+          f"backend {embedder.name}")
+    print(f"{'endpoint':<16}{'queries/s':>12}")
+    print(f"{'/search':<16}{single_qps:>12.1f}")
+    print(f"{'/search/batch':<16}{batch_qps:>12.1f}   ({batch_qps / single_qps:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Peak memory for indexing one large document: chunk-all-then-add vs streamed.
+
+  list    chunk_text() the whole document, then add_chunks() every chunk
+          (how /documents/index worked before indexing_service)
+  stream  index_document(): chunk, embed and add a window of chunks at a time
+
+Peak is measured with tracemalloc (Python objects and numpy buffers) and
+excludes the document string itself. Embeddings are random unit vectors so
+the numbers don't depend on a model being available.
+
+usage: python -m benchmarks.bench_chunking_memory [--sizes-mb 1,10,50]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from app.services.chunking_service import chunking_service
+from app.services.indexing_service import index_document
+from app.services.vector_service import VectorService
+from benchmarks.bench_embedding import make_texts
+from benchmarks.common import RandomBackend
+
+
+def run(mode: str, text: str) -> tuple:
+    with tempfile.TemporaryDirectory() as data_dir:
+        service = VectorService(embedder=RandomBackend(), data_dir=data_dir)
+        tracemalloc.start()
+        start = time.perf_counter()
+        if mode == "list":
+            service.add_chunks(chunking_service.chunk_text(text, 1, 1))
+        else:
+            index_document(service, text, 1, 1)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak / 1024 / 1024, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", default="1,10,50")
+    args = parser.parse_args()
+
+    paragraph = "\n\n".join(make_texts(200, words_per_text=60))
+    print(f"{'doc MB':>7}  {'mode':<8}{'peak MB':>9}{'seconds':>9}")
+    for size_mb in [float(s) for s in args.sizes_mb.split(",")]:
+        size = int(size_mb * 1024 * 1024)
+        text = (paragraph * (size // len(paragraph) + 1))[:size]
+        for mode in ("list", "stream"):
+            peak_mb, seconds = run(mode, text)
+            print(f"{size_mb:>7g}  {mode:<8}{peak_mb:>9.1f}{seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
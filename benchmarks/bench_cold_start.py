@@ -0,0 +1,129 @@
+"""
+Cold-start benchmark for the vector store at different corpus sizes.
+
+Writes a synthetic index + metadata for each size, then in a fresh
+interpreter measures time and RSS to open it and answer one search:
+
+  legacy-json   faiss.read_index + json.load (the format before ChunkStore)
+  read          VectorService, index read into RAM, mmap'd metadata
+  mmap          VectorService with VECTOR_MMAP=1 (index mapped in place)
+
+Numbers are with a warm page cache unless --drop-caches is given (root,
+Linux). A flat search touches every vector, so in mmap mode peak RSS still
+counts the index pages - but they are shared page cache, not private memory
+per process.
+
+usage: python -m benchmarks.bench_cold_start [--sizes 100000,1000000] [--legacy-max 200000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import faiss
+import numpy as np
+
+from app.services.vector_storage import ChunkStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIMENSION = 384
+BATCH = 50_000
+
+# ru_maxrss survives fork/exec on Linux, so read this process's own counters
+PROC_MEM = """
+def proc_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+"""
+
+LOAD_SNIPPET = PROC_MEM + """
+import json, sys, time
+import numpy as np
+t = time.perf_counter()
+from app.services.vector_service import VectorService
+
+class RandomQuery:
+    dimension = 384
+    def encode(self, texts, batch_size=32):
+        v = np.random.default_rng(0).standard_normal((len(texts), 384)).astype(np.float32)
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+service = VectorService(embedder=RandomQuery(), data_dir=sys.argv[1], mmap=sys.argv[2] == "1")
+opened = time.perf_counter() - t
+open_rss = proc_mb("VmRSS")
+service.search("query", top_k=5, user_id=3)
+print(json.dumps({"open": opened, "first_search": time.perf_counter() - t - opened,
+                  "open_rss_mb": open_rss, "peak_rss_mb": proc_mb("VmHWM")}))
+"""
+
+LEGACY_SNIPPET = PROC_MEM + """
+import json, sys, time, os
+t = time.perf_counter()
+import faiss
+index = faiss.read_index(os.path.join(sys.argv[1], "faiss_index.bin"))
+with open(os.path.join(sys.argv[1], "chunk_metadata.json"), encoding="utf-8") as f:
+    metadata = json.load(f)
+print(json.dumps({"open": time.perf_counter() - t, "first_search": 0.0,
+                  "open_rss_mb": proc_mb("VmRSS"), "peak_rss_mb": proc_mb("VmHWM")}))
+"""
+
+
+def build_corpus(data_dir: str, n: int, text_chars: int, legacy: bool):
+    """Write an IndexFlatIP + ChunkStore (and optionally the old JSON) for n chunks"""
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatIP(DIMENSION)
+    store = ChunkStore(os.path.join(data_dir, "chunk_meta.bin"), os.path.join(data_dir, "chunk_text.bin"))
+    text = ("lorem ipsum dolor sit amet " * (text_chars // 27 + 1))[:text_chars]
+    legacy_rows = []
+    for start in range(0, n, BATCH):
+        count = min(BATCH, n - start)
+        vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        index.add(vectors)
+        chunks = [{'doc_id': i // 10, 'chunk_id': i % 10, 'user_id': i % 100, 'text': text}
+                  for i in range(start, start + count)]
+        store.extend(chunks)
+        if legacy:
+            legacy_rows.extend(chunks)
+    faiss.write_index(index, os.path.join(data_dir, "faiss_index.bin"))
+    if legacy:
+        with open(os.path.join(data_dir, "chunk_metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(legacy_rows, f, ensure_ascii=False, indent=4)
+
+
+def measure(snippet: str, data_dir: str, mmap: str, drop_caches: bool) -> dict:
+    if drop_caches:
+        subprocess.run(["sh", "-c", "sync; echo 3 > /proc/sys/vm/drop_caches"], check=True)
+    out = subprocess.run([sys.executable, "-c", snippet, data_dir, mmap], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--text-chars", type=int, default=300)
+    parser.add_argument("--legacy-max", type=int, default=200_000,
+                        help="skip the JSON baseline above this size (it needs several GB of RAM)")
+    parser.add_argument("--drop-caches", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'chunks':>9}  {'mode':<12}{'open s':>9}{'1st search s':>14}{'RSS open MB':>13}{'peak RSS MB':>13}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as data_dir:
+            legacy = n <= args.legacy_max
+            build_corpus(data_dir, n, args.text_chars, legacy)
+            modes = [("legacy-json", LEGACY_SNIPPET, "0")] if legacy else []
+            modes += [("read", LOAD_SNIPPET, "0"), ("mmap", LOAD_SNIPPET, "1")]
+            for name, snippet, mmap in modes:
+                r = measure(snippet, data_dir, mmap, args.drop_caches)
+                print(f"{n:>9}  {name:<12}{r['open']:>9.3f}{r['first_search']:>14.3f}"
+                      f"{r['open_rss_mb']:>13.0f}{r['peak_rss_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Index compression report: memory per chunk and recall@10 per index type.
+
+Builds a VectorService for each VECTOR_INDEX_TYPE on the same synthetic,
+clustered, unit-length 384-d vectors (shaped like MiniLM embeddings) and
+compares its top 10 with exact inner-product search. Compressed types are
+also measured with exact re-ranking from the on-disk vectors.
+
+Index RAM is the serialized FAISS index size; the full-precision vector
+file used for re-ranking lives on disk and is listed separately.
+
+usage: python -m benchmarks.bench_compression [--chunks 50000] [--queries 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from app.services.embedding_backends import EmbeddingBackend
+from app.services.vector_service import VectorService
+
+DIMENSION = 384
+SETTINGS = [
+    ("flat", 0), ("hnsw", 0),
+    ("fp16", 0), ("sq8", 0), ("sq8", 4), ("pq", 0), ("pq", 4), ("pq", 10),
+]
+
+
+def clustered_unit_vectors(n: int, clusters: int = 200, noise: float = 0.6, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIMENSION)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + noise * rng.standard_normal((n, DIMENSION)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class PrecomputedBackend(EmbeddingBackend):
+    """Texts are row numbers into a precomputed matrix"""
+
+    dimension = DIMENSION
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def encode(self, texts, batch_size=32):
+        return self.vectors[[int(t) for t in texts]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = clustered_unit_vectors(args.chunks)
+    queries = clustered_unit_vectors(args.queries, seed=1)
+    all_vectors = np.vstack([corpus, queries])
+    _, truth = faiss.knn(queries, corpus, 10, metric=faiss.METRIC_INNER_PRODUCT)
+
+    chunks = [{'text': str(i), 'doc_id': i, 'chunk_id': 0, 'user_id': 1} for i in range(args.chunks)]
+    requests = [{'query': str(args.chunks + i), 'top_k': 10} for i in range(args.queries)]
+
+    print(f"{args.chunks} chunks, {args.queries} queries, d={DIMENSION}")
+    print(f"{'index':<8}{'rerank':>7}{'bytes/chunk':>13}{'on-disk f32':>13}{'recall@10':>11}{'query ms':>10}")
+    for index_type, rerank in SETTINGS:
+        with tempfile.TemporaryDirectory() as data_dir:
+            service = VectorService(index_type=index_type, embedder=PrecomputedBackend(all_vectors),
+                                    data_dir=data_dir, rerank_factor=rerank)
+            service.add_chunks(chunks)
+
+            index_bytes = faiss.serialize_index(service.index).nbytes / args.chunks
+            disk_bytes = os.path.getsize(service.vectors_path) / args.chunks if service.vectors else 0
+
+            start = time.perf_counter()
+            results = service.search_batch(requests)
+            query_ms = (time.perf_counter() - start) / args.queries * 1000
+
+            hits = sum(len({r['doc_id'] for r in found} & set(expected))
+                       for found, expected in zip(results, truth))
+            recall = hits / (10 * args.queries)
+
+        print(f"{index_type:<8}{rerank or '-':>7}{index_bytes:>13.1f}{disk_bytes:>13.0f}{recall:>11.3f}{query_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
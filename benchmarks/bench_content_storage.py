@@ -0,0 +1,133 @@
+"""
+Document.content storage: plain TEXT vs compressed (app.compression).
+
+Builds an OCR-like corpus: real English prose (the Python docs shipped
+with the interpreter, pydoc_data) re-wrapped into short scanned lines, with
+page headers, invoice-style number tables and a sprinkle of OCR character
+confusions (l/1, O/0, rn/m). Reports, per zlib level, the compression ratio
+and compress/decompress throughput, then stores the corpus in two SQLite
+tables that differ only in the content column type and times:
+
+  list    a user's documents with content (GET /users/{id}/documents)
+  get     one document with content
+  titles  a user's documents without content (deferred, e.g. search hits)
+
+Reads run on a warm page cache; on a database server the compressed rows
+also mean fewer pages to fetch from disk and to keep in the buffer pool.
+
+usage: python -m benchmarks.bench_content_storage [--docs 2000] [--users 20]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import zlib
+
+os.environ.setdefault("TESTING", "1")  # no warm-up thread, no MySQL
+
+import numpy as np
+from pydoc_data.topics import topics
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, create_engine, insert, select
+
+from app import compression
+from app.compression import CompressedText
+
+OCR_CONFUSIONS = [("l", "1"), ("O", "0"), ("m", "rn"), ("e", "c"), ("S", "5"), ("I", "l")]
+
+
+def make_ocr_document(rng: random.Random, pages: int) -> str:
+    prose = " ".join(rng.sample(list(topics.values()), 3)).split()
+    out = []
+    for page in range(1, pages + 1):
+        out.append(f"ACME Holdings Ltd. - Ref {rng.randint(10000, 99999)}/{rng.randint(10, 99)}    Page {page} of {pages}")
+        out.append("")
+        start = rng.randrange(max(1, len(prose) - 400))
+        line = []
+        for word in prose[start:start + 350]:
+            if rng.random() < 0.03:
+                a, b = rng.choice(OCR_CONFUSIONS)
+                word = word.replace(a, b, 1)
+            line.append(word)
+            if sum(len(w) + 1 for w in line) > rng.randint(55, 75):
+                out.append(" ".join(line))
+                line = []
+        out.append(" ".join(line))
+        out.append("")
+        out.append("Item                         Qty     Unit price       Amount")
+        for _ in range(rng.randint(3, 12)):
+            qty, price = rng.randint(1, 40), rng.randint(100, 99999) / 100
+            out.append(f"{rng.choice(prose)[:24]:<28} {qty:>4} {price:>14,.2f} {qty * price:>12,.2f}")
+        out.append("")
+    return "\n".join(out)
+
+
+def make_corpus(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    # mostly 1-3 page letters and invoices, some long reports
+    return [make_ocr_document(rng, rng.choice([1, 1, 2, 2, 3, 5, 12])) for _ in range(n)]
+
+
+def median_ms(fn, repeat: int = 20) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.docs)
+    raw = [text.encode("utf-8") for text in corpus]
+    raw_mb = sum(map(len, raw)) / 1024 / 1024
+    print(f"{args.docs} documents, {raw_mb:.1f} MB of text, median {np.median([len(r) for r in raw]) / 1024:.1f} KB")
+
+    print(f"{'zlib level':<12}{'ratio':>7}{'compress MB/s':>15}{'decompress MB/s':>17}")
+    for level in (1, 6, 9):
+        start = time.perf_counter()
+        packed = [zlib.compress(r, level) for r in raw]
+        compress_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for p in packed:
+            zlib.decompress(p)
+        decompress_s = time.perf_counter() - start
+        ratio = sum(map(len, raw)) / sum(map(len, packed))
+        print(f"{level:<12}{ratio:>7.2f}{raw_mb / compress_s:>15.0f}{raw_mb / decompress_s:>17.0f}")
+
+    print(f"\nSQLite, CONTENT_COMPRESSION_LEVEL={compression.COMPRESSION_LEVEL}")
+    print(f"{'storage':<12}{'db MB':>8}{'list ms':>10}{'get ms':>9}{'titles ms':>11}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, content_type in (("plain", Text()), ("compressed", CompressedText())):
+            path = f"{work_dir}/{name}.db"
+            engine = create_engine(f"sqlite:///{path}")
+            documents = Table(
+                "documents", MetaData(),
+                Column("id", Integer, primary_key=True), Column("title", String(100)),
+                Column("content", content_type), Column("user_id", Integer, index=True),
+            )
+            documents.create(engine)
+            with engine.begin() as conn:
+                conn.execute(insert(documents), [
+                    {"id": i + 1, "title": f"scan {i}", "content": text, "user_id": i % args.users + 1}
+                    for i, text in enumerate(corpus)
+                ])
+            size_mb = os.path.getsize(path) / 1024 / 1024
+
+            with engine.connect() as conn:
+                list_ms = median_ms(lambda: conn.execute(select(documents).where(documents.c.user_id == 7)).all())
+                get_ms = median_ms(lambda: conn.execute(select(documents).where(documents.c.id == 7)).one())
+                titles_ms = median_ms(lambda: conn.execute(
+                    select(documents.c.id, documents.c.title).where(documents.c.user_id == 7)
+                ).all())
+            print(f"{name:<12}{size_mb:>8.1f}{list_ms:>10.2f}{get_ms:>9.3f}{titles_ms:>11.3f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
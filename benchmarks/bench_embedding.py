@@ -0,0 +1,62 @@
+"""
+Embedding backend benchmark: throughput and parity with fp32 torch.
+
+For each backend reports chunks/sec (chunk-sized texts, as add_chunks sees
+them), single-query latency (as search sees it) and cosine agreement with
+the fp32 torch embeddings of the same texts.
+
+usage: python -m benchmarks.bench_embedding [--backends torch,onnx-int8] [--texts 256]
+"""
+import argparse
+import random
+import time
+
+from app.services.embedding_backends import BACKENDS, create_embedding_backend, check_parity
+
+WORDS = (
+    "invoice contract payment delivery agreement party clause warranty service "
+    "customer supplier amount total date signature address order product "
+    "report meeting summary revenue quarter account balance tax policy"
+).split()
+
+
+def make_texts(n: int, words_per_text: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=words_per_text)) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--texts", type=int, default=256)
+    args = parser.parse_args()
+
+    chunks = make_texts(args.texts, words_per_text=300)
+    queries = make_texts(50, words_per_text=8, seed=1)
+
+    reference = create_embedding_backend("torch")
+    print(f"{'backend':<12}{'chunks/s':>10}{'query ms':>10}{'min cos':>10}{'mean cos':>10}")
+    for name in args.backends.split(","):
+        try:
+            backend = reference if name == "torch" else create_embedding_backend(name)
+        except Exception as e:
+            print(f"{name:<12} unavailable: {type(e).__name__}: {e}")
+            continue
+
+        backend.encode(chunks[:8])  # warm-up
+        start = time.perf_counter()
+        backend.encode(chunks)
+        chunks_per_sec = len(chunks) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for q in queries:
+            backend.encode([q])
+        query_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        parity = check_parity(backend, reference, chunks[:64] + queries)
+        print(f"{name:<12}{chunks_per_sec:>10.1f}{query_ms:>10.2f}"
+              f"{parity['min_cosine']:>10.4f}{parity['mean_cosine']:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
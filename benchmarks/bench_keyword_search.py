@@ -0,0 +1,117 @@
+"""
+Keyword search benchmark: full-text index vs LIKE scan.
+
+Fills a SQLite file with --docs synthetic documents across --users users,
+then times GET /documents/search's query (FTS5, bm25 ranked) against a
+LIKE scan over the decompressed content, for one user and for all users. On MySQL the same
+route uses the FULLTEXT index.
+
+Words are drawn Zipf-distributed from a 50k-word vocabulary, like real
+text: queries mix common words (thousands of hits) and rare ones (a few).
+
+usage: python -m benchmarks.bench_keyword_search [--docs 100000] [--words 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("TESTING", "1")  # no warm-up thread, no MySQL
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+
+from app import models
+from app.database import Base
+from app.services import keyword_search
+
+VOCABULARY = 50_000
+SYLLABLES = ["ka", "to", "ri", "men", "sa", "lu", "ver", "no", "di", "pe", "ran", "quo", "sel", "ba", "tin", "or"]
+
+
+def word(rank: int) -> str:
+    """Distinct pronounceable pseudo-word for each vocabulary rank"""
+    parts = []
+    while True:
+        rank, digit = divmod(rank, len(SYLLABLES))
+        parts.append(SYLLABLES[digit])
+        if rank == 0:
+            return "".join(parts)
+
+
+def make_documents(n: int, words: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([word(r) for r in range(VOCABULARY)])
+    for _ in range(n):
+        ranks = np.minimum(rng.zipf(1.1, words), VOCABULARY) - 1
+        yield " ".join(vocabulary[ranks])
+
+
+# (query, description): word ranks from very common to rare
+QUERIES = [(f"{word(3)} {word(5)}", "common+common"), (word(40), "frequent"),
+           (f"{word(8)} {word(300)}", "common+mid"), (word(2000), "rare"), (f"{word(150)} {word(4000)}", "mid+rare")]
+
+
+def like_query(query: str, user_id, limit: int):
+    """What the search would cost without the index: scan and decompress every row"""
+    terms = keyword_search.parse_terms(query)
+    params = {f"t{i}": f"%{term}%" for i, term in enumerate(terms)}
+    conditions = [f"(lower(d.title) LIKE :t{i} OR lower(uncompress(d.content)) LIKE :t{i})" for i in range(len(terms))]
+    if user_id is not None:
+        conditions.append("d.user_id = :user_id")
+        params["user_id"] = user_id
+    return text(
+        f"SELECT d.id FROM documents d WHERE {' AND '.join(conditions)} ORDER BY d.created_at DESC LIMIT :limit"
+    ).bindparams(limit=limit, **params)
+
+
+def timed_ms(conn, statement, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(statement).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        engine = create_engine(f"sqlite:///{work_dir}/bench.db")
+        Base.metadata.create_all(bind=engine)
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(models.User), [
+                {"id": u + 1, "username": f"bench{u}", "email": f"bench{u}@example.com"} for u in range(args.users)
+            ])
+            titles = make_documents(args.docs, 3, seed=1)
+            contents = make_documents(args.docs, args.words)
+            batch = []
+            for i in range(args.docs):
+                batch.append({"title": next(titles), "content": next(contents), "user_id": i % args.users + 1})
+                if len(batch) == 5000 or i == args.docs - 1:
+                    conn.execute(insert(models.Document), batch)
+                    batch = []
+        size_mb = os.path.getsize(f"{work_dir}/bench.db") / 1024 / 1024
+        print(f"{args.docs} documents, {size_mb:.0f} MB, loaded and indexed in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'query':<16}{'scope':<7}{'matches':>9}{'fts ms':>9}{'like ms':>10}")
+        with engine.connect() as conn:
+            for q, description in QUERIES:
+                for scope, user_id in (("user", 7), ("all", None)):
+                    fts = keyword_search.build_query("sqlite", q, user_id, 20)
+                    like = like_query(q, user_id, 20)
+                    matches = len(conn.execute(keyword_search.build_query("sqlite", q, user_id, args.docs)).all())
+                    print(f"{description:<16}{scope:<7}{matches:>9}"
+                          f"{timed_ms(conn, fts):>9.1f}{timed_ms(conn, like, repeat=1):>10.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
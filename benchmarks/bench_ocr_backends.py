@@ -0,0 +1,81 @@
+"""
+OCR throughput per backend (app.services.ocr_backends): pages per second
+for small images (a label or a receipt line, where process start and
+language data loading dominate) and full A4 pages, one at a time and
+from --workers threads at once (the API's threadpool).
+
+  pytesseract   temp file in, a tesseract process per page, temp file out
+                (the path before the backends)
+  subprocess    a tesseract process per page, page and text piped in memory
+  tesserocr     engines kept loaded in-process, pooled (if installed)
+
+Pages are preprocessed first, as ocr_service does. Needs tesseract
+(TESSERACT_PATH or on PATH).
+
+usage: python -m benchmarks.bench_ocr_backends [--pages 20] [--workers 4]
+"""
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("TESTING", "1")
+
+from app.services.ocr_backends import PytesseractBackend, SubprocessBackend, TesserocrBackend, find_tessdata
+from app.services.ocr_preprocessing import preprocess, tesseract_args
+from benchmarks.fixtures import make_document, render_scan
+
+
+def make_pages(count: int, small: bool):
+    if small:
+        texts = [f"INV-{20260000 + i} TOTAL {i * 7.35:.2f} EUR" for i in range(count)]
+        return [preprocess(render_scan(t, width_in=3.5, height_in=1.2, paper=235, noise=8, seed=i))
+                for i, t in enumerate(texts)]
+    return [preprocess(render_scan(make_document(300, seed=i, words_per_line=9), paper=235, noise=8, seed=i))
+            for i in range(count)]
+
+
+def pages_per_second(backend, pages, workers: int) -> float:
+    args = tesseract_args("document")
+    backend.image_to_string(pages[0], **args)  # warm-up (tesserocr: load the engine)
+    start = time.perf_counter()
+    if workers == 1:
+        for page in pages:
+            backend.image_to_string(page, **args)
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(lambda page: backend.image_to_string(page, **args), pages))
+    return len(pages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    tesseract = os.getenv("TESSERACT_PATH") or shutil.which("tesseract")
+    if not tesseract:
+        print("tesseract not found: set TESSERACT_PATH or install it")
+        return
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = tesseract
+
+    backends = {"pytesseract": PytesseractBackend(), "subprocess": SubprocessBackend(tesseract, workers=args.workers)}
+    try:
+        backends["tesserocr"] = TesserocrBackend(workers=args.workers, tessdata=find_tessdata(tesseract))
+    except ImportError as e:
+        print(f"tesserocr skipped: {e}")
+
+    print(f"{'pages':<8}{'backend':<14}{'1 thread':>10}{f'{args.workers} threads':>12}   (pages/s)")
+    for kind, small in (("small", True), ("A4", False)):
+        pages = make_pages(args.pages, small)
+        for name, backend in backends.items():
+            sequential = pages_per_second(backend, pages, 1)
+            parallel = pages_per_second(backend, pages, args.workers)
+            print(f"{kind:<8}{name:<14}{sequential:>10.1f}{parallel:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
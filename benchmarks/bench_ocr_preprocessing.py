@@ -0,0 +1,126 @@
+"""
+OCR before and after preprocessing: seconds per page and character
+accuracy on generated fixture scans (benchmarks.fixtures.render_scan) whose
+true text is known.
+
+  raw     the page as it comes, Tesseract defaults (what process_image
+          did before app.services.ocr_preprocessing)
+  tuned   preprocess() (grayscale, downscale, deskew, binarize), then the
+          document type's Tesseract settings (OCR_PROFILES)
+
+Scans: a clean 300 dpi page, a skewed noisy scan, a phone photo (500 dpi,
+no DPI recorded, uneven lighting, RGB), a scanned receipt and a photo of a
+long receipt (no DPI recorded). Accuracy is 1 - edit distance / length of
+the true text, whitespace collapsed.
+
+OCR goes through the OCR_BACKEND backend (app.services.ocr_backends), so it
+needs tesseract (TESSERACT_PATH or on PATH) or tesserocr with its language
+data; without either only the preprocessing time is reported.
+
+usage: python -m benchmarks.bench_ocr_preprocessing [--repeat 3]
+"""
+import argparse
+import os
+import random
+import shutil
+import time
+
+os.environ.setdefault("TESTING", "1")
+
+import numpy as np
+from PIL import Image
+
+from app.services.ocr_backends import create_ocr_backend
+from app.services.ocr_preprocessing import OCR_LANG, preprocess, tesseract_args
+from benchmarks.fixtures import make_document, render_scan
+
+
+def make_receipt(items: int = 25, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = ["CORNER MARKET", "VAT NO GB 284 1093 55", "2026-03-14 18:42 TILL 3", ""]
+    total = 0.0
+    for i in range(items):
+        qty, price = rng.randint(1, 4), rng.randint(49, 1999) / 100
+        total += qty * price
+        lines.append(f"SKU{rng.randint(10000, 99999)} {qty} x {price:.2f} {qty * price:.2f}")
+    lines += ["", f"TOTAL {total:.2f}", "CARD ****4821"]
+    return "\n".join(lines)
+
+
+def make_scans():
+    """(name, doc_type, image, true text)"""
+    page = make_document(400, seed=3, words_per_line=9)
+    receipt = make_receipt()
+    long_receipt = make_receipt(items=60, seed=1)
+    return [
+        ("clean scan", "document", render_scan(page), page),
+        ("skewed scan", "document", render_scan(page, skew=2.5, paper=225, noise=12, seed=1), page),
+        ("phone photo", "photo",
+         render_scan(page, dpi=500, skew=-1.5, paper=215, noise=15, shading=0.4, record_dpi=False, seed=2)
+         .convert("RGB"), page),
+        ("receipt", "receipt",
+         render_scan(receipt, width_in=3.15, height_in=9, skew=1.0, paper=240, noise=10, seed=3), receipt),
+        ("receipt photo", "receipt",
+         render_scan(long_receipt, dpi=400, width_in=3.15, height_in=16, skew=-2.0, paper=235, noise=12,
+                     shading=0.5, font_pt=9, record_dpi=False, seed=4).convert("RGB"), long_receipt),
+    ]
+
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def accuracy(text: str, truth: str) -> float:
+    text, truth = " ".join(text.split()), " ".join(truth.split())
+    return max(0.0, 1 - edit_distance(text, truth) / len(truth))
+
+
+def timed_median(fn, repeat: int):
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backend = create_ocr_backend(tesseract_cmd=os.getenv("TESSERACT_PATH") or shutil.which("tesseract") or "tesseract")
+    try:
+        backend.image_to_string(Image.new("L", (64, 32), 255), lang=OCR_LANG, config="")
+        print(f"OCR backend: {backend.name}")
+    except Exception as e:
+        print(f"OCR skipped: {e}")
+        backend = None
+
+    print(f"{'scan':<15}{'type':<10}{'MP':>6}{'prep s':>8}"
+          f"{'raw s/page':>12}{'raw acc':>9}{'tuned s/page':>14}{'tuned acc':>11}")
+    for name, doc_type, image, truth in make_scans():
+        prep_s, prepared = timed_median(lambda: preprocess(image, doc_type=doc_type), args.repeat)
+        row = f"{name:<15}{doc_type:<10}{image.width * image.height / 1e6:>6.1f}{prep_s:>8.2f}"
+        if backend:
+            # Tesseract's defaults on the page as it comes
+            raw_s, raw_text = timed_median(
+                lambda: backend.image_to_string(image, lang=OCR_LANG, config=""), args.repeat
+            )
+            # tuned time includes preprocessing
+            ocr_s, tuned_text = timed_median(
+                lambda: backend.image_to_string(prepared, **tesseract_args(doc_type)), args.repeat
+            )
+            row += (f"{raw_s:>12.2f}{accuracy(raw_text, truth):>9.1%}"
+                    f"{prep_s + ocr_s:>14.2f}{accuracy(tuned_text, truth):>11.1%}")
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Bulk indexing throughput (docs/sec) against the number of chunking workers.
+
+Indexes --docs synthetic documents of --doc-kb each with index_documents()
+for every worker count, one fresh index per run. Embeddings are random
+unit vectors by default so the chunking side is what scales here; pass
+--model to include the configured embedding backend (then encoding in the
+main process is usually the limit and the pool overlaps chunking with it).
+
+usage: python -m benchmarks.bench_parallel_indexing [--docs 200] [--doc-kb 100] [--workers 1,2,4,8] [--model]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.services import indexing_service
+from app.services.embedding_backends import create_embedding_backend
+from app.services.vector_service import VectorService
+from benchmarks.bench_embedding import make_texts
+from benchmarks.common import RandomBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--doc-kb", type=int, default=100)
+    parser.add_argument("--workers", default=",".join(str(2 ** i) for i in range((os.cpu_count() or 1).bit_length())))
+    parser.add_argument("--model", action="store_true")
+    args = parser.parse_args()
+
+    paragraphs = ["\n\n".join(make_texts(20, words_per_text=50, seed=s)) for s in range(10)]
+    size = args.doc_kb * 1024
+    documents = [(i + 1, i % 10, (paragraphs[i % 10] * (size // len(paragraphs[i % 10]) + 1))[:size])
+                 for i in range(args.docs)]
+    embedder = create_embedding_backend() if args.model else RandomBackend()
+
+    print(f"{args.docs} docs x {args.doc_kb} KB, {os.cpu_count()} CPUs, backend {embedder.name}")
+    print(f"{'workers':>8}{'docs/s':>10}{'seconds':>10}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        if workers > 1:
+            # start the pool outside the timed region, like a warm API process
+            indexing_service.get_chunking_pool(workers).submit(len, "").result()
+        with tempfile.TemporaryDirectory() as data_dir:
+            service = VectorService(embedder=embedder, data_dir=data_dir)
+            start = time.perf_counter()
+            indexed, failed = indexing_service.index_documents(service, documents, workers=workers)
+            seconds = time.perf_counter() - start
+        indexing_service.shutdown_chunking_pool()
+        assert not failed
+        print(f"{workers:>8}{len(indexed) / seconds:>10.1f}{seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Search server benchmark: in-process VectorService vs the shared search server.
+
+Starts app.services.search_server on a unix socket, then fires the same
+queries from --threads concurrent clients at both paths and reports
+queries/sec plus the resident memory of the server process (the memory
+each extra uvicorn worker no longer needs).
+
+usage: python -m benchmarks.bench_search_server [--queries 500] [--threads 16]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "quarterly revenue figures", "termination clause in the contract",
+    "who signed the invoice", "delivery address", "payment due date",
+    "warranty period for the equipment", "summary of the meeting notes",
+    "tax identification number",
+]
+
+
+def rss_mb(pid: int) -> float:
+    """Resident set size of a process, from /proc (Linux only)"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_load(search, n_queries: int, threads: int) -> float:
+    """Return queries/sec for n_queries spread over a thread pool"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: search(QUERIES[i % len(QUERIES)]), range(n_queries)))
+    return n_queries / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    from app.services.vector_service import get_local_vector_service
+    from app.services.vector_client import RemoteVectorService
+
+    local = get_local_vector_service()
+    print(f"index size: {local.index.ntotal} chunks")
+    qps = run_load(lambda q: local.search(q, top_k=5), args.queries, args.threads)
+    print(f"in-process        {qps:8.1f} q/s   worker RSS {rss_mb(os.getpid()):.0f} MB")
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "vector.sock")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.services.search_server", "--uds", socket_path],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        remote = RemoteVectorService(socket_path=socket_path)
+        while not remote.is_ready():
+            if server.poll() is not None:
+                raise RuntimeError("search server exited during startup")
+            time.sleep(0.5)
+
+        qps = run_load(lambda q: remote.search(q, top_k=5), args.queries, args.threads)
+        print(f"search server     {qps:8.1f} q/s   server RSS {rss_mb(server.pid):.0f} MB (shared by all workers)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
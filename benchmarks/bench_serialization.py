@@ -0,0 +1,103 @@
+"""
+Response serialization cost per MB of JSON, for the large responses:
+search results (2000-char chunk texts) and a user's document listing
+(full OCR content).
+
+Each payload goes through:
+
+  response_model  what FastAPI does for a route returning objects/dicts:
+                  validate against the response model, then pydantic's
+                  JSON serializer (its default path since 0.130)
+  stdlib json     json.dumps of plain dicts (starlette's JSONResponse)
+  orjson          orjson.dumps of plain dicts (app.responses.ORJSONResponse,
+                  the trusted-data path)
+
+then through gzip at a few levels (GZipMiddleware's cost on the way out).
+
+usage: python -m benchmarks.bench_serialization [--results 100] [--documents 50]
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault("TESTING", "1")  # no warm-up thread, no MySQL
+
+import numpy as np
+import orjson
+from pydantic import TypeAdapter
+from typing import List
+
+from app import schemas
+from benchmarks.bench_content_storage import make_corpus
+
+
+def search_payload(n: int, as_models: bool) -> dict:
+    texts = make_corpus(max(1, n // 5))
+    chunks = [t[i:i + 2000] for t in texts for i in range(0, len(t), 2000)][:n]
+    results = [
+        {"document_id": i // 5 + 1, "chunk_id": i % 5, "title": f"scan {i // 5}",
+         "content": chunk, "similarity_score": 0.9 - i / 1000}
+        for i, chunk in enumerate(chunks)
+    ]
+    if as_models:
+        results = [schemas.SearchResult(**r) for r in results]
+    return {"query": "invoice total", "results": results, "total_results": len(results)}
+
+
+def listing_payload(n: int, as_orm: bool):
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    docs = [{"id": i + 1, "title": f"scan {i}", "content": text, "created_at": created}
+            for i, text in enumerate(make_corpus(n, seed=1))]
+    # attribute access like ORM rows (from_attributes)
+    return [SimpleNamespace(**d) for d in docs] if as_orm else docs
+
+
+def ms_per_mb(fn, size_mb: float, repeat: int = 20) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples)) / size_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=100)
+    parser.add_argument("--documents", type=int, default=50)
+    args = parser.parse_args()
+
+    search_adapter = TypeAdapter(schemas.SearchResponse)
+    listing_adapter = TypeAdapter(List[schemas.DocumentResponse])
+    payloads = {
+        "search": (search_adapter, search_payload(args.results, as_models=True),
+                   search_payload(args.results, as_models=False)),
+        "listing": (listing_adapter, listing_payload(args.documents, as_orm=True),
+                    listing_payload(args.documents, as_orm=False)),
+    }
+
+    print(f"{'payload':<10}{'MB':>6}{'response_model':>16}{'stdlib json':>13}{'orjson':>9}   (ms per MB)")
+    bodies = {}
+    for name, (adapter, routed, plain) in payloads.items():
+        body = orjson.dumps(plain)
+        bodies[name] = body
+        size_mb = len(body) / 1024 / 1024
+        routed_ms = ms_per_mb(lambda: adapter.dump_json(adapter.validate_python(routed)), size_mb)
+        stdlib_ms = ms_per_mb(lambda: json.dumps(plain, default=str).encode(), size_mb)
+        orjson_ms = ms_per_mb(lambda: orjson.dumps(plain), size_mb)
+        print(f"{name:<10}{size_mb:>6.2f}{routed_ms:>16.2f}{stdlib_ms:>13.2f}{orjson_ms:>9.2f}")
+
+    print(f"\n{'gzip level':<12}{'ratio':>7}{'ms per MB':>11}")
+    body = bodies["search"]
+    for level in (1, 5, 9):
+        size_mb = len(body) / 1024 / 1024
+        ratio = len(body) / len(gzip.compress(body, level))
+        print(f"{level:<12}{ratio:>7.2f}{ms_per_mb(lambda: gzip.compress(body, level), size_mb, repeat=5):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Sharded vs global index: per-user query latency as other tenants grow.
+
+One "probe" user keeps a fixed number of chunks while the rest of the
+corpus (other users) grows. With one global index every user-filtered
+query scans everything; with VECTOR_SHARDS=user it only scans the probe
+user's shard, so its latency should stay flat. Also reports a cross-user
+(admin) query, which fans out to every shard.
+
+usage: python -m benchmarks.bench_shards [--others 10000,100000] [--users 50] [--probe-chunks 500]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.vector_service import VectorService
+from app.services.vector_shards import ShardedVectorService
+from benchmarks.bench_compression import PrecomputedBackend, clustered_unit_vectors
+
+PROBE_USER = 0
+QUERIES = 100
+
+
+def build(service, n_others: int, users: int, probe_chunks: int):
+    chunks = [{'text': str(i), 'doc_id': i, 'chunk_id': 0, 'user_id': PROBE_USER} for i in range(probe_chunks)]
+    chunks += [{'text': str(probe_chunks + i), 'doc_id': probe_chunks + i, 'chunk_id': 0,
+                'user_id': 1 + i % users} for i in range(n_others)]
+    for start in range(0, len(chunks), 20_000):
+        service.add_chunks(chunks[start:start + 20_000])
+
+
+def time_queries(service, first_query: int, user_id) -> float:
+    requests = [{'query': str(first_query + i), 'top_k': 5, 'user_id': user_id} for i in range(QUERIES)]
+    service.search(**requests[0])  # warm-up / load shard
+    start = time.perf_counter()
+    for r in requests:
+        service.search(**r)
+    return (time.perf_counter() - start) / QUERIES * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--others", default="10000,100000")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--probe-chunks", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'other chunks':>13}  {'index':<8}{'user query ms':>15}{'admin query ms':>16}")
+    for n_others in [int(s) for s in args.others.split(",")]:
+        total = args.probe_chunks + n_others
+        vectors = np.vstack([clustered_unit_vectors(total), clustered_unit_vectors(QUERIES, seed=1)])
+        for name in ("global", "sharded"):
+            with tempfile.TemporaryDirectory() as data_dir:
+                backend = PrecomputedBackend(vectors)
+                if name == "global":
+                    service = VectorService(embedder=backend, data_dir=data_dir)
+                else:
+                    service = ShardedVectorService(mode="user", embedder=backend, data_dir=data_dir)
+                build(service, n_others, args.users, args.probe_chunks)
+                user_ms = time_queries(service, total, PROBE_USER)
+                admin_ms = time_queries(service, total, None)
+            print(f"{n_others:>13}  {name:<8}{user_ms:>15.3f}{admin_ms:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
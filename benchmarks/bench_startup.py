@@ -0,0 +1,73 @@
+"""
+Startup-time benchmark.
+
+Measures, each in a fresh interpreter:
+  1. importing app.main (what every uvicorn worker / test run pays up front)
+  2. time until an embedding-free route (/healthz) answers
+  3. warm-up: loading the embedding model + FAISS index + agent graph
+
+usage: python -m benchmarks.bench_startup [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import json, resource, time
+t = time.perf_counter()
+import app.main
+print(json.dumps({"seconds": time.perf_counter() - t,
+                  "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+FIRST_REQUEST_SNIPPET = """
+import json, time
+t = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    assert client.get("/healthz").status_code == 200
+print(json.dumps({"seconds": time.perf_counter() - t}))
+"""
+
+WARM_UP_SNIPPET = """
+import json, resource, time
+import app.main
+t = time.perf_counter()
+app.main.warm_up()
+print(json.dumps({"seconds": time.perf_counter() - t,
+                  "status": app.main._warm_up_state["status"],
+                  "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def run_snippet(snippet: str) -> dict:
+    """Run a snippet in a clean interpreter and return its JSON result"""
+    env = dict(os.environ, TESTING="1")
+    out = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, snippet in [("import app.main", IMPORT_SNIPPET),
+                          ("first /healthz request", FIRST_REQUEST_SNIPPET),
+                          ("warm-up (model + index)", WARM_UP_SNIPPET)]:
+        results = [run_snippet(snippet) for _ in range(args.runs)]
+        best = min(r["seconds"] for r in results)
+        extra = {k: v for k, v in results[-1].items() if k != "seconds"}
+        print(f"{name:<26} best of {args.runs}: {best:.3f}s  {extra}")
+
+
+if __name__ == "__main__":
+    main()
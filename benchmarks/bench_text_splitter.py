@@ -0,0 +1,63 @@
+"""
+Text splitter throughput: LangChain vs TextSplitter (compat and native).
+
+Splits multi-MB synthetic fixtures shaped like our inputs with
+chunk_size=2000 / overlap=200 (ChunkingService's settings) and reports
+MB/s, chunk count, and whether compat output equals LangChain's.
+
+  paragraphs  prose paragraphs separated by blank lines
+  ocr-lines   short lines, as tesseract emits them
+  one-line    words only, no newlines (e.g. flattened PDF text)
+
+usage: python -m benchmarks.bench_text_splitter [--mb 4]
+"""
+import argparse
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.services.text_splitter import DEFAULT_SEPARATORS, TextSplitter
+from benchmarks.bench_embedding import make_texts
+
+CHUNK_SIZE = 2000
+OVERLAP = 200
+
+
+def fixtures(size: int) -> dict:
+    shapes = {
+        "paragraphs": "\n\n".join(make_texts(400, words_per_text=60)),
+        "ocr-lines": "\n".join(make_texts(4000, words_per_text=9)),
+        "one-line": " ".join(make_texts(4000, words_per_text=9)),
+    }
+    return {name: (text * (size // len(text) + 1))[:size] for name, text in shapes.items()}
+
+
+def timed(split, text):
+    start = time.perf_counter()
+    result = split(text)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=4)
+    args = parser.parse_args()
+
+    langchain = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP,
+                                               separators=DEFAULT_SEPARATORS, length_function=len)
+    compat = TextSplitter(CHUNK_SIZE, OVERLAP, mode="compat")
+    native = TextSplitter(CHUNK_SIZE, OVERLAP, mode="native")
+
+    print(f"{'fixture':<12}{'splitter':<11}{'MB/s':>9}{'chunks':>9}  parity")
+    for name, text in fixtures(int(args.mb * 1024 * 1024)).items():
+        mb = len(text.encode("utf-8")) / 1024 / 1024
+        reference, seconds = timed(langchain.split_text, text)
+        print(f"{name:<12}{'langchain':<11}{mb / seconds:>9.1f}{len(reference):>9}")
+        for label, splitter in (("compat", compat), ("native", native)):
+            chunks, seconds = timed(splitter.split_text, text)
+            parity = "identical" if chunks == reference else "differs"
+            print(f"{name:<12}{label:<11}{mb / seconds:>9.1f}{len(chunks):>9}  {parity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Character vs token chunking: index size, silently truncated text, retrieval.
+
+Builds a fixture corpus of report-like documents with unique "facts"
+("The access code for vault <name> is <word>.") planted at random places,
+indexes it once with 2000-character chunks and once with CHUNK_TOKENS-token
+chunks, and reports:
+
+  chunks / stored KB  what the index and chunk store hold
+  unembedded %        stored characters past the model's 256 word-piece
+                      window, i.e. never seen by the encoder
+  index KB            serialized FAISS index size
+  fact recall@5       share of fact queries whose document is in the top 5
+
+Needs the embedding model and its tokenizer (downloaded on first use).
+
+usage: python -m benchmarks.bench_token_chunking [--docs 200] [--facts 5]
+"""
+import argparse
+import random
+import tempfile
+
+import faiss
+
+from app.services.chunking_service import CHUNK_TOKEN_OVERLAP, CHUNK_TOKENS, ChunkingService
+from app.services.embedding_backends import MODEL_NAME, create_embedding_backend
+from app.services.indexing_service import index_documents
+from app.services.text_splitter import load_tokenizer
+from app.services.vector_service import VectorService
+from benchmarks.bench_embedding import make_texts
+
+MODEL_WINDOW = 256 - 2  # word-pieces embedded, minus [CLS]/[SEP]
+NAMES = "amber birch cedar delta ember falcon garnet harbor indigo juniper".split()
+
+
+def make_corpus(docs: int, facts: int, seed: int = 0):
+    """Documents of filler paragraphs with planted facts, plus one query per fact"""
+    rng = random.Random(seed)
+    documents, queries = [], []
+    for doc_id in range(1, docs + 1):
+        paragraphs = ["\n".join(make_texts(rng.randint(3, 8), words_per_text=12, seed=rng.random()))
+                      for _ in range(rng.randint(8, 20))]
+        for f in range(facts):
+            vault = f"{rng.choice(NAMES)}-{doc_id}-{f}"
+            code = f"{rng.choice(NAMES)}{rng.randint(100, 999)}"
+            paragraphs.insert(rng.randint(0, len(paragraphs)), f"The access code for vault {vault} is {code}.")
+            queries.append((f"access code for vault {vault}", doc_id))
+        documents.append((doc_id, 1, "\n\n".join(paragraphs)))
+    return documents, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--facts", type=int, default=5)
+    args = parser.parse_args()
+
+    documents, queries = make_corpus(args.docs, args.facts)
+    embedder = create_embedding_backend()
+    tokenizer = load_tokenizer(MODEL_NAME)
+    chunkers = {
+        "chars": ChunkingService(chunk_size=2000, overlap=200),
+        "tokens": ChunkingService(chunk_size=CHUNK_TOKENS, overlap=CHUNK_TOKEN_OVERLAP, tokenizer=MODEL_NAME),
+    }
+
+    print(f"{args.docs} docs, {len(queries)} fact queries, model {MODEL_NAME}")
+    print(f"{'unit':<8}{'chunks':>8}{'stored KB':>11}{'unembedded %':>14}{'index KB':>10}{'recall@5':>10}")
+    for unit, chunker in chunkers.items():
+        with tempfile.TemporaryDirectory() as data_dir:
+            service = VectorService(embedder=embedder, data_dir=data_dir)
+            index_documents(service, documents, chunker=chunker, workers=1)
+
+            stored = unembedded = 0
+            for i in range(len(service.chunk_metadata)):
+                text = service.chunk_metadata[i]['text']
+                offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                                    verbose=False)["offset_mapping"]
+                stored += len(text)
+                if len(offsets) > MODEL_WINDOW:
+                    unembedded += len(text) - offsets[MODEL_WINDOW - 1][1]
+
+            results = service.search_batch([{'query': q, 'top_k': 5} for q, _ in queries])
+            hits = sum(doc_id in {r['doc_id'] for r in found} for (_, doc_id), found in zip(queries, results))
+            index_kb = faiss.serialize_index(service.index).nbytes / 1024
+
+        print(f"{unit:<8}{len(service.chunk_metadata):>8}{stored / 1024:>11.0f}"
+              f"{100 * unembedded / stored:>14.1f}{index_kb:>10.0f}{hits / len(queries):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Helpers shared by the benchmarks"""
+import numpy as np
+
+from app.services.embedding_backends import EmbeddingBackend
+
+
+class RandomBackend(EmbeddingBackend):
+    """
+    Random unit vectors instead of a model: same cost profile for FAISS as
+    real embeddings, and runs where the model can't be downloaded.
+    """
+
+    name = "random"
+    dimension = 384
+
+    def __init__(self):
+        self.rng = np.random.default_rng(0)
+
+    def encode(self, texts, batch_size=32):
+        vectors = self.rng.standard_normal((len(texts), self.dimension)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
@@ -0,0 +1,153 @@
+"""
+Offline fixtures for the benchmark suite: a synthetic corpus, a mock LLM,
+and generated images / PDFs for OCR. Everything is built in memory from a
+seed, so runs are reproducible and need no network or sample files.
+"""
+import io
+import random
+import time
+from typing import Dict, List
+
+from benchmarks.bench_embedding import WORDS, make_texts
+
+
+def make_document(words: int, seed: int = 0, words_per_line: int = 12, lines_per_paragraph: int = 8) -> str:
+    """Paragraphs of short lines, roughly the shape of OCR output"""
+    lines = make_texts(max(1, words // words_per_line), words_per_line, seed)
+    paragraphs = [lines[i:i + lines_per_paragraph] for i in range(0, len(lines), lines_per_paragraph)]
+    return "\n\n".join("\n".join(p) for p in paragraphs)
+
+
+def make_corpus(n_docs: int, words_per_doc: int = 1500, users: int = 10, seed: int = 0) -> List[Dict]:
+    """[{title, content, user_index}, ...] with document lengths varying around words_per_doc"""
+    rng = random.Random(seed)
+    return [
+        {
+            "title": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+            "content": make_document(rng.randint(words_per_doc // 2, words_per_doc * 3 // 2), seed=seed + i),
+            "user_index": i % users,
+        }
+        for i in range(n_docs)
+    ]
+
+
+class MockMessage:
+    def __init__(self, content: str, input_tokens: int, output_tokens: int):
+        self.content = content
+        self.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens}
+
+
+class MockLLM:
+    """
+    Stands in for AzureChatOpenAI.invoke: routes every query to "search" and
+    answers with a fixed sentence after `latency` seconds (a real model's
+    time to answer, so load tests see the agent's true shape).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def invoke(self, prompt: str) -> MockMessage:
+        if self.latency:
+            time.sleep(self.latency)
+        content = "search" if "routing agent" in prompt else "Based on the documents, the total is 42."
+        return MockMessage(content, input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+def render_page(text: str, width: int = 1240, height: int = 1754):
+    """Text drawn black on white at ~150 dpi A4, like a clean scan"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    y = 60
+    for line in text.splitlines():
+        if y > height - 60:
+            break
+        draw.text((60, y), line, fill=0)
+        y += 22
+    return image
+
+
+def render_scan(text: str, dpi: int = 300, width_in: float = 8.27, height_in: float = 11.69,
+                skew: float = 0.0, paper: int = 255, noise: float = 0.0, shading: float = 0.0,
+                font_pt: float = 11, record_dpi: bool = True, seed: int = 0):
+    """
+    Text at font_pt on a page of the given size and resolution, degraded
+    like a real capture: skewed by `skew` degrees, gray paper, gaussian
+    noise (std dev in gray levels) and lighting falling off by `shading`
+    (a fraction) across the page. record_dpi=False drops the DPI, like a
+    phone photo.
+    """
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+    size = (round(width_in * dpi), round(height_in * dpi))
+    page = Image.new("L", size, paper)
+    draw = ImageDraw.Draw(page)
+    font_px = round(font_pt * dpi / 72)
+    font = ImageFont.load_default(size=font_px)
+    y = dpi // 2
+    for line in text.splitlines():
+        if y > size[1] - dpi // 2:
+            break
+        draw.text((dpi // 2, y), line, fill=20, font=font)
+        y += round(font_px * 1.5)
+    if skew:
+        page = page.rotate(skew, resample=Image.BICUBIC, fillcolor=paper)
+
+    pixels = np.asarray(page, dtype=np.float32)
+    if shading:
+        pixels = pixels * (1 - shading * np.linspace(0, 1, size[0], dtype=np.float32))
+    if noise:
+        pixels = pixels + np.random.default_rng(seed).normal(0, noise, pixels.shape).astype(np.float32)
+    page = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    if record_dpi:
+        page.info["dpi"] = (dpi, dpi)
+    return page
+
+
+def make_image(text: str, fmt: str = "PNG") -> bytes:
+    out = io.BytesIO()
+    render_page(text).save(out, format=fmt)
+    return out.getvalue()
+
+
+def make_scanned_pdf(pages: List[str]) -> bytes:
+    """Image-only PDF: no text layer, so process_pdf has to OCR it"""
+    images = [render_page(text).convert("RGB") for text in pages]
+    out = io.BytesIO()
+    images[0].save(out, format="PDF", save_all=True, append_images=images[1:], resolution=150)
+    return out.getvalue()
+
+
+def _pdf_string(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(pages: List[str]) -> bytes:
+    """PDF with a real text layer (Helvetica), the no-OCR fast path"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = "\n".join(
+            ["BT /F1 11 Tf 14 TL 50 800 Td"] + [f"({_pdf_string(line)}) '" for line in text.splitlines()] + ["ET"]
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
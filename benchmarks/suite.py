@@ -0,0 +1,298 @@
+"""
+Benchmark suite: micro-benchmarks of the hot paths plus a load test of the
+API, with results that can be checked against a saved baseline.
+
+  micro   chunking (MB/s), embedding (chunks/s), search latency and OCR
+          per call (image, scanned PDF, text-layer PDF)
+  load    concurrent POST /search, /ai/ask and /documents/index against
+          the app in-process (SQLite, mock LLM): requests/s and
+          p50/p95/p99 latency
+
+Runs offline. Embeddings are random unit vectors unless --embedder names a
+backend (torch, onnx-int8, ...). OCR is skipped when tesseract is missing.
+
+Results are saved as {"meta": {...}, "metrics": {"name": value}}. Metrics
+ending in _ms are lower-is-better; the rest are higher-is-better.
+
+usage: python -m benchmarks.suite [--only micro|load] [--output results.json]
+       python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+       python -m benchmarks.suite --baseline benchmarks/baseline.json [--tolerance 0.25]
+
+With --baseline the run exits 1 if any metric is worse than the baseline
+by more than --tolerance (a fraction), or if any load request failed.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+os.environ.setdefault("TESTING", "1")  # no warm-up thread, no MySQL
+
+import numpy as np
+
+from benchmarks.bench_embedding import make_texts
+from benchmarks.common import RandomBackend
+from benchmarks.fixtures import MockLLM, make_corpus, make_document, make_image, make_scanned_pdf, make_text_pdf
+
+Metrics = Dict[str, float]
+
+# latencies below this are timer noise; they aren't compared to the baseline
+NOISE_FLOOR_MS = 0.05
+
+
+def latency_metrics(prefix: str, samples_ms: List[float]) -> Metrics:
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {f"{prefix}.p50_ms": float(p50), f"{prefix}.p95_ms": float(p95), f"{prefix}.p99_ms": float(p99)}
+
+
+def sample_ms(func: Callable, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def make_embedder(name: str):
+    if name == "random":
+        return RandomBackend()
+    from app.services.embedding_backends import create_embedding_backend
+
+    return create_embedding_backend(name)
+
+
+# -- micro --
+
+def bench_chunking(mb: float) -> Metrics:
+    from app.services.chunking_service import chunking_service
+
+    text = make_document(int(mb * 1024 * 1024 / 7))  # ~7 bytes per word
+    size_mb = len(text.encode("utf-8")) / 1024 / 1024
+    seconds = min(sample_ms(lambda: chunking_service.chunk_text(text, doc_id=1, user_id=1), 3)) / 1000
+    return {"micro.chunk.mb_per_s": size_mb / seconds}
+
+
+def bench_embedding(embedder, texts: int) -> Metrics:
+    chunks = make_texts(texts, words_per_text=300)
+    queries = make_texts(50, words_per_text=8, seed=1)
+    embedder.encode(chunks[:8])  # warm-up
+    seconds = min(sample_ms(lambda: embedder.encode(chunks), 3)) / 1000
+    samples = [sample_ms(lambda q=q: embedder.encode([q]), 1)[0] for q in queries]
+    return {"micro.embed.chunks_per_s": texts / seconds, **latency_metrics("micro.embed.query", samples)}
+
+
+def bench_search(embedder, chunks: int, queries: int) -> Metrics:
+    from app.services.vector_service import VectorService
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        service = VectorService(embedder=embedder, data_dir=data_dir)
+        texts = make_texts(chunks, words_per_text=40)
+        service.add_chunks([{'text': t, 'doc_id': i // 10 + 1, 'chunk_id': i % 10, 'user_id': i % 10 + 1}
+                            for i, t in enumerate(texts)])
+        questions = make_texts(queries, words_per_text=8, seed=1)
+        service.search(questions[0])  # warm-up
+        all_users = [sample_ms(lambda q=q: service.search(q, top_k=5), 1)[0] for q in questions]
+        one_user = [sample_ms(lambda q=q: service.search(q, top_k=5, user_id=3), 1)[0] for q in questions]
+    return {**latency_metrics("micro.search", all_users), **latency_metrics("micro.search.user_filter", one_user)}
+
+
+def bench_ocr(repeat: int) -> Metrics:
+    try:
+        from app.services import ocr_service
+    except EnvironmentError as e:
+        print(f"  ocr skipped: {e}")
+        return {}
+
+    pages = [make_document(250, seed=page) for page in range(3)]
+    fixtures = {
+        "image": (ocr_service.process_image, make_image(pages[0])),
+        "scanned_pdf": (ocr_service.process_pdf, make_scanned_pdf(pages)),
+        "text_pdf": (ocr_service.process_pdf, make_text_pdf(pages)),
+    }
+    metrics: Metrics = {}
+    for name, (process, data) in fixtures.items():
+        try:
+            process(data)  # warm-up, and fail fast if tesseract/poppler can't run
+        except Exception as e:
+            print(f"  ocr {name} skipped: {e}")
+            continue
+        metrics.update(latency_metrics(f"micro.ocr.{name}", sample_ms(lambda: process(data), repeat)))
+    return metrics
+
+
+# -- load --
+
+def run_load(call: Callable[[int], int], requests: int, concurrency: int, prefix: str) -> Metrics:
+    """call(i) -> HTTP status, from `concurrency` threads; errors are any non-2xx"""
+    def timed_call(i):
+        start = time.perf_counter()
+        status = call(i)
+        return (time.perf_counter() - start) * 1000, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed_call, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for _, status in results if not 200 <= status < 300)
+    return {
+        f"{prefix}.rps": requests / elapsed,
+        **latency_metrics(prefix, [ms for ms, _ in results]),
+        f"{prefix}.errors": errors,
+    }
+
+
+def bench_load(embedder, docs: int, requests: int, concurrency: int, llm_latency: float) -> Metrics:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import app.routers.search as search_router
+    import app.services.agent_service as agent_service
+    from app import models
+    from app.database import Base, get_db
+    from app.main import app
+    from app.services.indexing_service import index_documents
+    from app.services.vector_service import VectorService
+
+    users = 10
+    corpus = make_corpus(docs, words_per_doc=600, users=users)
+    with tempfile.TemporaryDirectory() as work_dir:
+        # a file, not :memory:, so concurrent requests get their own connections
+        engine = create_engine(f"sqlite:///{work_dir}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add_all([models.User(id=u + 1, username=f"bench{u}", email=f"bench{u}@example.com")
+                        for u in range(users)])
+            db.add_all([models.Document(id=i + 1, title=d["title"], content=d["content"], user_id=d["user_index"] + 1)
+                        for i, d in enumerate(corpus)])
+            db.commit()
+
+        def get_bench_db():
+            with Session() as db:
+                yield db
+
+        service = VectorService(embedder=embedder, data_dir=os.path.join(work_dir, "vectors"))
+        index_documents(service, [(i + 1, d["user_index"] + 1, d["content"]) for i, d in enumerate(corpus)],
+                        workers=1)
+
+        app.dependency_overrides[get_db] = get_bench_db
+        search_router.get_vector_service = lambda: service
+        agent_service.get_vector_service = lambda: service
+        agent_service.get_llm = lambda: MockLLM(llm_latency)
+
+        questions = make_texts(requests, words_per_text=8, seed=2)
+        metrics: Metrics = {}
+        with TestClient(app) as client:
+            client.post("/search", json={"query": questions[0]})  # warm-up
+            client.post("/ai/ask", json={"query": questions[0]})  # compiles the agent graph
+            metrics.update(run_load(
+                lambda i: client.post("/search", json={
+                    "query": questions[i], "top_k": 5, "user_id": i % users + 1
+                }).status_code,
+                requests, concurrency, "load.search"))
+            metrics.update(run_load(
+                lambda i: client.post("/ai/ask", json={"query": questions[i], "user_id": i % users + 1}).status_code,
+                requests, concurrency, "load.ask"))
+            # re-indexes existing documents, 5 per request; runs last as it grows the index
+            metrics.update(run_load(
+                lambda i: client.post("/documents/index", json={
+                    "document_ids": [(i * 5 + j) % docs + 1 for j in range(5)]
+                }).status_code,
+                max(1, requests // 10), concurrency, "load.index"))
+        app.dependency_overrides.clear()
+    return metrics
+
+
+# -- baseline --
+
+def compare(metrics: Metrics, baseline: Metrics, tolerance: float) -> List[str]:
+    """Print current vs baseline; return the names of regressed metrics"""
+    regressions = []
+    print(f"\n{'metric':<36}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, base in sorted(baseline.items()):
+        if name.endswith(".errors") or name not in metrics or not base:
+            continue
+        if name.endswith("_ms") and max(base, metrics[name]) < NOISE_FLOOR_MS:
+            continue
+        value = metrics[name]
+        change = (value - base) / base
+        worse = change if name.endswith("_ms") else -change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<36}{base:>12.2f}{value:>12.2f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=["micro", "load"])
+    parser.add_argument("--embedder", default="random", help="'random' or an EMBEDDING_BACKEND name")
+    parser.add_argument("--chunk-mb", type=float, default=4)
+    parser.add_argument("--embed-texts", type=int, default=256)
+    parser.add_argument("--search-chunks", type=int, default=20_000)
+    parser.add_argument("--search-queries", type=int, default=500)
+    parser.add_argument("--ocr-repeat", type=int, default=3)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per mock LLM call")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results JSON here as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    embedder = make_embedder(args.embedder)
+    metrics: Metrics = {}
+    if args.only in (None, "micro"):
+        print("micro-benchmarks...")
+        metrics.update(bench_chunking(args.chunk_mb))
+        metrics.update(bench_embedding(embedder, args.embed_texts))
+        metrics.update(bench_search(embedder, args.search_chunks, args.search_queries))
+        metrics.update(bench_ocr(args.ocr_repeat))
+    if args.only in (None, "load"):
+        print("load test...")
+        metrics.update(bench_load(embedder, args.docs, args.requests, args.concurrency, args.llm_latency))
+
+    print(f"\n{'metric':<36}{'value':>12}")
+    for name, value in sorted(metrics.items()):
+        print(f"{name:<36}{value:>12.2f}")
+
+    results = {
+        "meta": {
+            "embedder": args.embedder, "python": platform.python_version(),
+            "machine": platform.machine(), "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "metrics": metrics,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {path}")
+
+    failed = [name for name, value in metrics.items() if name.endswith(".errors") and value]
+    for name in failed:
+        print(f"{name}: {metrics[name]:.0f} failed requests")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("embedder") != args.embedder:
+            print(f"warning: baseline used embedder {baseline['meta'].get('embedder')}, this run {args.embedder}")
+        regressions = compare(metrics, baseline["metrics"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+        failed += regressions
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
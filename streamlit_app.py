@@ -3,8 +3,8 @@ Main Streamlit Application Entry Point
 Phase 5: Document AI Assistant with RAG
 """
 import streamlit as st
-import requests
-from ui.config import API_BASE_URL, DEFAULT_API_VERSION
+from ui import api_client
+from ui.config import DEFAULT_API_VERSION
 from ui.tab_users import render_users_tab
 from ui.tab_documents import render_documents_tab
 from ui.tab_chat import render_chat_tab
@@ -74,12 +74,10 @@ if config_ok:
 else:
     st.warning("⚠️ Please set the Azure OpenAI configuration in the sidebar.")
 
-# Test API server connectivity
-try:
-    response = requests.get(f"{API_BASE_URL}/docs", timeout=3)
-    if response.status_code == 200:
-        st.success("☑️ API server is running.")
-except:
+# Test API server connectivity (/healthz, checked at most every HEALTH_CHECK_TTL seconds)
+if api_client.api_is_up():
+    st.success("☑️ API server is running.")
+else:
     st.error("❌ Cannot connect to API server. Ensure it's running: `uvicorn app.main:app --reload`")
 
 
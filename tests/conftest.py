@@ -9,7 +9,7 @@ from app.database import Base, get_db
 # Set testing flag BEFORE importing app/models
 os.environ["TESTING"] = "1"
 
-from app import models  # Import models so Base.metadata knows about them
+from app import caching, models  # Import models so Base.metadata knows about them
 from app.main import app
 
 # Use in-memory SQLite for tests (fast, isolated, no cleanup needed)
@@ -42,6 +42,7 @@ def client():
     """
     # Create tables for this test
     Base.metadata.create_all(bind=engine)
+    caching.clear()  # versions and search results of the previous test's database
     
     def override_get_db():
         # Create session for this test
@@ -59,3 +60,75 @@ def client():
     app.dependency_overrides.clear()
     # Drop tables after test
     Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    """
+    TestClient for the async data layer routes (ASYNC_DB=1), on aiosqlite.
+
+    A file database with NullPool: every session opens its own connection
+    on the TestClient's event loop.
+    """
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+    from app.database import get_async_db
+    from app.routers import documents, search, users
+
+    caching.clear()
+    db_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    async_app = FastAPI()
+    for module in (users, documents, search):
+        async_app.include_router(module.async_router)
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+
+    with TestClient(async_app) as test_client:
+        yield test_client
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder for VectorService tests.
+
+    Same interface as app.services.embedding_backends.EmbeddingBackend, so
+    index/search logic can be tested without downloading a model.
+    """
+
+    dimension = 96
+
+    def encode(self, texts, batch_size=32):
+        import zlib
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+@pytest.fixture
+def make_vector_service(tmp_path):
+    """Build VectorServices over a temp data dir with the hashing embedder"""
+    from app.services.vector_service import VectorService
+
+    def factory(**kwargs):
+        kwargs.setdefault("data_dir", str(tmp_path))
+        return VectorService(embedder=HashingEmbedder(), **kwargs)
+
+    return factory
@@ -0,0 +1,105 @@
+import random
+from app.services.chunking_service import ChunkingService
+from app.services.indexing_service import index_document
+
+WORDS = "invoice total amount. contract\nclause payment\n\ndue date signature".split(" ")
+
+
+def make_text(n_words, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def test_chunk_text_matches_splitter_for_small_docs():
+    """Test documents inside one window chunk exactly like split_text"""
+    chunker = ChunkingService(chunk_size=200, overlap=20)
+    text = make_text(500)
+    chunks = chunker.chunk_text(text, doc_id=1, user_id=2)
+    assert [c['text'] for c in chunks] == chunker.splitter.split_text(text)
+    assert all(text[c['start_char']:c['end_char']] == c['text'] for c in chunks)
+
+
+def test_iter_chunks_streams_large_docs_in_windows():
+    """Test a document many windows long yields bounded chunks covering all its text"""
+    chunker = ChunkingService(chunk_size=100, overlap=10)
+    text = make_text(20_000, seed=1)  # ~40 windows of 32 * 100 chars
+
+    covered = [False] * len(text)
+    previous_start = -1
+    for chunk in chunker.iter_chunks(text, doc_id=1, user_id=1):
+        assert chunk['char_count'] <= 100
+        assert chunk['start_char'] > previous_start
+        previous_start = chunk['start_char']
+        covered[chunk['start_char']:chunk['end_char']] = [True] * chunk['char_count']
+
+    assert all(covered[i] for i, ch in enumerate(text) if not ch.isspace())
+
+
+def test_iter_chunks_continues_after_a_gap_wider_than_a_window():
+    """Test text after a whitespace run longer than window_size is still chunked"""
+    chunker = ChunkingService(chunk_size=100, overlap=10)
+    before, after = make_text(300, seed=2), make_text(300, seed=3)
+    text = before + " " * (chunker.window_size * 2 + 17) + "\n" * 50 + after
+
+    covered = [False] * len(text)
+    for chunk in chunker.iter_chunks(text, doc_id=1, user_id=1):
+        covered[chunk['start_char']:chunk['end_char']] = [True] * chunk['char_count']
+    assert all(covered[i] for i, ch in enumerate(text) if not ch.isspace())
+    assert covered[-1]
+
+def test_index_document_adds_all_windows(make_vector_service):
+    """Test windowed indexing adds every chunk and persists them with one save"""
+    service = make_vector_service()
+    chunker = ChunkingService(chunk_size=100, overlap=10)
+    text = make_text(2_000) + " warehouse inventory report"
+
+    count = index_document(service, text, doc_id=5, user_id=1, chunker=chunker, window=4)
+    assert count == len(chunker.chunk_text(text, 5, 1)) > 4
+
+    reloaded = make_vector_service()
+    assert len(reloaded.chunk_metadata) == count
+    assert reloaded.chunk_metadata[count - 1]['text'].endswith("warehouse inventory report")
+
+
+def test_index_documents_in_process_pool(make_vector_service):
+    """Test pool-chunked documents are indexed with the same chunks, empty ones fail"""
+    from app.services.indexing_service import index_documents
+
+    service = make_vector_service()
+    chunker = ChunkingService(chunk_size=100, overlap=10)
+    documents = [(1, 1, make_text(300, seed=1)), (2, 1, "   "), (3, 2, make_text(50, seed=3))]
+
+    assert index_documents(service, documents, chunker=chunker, window=8, workers=2) == ([1, 3], [2], [])
+
+    expected = chunker.chunk_text(documents[0][2], 1, 1) + chunker.chunk_text(documents[2][2], 3, 2)
+    stored = make_vector_service().chunk_metadata
+    assert [stored[i]['text'] for i in range(len(stored))] == [c['text'] for c in expected]
+
+
+def test_index_documents_reports_what_a_failed_window_left_indexed(make_vector_service):
+    """Test a failing batch only fails its bad document, which is reported partial once some chunks are in"""
+    from app.services.indexing_service import index_documents
+
+    service = make_vector_service()
+
+    class FailingService:
+        def add_chunks(self, chunks, save=True):
+            if any(c['doc_id'] == 2 and c['chunk_id'] >= 3 for c in chunks):
+                raise RuntimeError("encoder out of memory")
+            service.add_chunks(chunks, save=save)
+
+        def save(self):
+            service.save()
+
+    chunker = ChunkingService(chunk_size=100, overlap=10)
+    documents = [(1, 1, make_text(60, seed=1)), (2, 1, make_text(80, seed=2)),
+                 (3, 2, make_text(40, seed=3)), (4, 2, 12345)]  # 4 can't be chunked
+    assert index_documents(FailingService(), documents, chunker=chunker, window=4, workers=1) == ([1, 3], [4], [2])
+
+    stored = make_vector_service().chunk_metadata
+    by_doc = {}
+    for i in range(len(stored)):
+        by_doc.setdefault(stored[i]['doc_id'], []).append(stored[i]['chunk_id'])
+    for doc_id, _, text in documents[::2]:
+        assert by_doc[doc_id] == list(range(len(chunker.chunk_text(text, doc_id, 1))))
+    assert by_doc[2] == [0, 1, 2]  # nothing after the failed batch
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from app.services.embedding_backends import EmbeddingBackend, check_parity, create_embedding_backend
+
+
+class FixedBackend(EmbeddingBackend):
+    """Returns preset unit vectors, one per text"""
+
+    def __init__(self, vectors):
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+    def encode(self, texts, batch_size=32):
+        return self.vectors[:len(texts)]
+
+
+def test_check_parity_reports_cosine_agreement():
+    """Test parity is the per-text cosine between backends"""
+    reference = FixedBackend([[1.0, 0.0], [0.0, 1.0]])
+    candidate = FixedBackend([[1.0, 0.0], [0.6, 0.8]])
+    parity = check_parity(candidate, reference, ["a", "b"])
+    assert parity["min_cosine"] == pytest.approx(0.8)
+    assert parity["mean_cosine"] == pytest.approx(0.9)
+
+
+def test_incomplete_backend_fails_when_created():
+    """Test a backend without encode is rejected up front, not on its first search"""
+    class NoEncode(EmbeddingBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        NoEncode()
+
+
+def test_unknown_backend_rejected():
+    """Test that a typo in EMBEDDING_BACKEND fails loudly"""
+    with pytest.raises(ValueError):
+        create_embedding_backend("tensorrt")
@@ -295,6 +295,222 @@ def test_get_user_documents_isolation(client):
     assert data[0]["title"] == "User2 Doc"
 
 
+def test_document_content_is_stored_compressed(client):
+    """Test content is compressed at rest, read back intact, and not loaded unless asked for"""
+    from sqlalchemy import inspect, text
+    from tests.conftest import TestingSessionLocal
+    from app import models
+
+    user_id = client.post("/users/", json={"username": "ocr", "email": "ocr@example.com"}).json()["id"]
+    content = "Invoice total due: 1,250.00 EUR — payable within 30 days.\n" * 200
+    doc_id = client.post("/documents/", json={"title": "Scan", "content": content, "user_id": user_id}).json()["id"]
+    client.post("/documents/", json={"title": "Empty", "content": "", "user_id": user_id})
+
+    with TestingSessionLocal() as db:
+        stored = db.execute(text("SELECT content FROM documents WHERE id = :id"), {"id": doc_id}).scalar()
+        assert isinstance(stored, bytes) and len(stored) < len(content) / 10
+        doc = db.get(models.Document, doc_id)
+        assert "content" in inspect(doc).unloaded
+
+    assert [d["content"] for d in client.get(f"/users/{user_id}/documents").json()] == [content, ""]
+
+
+def test_get_user_documents_etag(client):
+    """Test an unchanged listing revalidates to a 304 without a DB query, and a new document changes the ETag"""
+    from sqlalchemy import event
+    from tests.conftest import engine
+
+    user_id = client.post("/users/", json={"username": "etag", "email": "etag@example.com"}).json()["id"]
+    client.post("/documents/", json={"title": "First", "content": "a", "user_id": user_id})
+    response = client.get(f"/users/{user_id}/documents")
+    etag = response.headers["etag"]
+
+    statements = []
+    count = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.get(f"/users/{user_id}/documents", headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert statements == []
+
+    client.post("/documents/", json={"title": "Second", "content": "b", "user_id": user_id})
+    response = client.get(f"/users/{user_id}/documents", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    assert [d["title"] for d in response.json()] == ["First", "Second"]
+
+
+def test_large_responses_are_gzipped(client):
+    """Test big bodies are compressed and the orjson listing still matches DocumentResponse"""
+    from app import schemas
+
+    user_id = client.post("/users/", json={"username": "gzip", "email": "gzip@example.com"}).json()["id"]
+    client.post("/documents/", json={"title": "Scan", "content": "total due 42.00\n" * 500, "user_id": user_id})
+
+    response = client.get(f"/users/{user_id}/documents", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < 1000
+    document = schemas.DocumentResponse.model_validate(response.json()[0])
+    assert document.content == "total due 42.00\n" * 500
+
+
+# ========== RESUMABLE UPLOAD TESTS ==========
+
+@pytest.fixture
+def fake_ocr(monkeypatch, tmp_path):
+    """Uploads under tmp_path; 'OCR' of an image is its bytes decoded"""
+    from pathlib import Path
+    from app.services import ocr_service, upload_service
+
+    monkeypatch.setattr(upload_service, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(ocr_service, "process_image_file", lambda path, doc_type: Path(path).read_text())
+
+
+def put_chunk(client, upload_id, offset, chunk, checksum=None):
+    import hashlib
+    headers = {"Upload-Offset": str(offset), "X-Chunk-SHA256": checksum or hashlib.sha256(chunk).hexdigest()}
+    return client.put(f"/documents/uploads/{upload_id}", content=chunk, headers=headers)
+
+
+def test_resumable_upload(client, fake_ocr):
+    """Test a chunked upload survives a bad chunk and a wrong offset, then is OCR'd into a document"""
+    import hashlib
+    from pathlib import Path
+    from app.services import upload_service
+
+    user_id = client.post("/users/", json={"username": "chunks", "email": "chunks@example.com"}).json()["id"]
+    data = b"scanned invoice total 1250 EUR " * 100
+    response = client.post("/documents/uploads", json={
+        "filename": "scan.png", "content_type": "image/png", "size": len(data), "title": "Scan", "user_id": user_id
+    })
+    assert response.status_code == status.HTTP_201_CREATED
+    upload_id = response.json()["upload_id"]
+    assert response.json()["offset"] == 0
+
+    assert put_chunk(client, upload_id, 0, data[:1000]).json()["offset"] == 1000
+    # corrupted in transit: dropped, offset unchanged
+    response = put_chunk(client, upload_id, 1000, data[1000:2000], checksum=hashlib.sha256(b"x").hexdigest())
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    # resent from the wrong place: told where to resume
+    response = put_chunk(client, upload_id, 0, data[:1000])
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.headers["upload-offset"] == "1000"
+    assert client.get(f"/documents/uploads/{upload_id}").json()["offset"] == 1000
+
+    response = client.post(f"/documents/uploads/{upload_id}/complete", json={"sha256": hashlib.sha256(data).hexdigest()})
+    assert response.status_code == status.HTTP_409_CONFLICT  # not all there yet
+    put_chunk(client, upload_id, 1000, data[1000:])
+    response = client.post(f"/documents/uploads/{upload_id}/complete", json={"sha256": hashlib.sha256(data).hexdigest()})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    document_id = response.json()["document_id"]
+
+    # the background OCR has run once the response is in
+    response = client.get(f"/documents/uploads/{upload_id}")
+    assert response.json()["status"] == "done"
+    assert response.json()["offset"] == len(data)
+    assert not Path(upload_service.data_path(upload_id)).exists()
+    documents = client.get(f"/users/{user_id}/documents").json()
+    assert [(d["id"], d["content"]) for d in documents] == [(document_id, data.decode())]
+
+
+def test_resumable_upload_completes_once(client, fake_ocr, monkeypatch):
+    """Test completing twice returns the first completion's status: one document, one OCR run"""
+    from app.services import ocr_service, upload_service
+
+    ocr_calls = []
+    monkeypatch.setattr(ocr_service, "process_image_file", lambda path, doc_type: ocr_calls.append(path) or "text")
+    user_id = client.post("/users/", json={"username": "twice", "email": "twice@example.com"}).json()["id"]
+    upload_id = client.post("/documents/uploads", json={
+        "filename": "a.png", "content_type": "image/png", "size": 4, "title": "A", "user_id": user_id
+    }).json()["upload_id"]
+    put_chunk(client, upload_id, 0, b"scan")
+
+    # another request is completing it right now
+    with upload_service.exclusive(upload_id):
+        response = client.post(f"/documents/uploads/{upload_id}/complete")
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    first = client.post(f"/documents/uploads/{upload_id}/complete")
+    second = client.post(f"/documents/uploads/{upload_id}/complete")
+    assert first.status_code == second.status_code == status.HTTP_202_ACCEPTED
+    assert second.json()["document_id"] == first.json()["document_id"]
+    assert second.json()["status"] == "done"
+    assert len(client.get(f"/users/{user_id}/documents").json()) == 1
+    assert len(ocr_calls) == 1
+    assert put_chunk(client, upload_id, 4, b"more").status_code == status.HTTP_409_CONFLICT
+
+
+def test_resumable_upload_claim_holds_across_processes(client, fake_ocr):
+    """Test a chunk is refused while another process (another API worker) holds the upload"""
+    import os
+    import subprocess
+    import sys
+    from app.services import upload_service
+
+    user_id = client.post("/users/", json={"username": "workers", "email": "workers@example.com"}).json()["id"]
+    upload_id = client.post("/documents/uploads", json={
+        "filename": "a.png", "content_type": "image/png", "size": 4, "title": "A", "user_id": user_id
+    }).json()["upload_id"]
+    lock_path = os.path.join(upload_service.UPLOAD_DIR, upload_id, "lock")
+    holder = subprocess.Popen(
+        [sys.executable, "-c", "import fcntl, sys; f = open(sys.argv[1], 'a'); fcntl.flock(f, fcntl.LOCK_EX); "
+                               "print('held', flush=True); sys.stdin.read()", lock_path],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert holder.stdout.readline().strip() == "held"
+        assert put_chunk(client, upload_id, 0, b"scan").status_code == status.HTTP_409_CONFLICT
+    finally:
+        holder.communicate("")
+    assert put_chunk(client, upload_id, 0, b"scan").json()["offset"] == 4
+
+
+def test_resumable_upload_fails_when_saving_the_text_fails(client, fake_ocr, monkeypatch):
+    """Test a DB error after OCR marks the upload failed instead of leaving it processing"""
+    import app.routers.documents as documents_router
+
+    def broken_update(document_id, text):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(documents_router, "_set_content", broken_update)
+    user_id = client.post("/users/", json={"username": "dbfail", "email": "dbfail@example.com"}).json()["id"]
+    upload_id = client.post("/documents/uploads", json={
+        "filename": "a.png", "content_type": "image/png", "size": 4, "title": "A", "user_id": user_id
+    }).json()["upload_id"]
+    put_chunk(client, upload_id, 0, b"scan")
+
+    assert client.post(f"/documents/uploads/{upload_id}/complete").status_code == status.HTTP_202_ACCEPTED
+    upload = client.get(f"/documents/uploads/{upload_id}").json()
+    assert upload["status"] == "failed"
+    assert "database is locked" in upload["error"]
+
+
+def test_resumable_upload_rejects(client, fake_ocr):
+    """Test bad starts, oversized chunks, a wrong file checksum and unknown ids"""
+    from app.services import upload_service
+
+    user_id = client.post("/users/", json={"username": "rejects", "email": "rejects@example.com"}).json()["id"]
+    start = {"filename": "a.png", "content_type": "image/png", "size": 10, "title": "A", "user_id": user_id}
+    assert client.post("/documents/uploads", json={**start, "content_type": "text/plain"}).status_code == 400
+    assert client.post("/documents/uploads", json={**start, "doc_type": "novel"}).status_code == 400
+    assert client.post("/documents/uploads", json={**start, "user_id": 999}).status_code == 404
+    too_big = {**start, "size": upload_service.MAX_RESUMABLE_UPLOAD_BYTES + 1}
+    assert client.post("/documents/uploads", json=too_big).status_code == status.HTTP_413_CONTENT_TOO_LARGE
+
+    upload_id = client.post("/documents/uploads", json=start).json()["upload_id"]
+    assert put_chunk(client, upload_id, 0, b"x" * 11).status_code == status.HTTP_413_CONTENT_TOO_LARGE
+    assert put_chunk(client, upload_id, 0, b"x" * 10).json()["offset"] == 10
+    response = client.post(f"/documents/uploads/{upload_id}/complete", json={"sha256": "0" * 64})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get(f"/documents/uploads/{upload_id}").json()["status"] == "uploading"
+
+    assert client.get("/documents/uploads/" + "0" * 32).status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/documents/uploads/..%2F..%2Fetc").status_code == status.HTTP_404_NOT_FOUND
+
+
 # ========== ROOT ENDPOINT TEST ==========
 
 def test_root_endpoint(client):
@@ -303,3 +519,290 @@ def test_root_endpoint(client):
     assert response.status_code == status.HTTP_200_OK
     assert "message" in response.json()
     assert "Document Management API" in response.json()["message"]
+
+
+# ========== HEALTH, METRICS AND TRACING TESTS ==========
+
+def test_healthz(client):
+    """Test liveness answers without loading the embedding model"""
+    response = client.get("/healthz")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "ok"
+
+
+def test_readyz_before_warm_up(client, monkeypatch):
+    """Test readiness reports 503 until the vector service is loaded"""
+    import app.services.vector_service as vector_service
+
+    # an earlier test may have built the shared service
+    monkeypatch.setattr(vector_service, "_vector_service", None)
+    response = client.get("/readyz")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def test_readyz_after_failed_warm_up(client, monkeypatch, make_vector_service):
+    """Test readiness reports 503 with the error when warm-up failed"""
+    import app.main as main
+    import app.services.vector_service as vector_service
+
+    monkeypatch.setattr(vector_service, "_vector_service", make_vector_service())
+    monkeypatch.setattr(main, "get_agent_graph", lambda: 1 / 0)
+    monkeypatch.setattr(main, "_warm_up_state", dict(main._warm_up_state))
+    main.warm_up()
+
+    response = client.get("/readyz")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"status": "failed", "error": "division by zero"}
+
+
+def test_metrics(client):
+    """Test /metrics reports route latency by path template and DB query timings"""
+    user_id = client.post("/users/", json={"username": "metrics", "email": "metrics@example.com"}).json()["id"]
+    client.get(f"/users/{user_id}/documents")
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'route="/users/{user_id}/documents"' in body
+    assert 'db_query_seconds_count{operation="select"}' in body
+    assert 'pipeline_stage_seconds' in body
+
+
+def test_ask_is_traced(client, monkeypatch, make_vector_service, tmp_path):
+    """Test /ai/ask exports a span tree for the agent and returns its request id and timings"""
+    import json
+    import app.services.agent_service as agent_service
+    import app.tracing as tracing
+
+    class FakeLLM:
+        def invoke(self, prompt):
+            content = "search" if "routing agent" in prompt else "The total is 42."
+            return type("Message", (), {"content": content, "usage_metadata": {"input_tokens": 7, "output_tokens": 3}})
+
+    service = make_vector_service()
+    service.add_chunks([{'text': "invoice total 42", 'doc_id': 1, 'chunk_id': 0, 'user_id': 1}])
+    monkeypatch.setattr(agent_service, "get_llm", FakeLLM)
+    monkeypatch.setattr(agent_service, "get_vector_service", lambda: service)
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_PATH", str(tmp_path / "spans.jsonl"))
+    monkeypatch.setattr(tracing, "SERVER_TIMING", True)
+    monkeypatch.setattr(tracing, "_export_file", None)
+
+    response = client.post("/ai/ask", json={"query": "what is the invoice total?"}, headers={"X-Request-ID": "req-1"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["x-request-id"] == "req-1"
+    assert "llm.generate;dur=" in response.headers["server-timing"]
+
+    tracing._export_file.flush()
+    spans = {s["name"]: s for s in map(json.loads, open(tmp_path / "spans.jsonl"))}
+    assert {s["traceId"] for s in spans.values()} == {"req-1"}
+    assert spans["POST /ai/ask"]["parentSpanId"] is None
+    assert spans["agent.search_documents"]["parentSpanId"] == spans["agent.ask"]["spanId"]
+    assert spans["faiss.search"]["parentSpanId"] == spans["agent.search_documents"]["spanId"]
+    assert spans["llm.classify"]["attributes"]["output_tokens"] == 3
+
+
+# ========== KEYWORD SEARCH TESTS ==========
+
+def make_keyword_docs(client):
+    alice = client.post("/users/", json={"username": "alice", "email": "alice@example.com"}).json()["id"]
+    bob = client.post("/users/", json={"username": "bob", "email": "bob@example.com"}).json()["id"]
+    for user_id, title, content in (
+        (alice, "Invoice March", "invoice total due for consulting services"),
+        (alice, "Meeting notes", "discussed the invoice backlog briefly"),
+        (bob, "Invoice April", "invoice for hardware"),
+    ):
+        client.post("/documents/", json={"title": title, "content": content, "user_id": user_id})
+    return alice, bob
+
+
+def test_keyword_search(client):
+    """Test keyword search requires every word, prefix-matches the last, ranks titles first and scopes by user"""
+    alice, bob = make_keyword_docs(client)
+
+    response = client.get("/documents/search", params={"q": "invoice", "user_id": alice})
+    assert response.status_code == status.HTTP_200_OK
+    assert [r["title"] for r in response.json()["results"]] == ["Invoice March", "Meeting notes"]
+
+    response = client.get("/documents/search", params={"q": "invoice consult"})
+    assert [r["title"] for r in response.json()["results"]] == ["Invoice March"]
+    assert client.get("/documents/search", params={"q": "invo consulting"}).json()["total_results"] == 0
+
+    response = client.get("/documents/search", params={"q": "hardware", "user_id": alice})
+    assert response.json()["total_results"] == 0
+
+
+def test_keyword_search_index_follows_updates_and_deletes(client):
+    """Test the FTS index is kept in sync by the documents table triggers"""
+    from tests.conftest import TestingSessionLocal
+    from app import models
+
+    alice, _ = make_keyword_docs(client)
+    with TestingSessionLocal() as db:
+        doc = db.query(models.Document).filter(models.Document.title == "Meeting notes").one()
+        doc.content = "quarterly roadmap"
+        db.delete(db.query(models.Document).filter(models.Document.title == "Invoice April").one())
+        db.commit()
+
+    assert client.get("/documents/search", params={"q": "roadmap"}).json()["total_results"] == 1
+    assert [r["title"] for r in client.get("/documents/search", params={"q": "invoice"}).json()["results"]] \
+        == ["Invoice March"]
+
+
+def test_keyword_search_operators_are_plain_words(client):
+    """Test FTS syntax in the query can't break the statement"""
+    make_keyword_docs(client)
+    for q in ['"invoice', "invoice OR NOT", "*", "title:invoice)"]:
+        assert client.get("/documents/search", params={"q": q}).status_code == status.HTTP_200_OK
+
+
+# ========== SEARCH TESTS ==========
+
+def test_search_min_score_out_of_range(client):
+    """Test that min_score outside the cosine range [-1, 1] is rejected"""
+    response = client.post("/search", json={"query": "invoice", "min_score": 1.5})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_search_batch(client, monkeypatch, make_vector_service):
+    """Test batch search returns one response per query, each filtered by its own user"""
+    import app.routers.search as search_router
+    from app import schemas
+
+    owner_ids = []
+    for name in ("alice", "bob"):
+        user_id = client.post("/users/", json={"username": name, "email": f"{name}@example.com"}).json()["id"]
+        owner_ids.append(user_id)
+        client.post("/documents/", json={"title": f"{name} invoice", "content": "invoice total", "user_id": user_id})
+
+    service = make_vector_service()
+    service.add_chunks([
+        {'text': "invoice total amount", 'doc_id': doc_id, 'chunk_id': 0, 'user_id': user_id}
+        for doc_id, user_id in zip((1, 2), owner_ids)
+    ])
+    monkeypatch.setattr(search_router, "get_vector_service", lambda: service)
+
+    response = client.post("/search/batch", json={"queries": [
+        {"query": "invoice amount", "user_id": owner_ids[1]},
+        {"query": "invoice amount", "top_k": 1},
+        {"query": "unrelated words", "min_score": 0.9},
+    ]})
+    assert response.status_code == status.HTTP_200_OK
+    responses = schemas.BatchSearchResponse.model_validate(response.json()).model_dump()["responses"]
+    assert [r["title"] for r in responses[0]["results"]] == ["bob invoice"]
+    assert responses[1]["total_results"] == 1
+    assert responses[2]["results"] == []
+
+
+def test_search_batch_empty(client):
+    """Test a batch with no queries is rejected"""
+    response = client.post("/search/batch", json={"queries": []})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_index_documents(client, monkeypatch, make_vector_service):
+    """Test indexing fetches all docs, skips missing/empty ones and reports them"""
+    import app.routers.search as search_router
+
+    user_id = client.post("/users/", json={"username": "indexer", "email": "indexer@example.com"}).json()["id"]
+    doc_ids = [
+        client.post("/documents/", json={"title": title, "content": content, "user_id": user_id}).json()["id"]
+        for title, content in (("full", "quarterly revenue report"), ("empty", ""))
+    ]
+    service = make_vector_service()
+    monkeypatch.setattr(search_router, "get_vector_service", lambda: service)
+
+    response = client.post("/documents/index", json={"document_ids": doc_ids + [999]})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["indexed_count"] == 1
+    assert data["failed_ids"] == [doc_ids[1], 999]
+    assert data["partial_ids"] == []
+    assert service.search("revenue report")[0]['doc_id'] == doc_ids[0]
+
+
+def test_search_cache(client, monkeypatch, make_vector_service):
+    """Test identical searches are answered from the cache until documents are indexed"""
+    import app.routers.search as search_router
+
+    user_id = client.post("/users/", json={"username": "cached", "email": "cached@example.com"}).json()["id"]
+    doc_ids = [
+        client.post("/documents/", json={"title": title, "content": content, "user_id": user_id}).json()["id"]
+        for title, content in (("old", "revenue report"), ("new", "revenue forecast report"))
+    ]
+    service = make_vector_service()
+    monkeypatch.setattr(search_router, "get_vector_service", lambda: service)
+    client.post("/documents/index", json={"document_ids": doc_ids[:1]})
+
+    calls = []
+    search = service.search
+    monkeypatch.setattr(service, "search", lambda *args, **kwargs: calls.append(args) or search(*args, **kwargs))
+    query = {"query": "revenue report", "user_id": user_id}
+    first = client.post("/search", json=query).json()
+    assert client.post("/search", json=query).json() == first
+    assert len(calls) == 1
+    assert first["total_results"] == 1
+
+    client.post("/documents/index", json={"document_ids": doc_ids[1:]})
+    assert client.post("/search", json=query).json()["total_results"] == 2
+    assert len(calls) == 2
+
+
+# ========== ASYNC DATA LAYER TESTS ==========
+
+def test_async_user_and_document_routes(async_client):
+    """Test the async routes keep the sync routes' behaviour and errors"""
+    response = async_client.post("/users/", json={"username": "asyncuser", "email": "async@example.com"})
+    assert response.status_code == status.HTTP_201_CREATED
+    user_id = response.json()["id"]
+
+    duplicate = async_client.post("/users/", json={"username": "other", "email": "async@example.com"})
+    assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+    assert "email" in duplicate.json()["detail"].lower()
+
+    response = async_client.post("/documents/", json={"title": "Doc", "content": "text", "user_id": user_id})
+    assert response.status_code == status.HTTP_201_CREATED
+    missing_owner = async_client.post("/documents/", json={"title": "Doc", "content": "text", "user_id": 999})
+    assert missing_owner.status_code == status.HTTP_404_NOT_FOUND
+
+    response = async_client.get(f"/users/{user_id}/documents")
+    assert [d["title"] for d in response.json()] == ["Doc"]
+    response = async_client.get("/documents/search", params={"q": "text", "user_id": user_id})
+    assert [r["title"] for r in response.json()["results"]] == ["Doc"]
+    assert async_client.get("/users/999/documents").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_async_index_and_search(async_client, monkeypatch, make_vector_service):
+    """Test async indexing and search attach titles from the async session"""
+    import app.routers.search as search_router
+
+    user_id = async_client.post("/users/", json={"username": "asearch", "email": "asearch@example.com"}).json()["id"]
+    doc_id = async_client.post(
+        "/documents/", json={"title": "revenue", "content": "quarterly revenue report", "user_id": user_id}
+    ).json()["id"]
+    service = make_vector_service()
+    monkeypatch.setattr(search_router, "get_vector_service", lambda: service)
+
+    response = async_client.post("/documents/index", json={"document_ids": [doc_id, 999]})
+    assert response.json()["indexed_count"] == 1
+    assert response.json()["failed_ids"] == [999]
+
+    response = async_client.post("/search", json={"query": "revenue report", "user_id": user_id})
+    assert response.json()["results"][0]["title"] == "revenue"
+    response = async_client.post("/search/batch", json={"queries": [{"query": "revenue"}, {"query": "x", "user_id": 999}]})
+    assert [r["total_results"] for r in response.json()["responses"]] == [1, 0]
+
+
+def test_async_resumable_upload(async_client, fake_ocr):
+    """Test the async completion OCRs the upload on the async engine"""
+    user_id = async_client.post("/users/", json={"username": "aupload", "email": "aupload@example.com"}).json()["id"]
+    data = b"async scan text"
+    upload_id = async_client.post("/documents/uploads", json={
+        "filename": "scan.png", "content_type": "image/png", "size": len(data), "title": "Scan", "user_id": user_id
+    }).json()["upload_id"]
+    put_chunk(async_client, upload_id, 0, data)
+
+    response = async_client.post(f"/documents/uploads/{upload_id}/complete")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert async_client.get(f"/documents/uploads/{upload_id}").json()["status"] == "done"
+    assert [d["content"] for d in async_client.get(f"/users/{user_id}/documents").json()] == [data.decode()]
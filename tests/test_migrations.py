@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from app import models
+from app.database import Base
+from app.migrations import run_migrations
+
+
+def test_add_search_indexes_backfills_existing_rows(tmp_path):
+    """Test a database created before the search indexes gets them, with old rows searchable, and the version column"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # back to the old schema: no FTS table or triggers, no composite index
+        for trigger in ("insert", "update", "delete"):
+            conn.execute(text(f"DROP TRIGGER documents_fts_{trigger}"))
+        conn.execute(text("DROP TABLE documents_fts"))
+        conn.execute(text("DROP INDEX ix_documents_user_created"))
+        conn.execute(text("ALTER TABLE users DROP COLUMN documents_version"))
+        conn.execute(text("INSERT INTO users (id, username, email) VALUES (1, 'old', 'old@example.com')"))
+        conn.execute(text("INSERT INTO documents (title, content, user_id) VALUES ('lease', 'rental agreement', 1)"))
+
+    run_migrations(engine)
+    run_migrations(engine)  # idempotent
+
+    with engine.connect() as conn:
+        assert "ix_documents_user_created" in {i["name"] for i in inspect(conn).get_indexes("documents")}
+        assert conn.execute(text("SELECT documents_version FROM users")).scalar() == 0
+        found = conn.execute(text("SELECT rowid FROM documents_fts WHERE documents_fts MATCH 'agreement'")).all()
+        assert len(found) == 1
+    engine.dispose()
+
+
+def test_compress_document_content_migrates_text_rows(tmp_path):
+    """Test rows stored as plain text get compressed, stay readable and stay searchable"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # back to the previous schema: text content, external-content FTS table
+        for trigger in ("insert", "update", "delete"):
+            conn.execute(text(f"DROP TRIGGER documents_fts_{trigger}"))
+        conn.execute(text("DROP TABLE documents_fts"))
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE documents_fts USING fts5("
+            "title, content, content='documents', content_rowid='id', tokenize='unicode61')"
+        ))
+        conn.execute(text("INSERT INTO users (id, username, email) VALUES (1, 'old', 'old@example.com')"))
+        conn.execute(text("INSERT INTO documents (title, content, user_id) VALUES ('lease', 'rental agreement', 1)"))
+
+    run_migrations(engine)
+    run_migrations(engine)  # idempotent
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT typeof(content) FROM documents")).scalar() == "blob"
+        assert conn.execute(text("SELECT uncompress(content) FROM documents")).scalar() == "rental agreement"
+        found = conn.execute(text("SELECT rowid FROM documents_fts WHERE documents_fts MATCH 'agreement'")).all()
+        assert len(found) == 1
+    with Session(engine) as db:
+        doc = db.query(models.Document).one()
+        assert doc.content == "rental agreement"
+        doc.content = "updated terms"
+        db.commit()
+        db.delete(doc)
+        db.commit()
+    with engine.connect() as conn:
+        # the contentless index needs the exact old values to delete a row
+        leftover = conn.execute(text("SELECT rowid FROM documents_fts WHERE documents_fts MATCH 'agreement OR terms'"))
+        assert leftover.all() == []
+    engine.dispose()
@@ -0,0 +1,171 @@
+import sys
+import threading
+import types
+import pytest
+from PIL import Image
+from app.services import ocr_backends
+from app.services.ocr_backends import (
+    SubprocessBackend, TesserocrBackend, create_ocr_backend, encode_page, parse_config
+)
+
+# stands in for tesseract: reports its arguments and the page it got on stdin
+FAKE_TESSERACT = '''
+import sys
+page = sys.stdin.buffer.read()
+if "--fail" in sys.argv:
+    sys.exit("Error opening data file")
+print(" ".join(sys.argv[1:]), page[:2].decode(), len(page))
+'''
+
+
+@pytest.fixture
+def fake_tesseract(tmp_path):
+    script = tmp_path / "tesseract"
+    script.write_text(f"#!{sys.executable}\n{FAKE_TESSERACT}")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_subprocess_backend_pipes_pages_in_memory(fake_tesseract):
+    """Test the page goes in on stdin (as PGM) and the text comes back on stdout, options passed through"""
+    backend = SubprocessBackend(fake_tesseract, workers=2)
+    page = Image.new("L", (40, 30), 255)
+    text = backend.image_to_string(page, lang="eng+deu", config="--oem 1 --psm 4 -c load_system_dawg=0")
+    assert text.split() == [
+        "stdin", "stdout", "-l", "eng+deu", "--oem", "1", "--psm", "4", "-c", "load_system_dawg=0",
+        "P5", str(len(encode_page(page))),
+    ]
+
+
+def test_subprocess_backend_errors(fake_tesseract):
+    """Test a failing tesseract raises with its message"""
+    with pytest.raises(RuntimeError, match="Error opening data file"):
+        SubprocessBackend(fake_tesseract).image_to_string(Image.new("1", (8, 8)), lang="xyz", config="--fail")
+
+
+class FakeTessBaseAPI:
+    """Stands in for tesserocr.PyTessBaseAPI: records how engines were built, "reads" the image size"""
+
+    created = []
+    fail_next = False
+
+    def __init__(self, **kwargs):
+        if FakeTessBaseAPI.fail_next:
+            FakeTessBaseAPI.fail_next = False
+            raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+        FakeTessBaseAPI.created.append(kwargs)
+        self.image = None
+
+    def SetImage(self, image):
+        self.image = image
+
+    def GetUTF8Text(self):
+        return f"{self.image.width}x{self.image.height}"
+
+    def Clear(self):
+        self.image = None
+
+
+@pytest.fixture
+def fake_tesserocr(monkeypatch):
+    monkeypatch.setenv("OMP_THREAD_LIMIT", "1")
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=FakeTessBaseAPI))
+    FakeTessBaseAPI.created, FakeTessBaseAPI.fail_next = [], False
+    return FakeTessBaseAPI
+
+
+def test_tesserocr_backend_pools_engines(fake_tesserocr):
+    """Test engines are built once per (lang, config) up to workers and reused for every page"""
+    backend = TesserocrBackend(workers=2, tessdata="/usr/share/tessdata/")
+    pages = [Image.new("L", (10 + i, 5), 255) for i in range(40)]
+
+    def read(page):
+        return backend.image_to_string(page, lang="eng", config="--oem 1 --psm 6 -c load_system_dawg=0")
+
+    threads = [threading.Thread(target=read, args=(page,)) for page in pages]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert read(pages[3]) == "13x5"
+    assert 1 <= len(fake_tesserocr.created) <= 2
+    assert fake_tesserocr.created[0] == {
+        "lang": "eng", "oem": 1, "psm": 6, "variables": {"load_system_dawg": "0"}, "path": "/usr/share/tessdata/"
+    }
+
+    backend.image_to_string(pages[0], lang="deu", config="")
+    assert fake_tesserocr.created[-1]["lang"] == "deu"
+
+
+def test_tesserocr_backend_failed_engine_frees_its_slot(fake_tesserocr):
+    """Test an engine that fails to load doesn't use up the pool"""
+    backend = TesserocrBackend(workers=1)
+    fake_tesserocr.fail_next = True
+    with pytest.raises(RuntimeError, match="invalid tessdata"):
+        backend.image_to_string(Image.new("L", (8, 8)), lang="eng", config="")
+    assert backend.image_to_string(Image.new("L", (8, 8)), lang="eng", config="") == "8x8"
+
+
+def test_tesserocr_backend_times_out_waiting_for_an_engine(fake_tesserocr, monkeypatch):
+    """Test a page that can't get an engine in OCR_TIMEOUT raises TimeoutError, like a slow tesseract"""
+    monkeypatch.setattr(ocr_backends, "OCR_TIMEOUT", 0.05)
+    backend = TesserocrBackend(workers=1)
+    busy = backend._engine(("eng", ""))  # the only engine, held by another page
+    with pytest.raises(TimeoutError, match="no OCR engine free"):
+        backend.image_to_string(Image.new("L", (8, 8)), lang="eng", config="")
+    backend._pools[("eng", "")].put(busy)
+    assert backend.image_to_string(Image.new("L", (8, 8)), lang="eng", config="") == "8x8"
+
+
+def test_tesserocr_backend_falls_back_to_subprocess(monkeypatch, fake_tesseract):
+    """Test the default backend runs tesseract processes when tesserocr isn't installed"""
+    monkeypatch.setitem(sys.modules, "tesserocr", None)  # import fails
+    backend = create_ocr_backend("tesserocr", tesseract_cmd=fake_tesseract)
+    assert isinstance(backend, SubprocessBackend)
+
+
+def test_incomplete_backend_fails_when_created():
+    """Test a backend without image_to_string is rejected up front"""
+    from app.services.ocr_backends import OCRBackend
+
+    class NoOCR(OCRBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        NoOCR()
+
+
+def test_parse_config():
+    """Test the command line config maps to tesserocr's init arguments"""
+    assert parse_config("--oem 1 --psm 11 -c load_system_dawg=0 -c load_freq_dawg=0") == (
+        1, 11, {"load_system_dawg": "0", "load_freq_dawg": "0"}
+    )
+    assert parse_config("") == (3, 3, {})
+
+
+def test_create_ocr_backend():
+    """Test backends are looked up by name"""
+    assert create_ocr_backend("subprocess", tesseract_cmd="/usr/bin/tesseract").tesseract_cmd == "/usr/bin/tesseract"
+    with pytest.raises(ValueError, match="Unknown OCR_BACKEND"):
+        create_ocr_backend("cuneiform")
+
+
+def test_ocr_service_reads_pages_through_the_backend(monkeypatch):
+    """Test process_image hands the preprocessed page and the doc type's settings to the backend"""
+    import io
+    from app.services import ocr_service
+    from app.services.ocr_backends import OCRBackend
+
+    class Recorder(OCRBackend):
+        def image_to_string(self, image, lang, config):
+            self.call = (image.mode, lang, config)
+            return "  TOTAL 12.50\n\f"
+
+    backend = Recorder()
+    monkeypatch.setattr(ocr_service, "_backend", backend)
+    png = io.BytesIO()
+    Image.new("RGB", (300, 200), "white").save(png, format="PNG")
+
+    assert ocr_service.process_image(png.getvalue(), "receipt") == "TOTAL 12.50"
+    mode, lang, config = backend.call
+    assert mode == "L" and "--psm 4" in config
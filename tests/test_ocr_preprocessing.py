@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+from app.services import ocr_preprocessing
+from app.services.ocr_preprocessing import deskew_angle, effective_dpi, otsu_threshold, preprocess, text_dpi
+
+
+def text_page(size=(1240, 1754), paper=230, ink=40):
+    """A4 at 150 dpi: lines of text, gray paper"""
+    page = Image.new("L", size, paper)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=size[0] // 50)
+    for i in range(30):
+        draw.text((size[0] // 12, size[1] // 12 + i * size[0] // 30), f"Line {i}: total due 1,250.00 EUR", fill=ink, font=font)
+    return page
+
+
+def test_otsu_threshold_splits_ink_from_paper():
+    """Test the threshold falls between the two gray levels"""
+    gray = np.asarray(text_page(paper=200, ink=60))
+    assert 60 <= otsu_threshold(gray) < 200
+    assert otsu_threshold(np.full((10, 10), 255, dtype=np.uint8)) == 127  # blank page
+
+
+@pytest.mark.parametrize("skew", [0.0, 2.5, -4.0])
+def test_deskew_angle_undoes_rotation(skew):
+    """Test the projection profile finds the rotation back to level lines"""
+    page = text_page().rotate(skew, resample=Image.BICUBIC, expand=True, fillcolor=230)
+    assert deskew_angle(page, otsu_threshold(np.asarray(page))) == pytest.approx(-skew, abs=0.3)
+
+
+def test_preprocess_downscales_binarizes_and_straightens():
+    """Test a 600 dpi color photo comes out black and white, at the target DPI, with level lines"""
+    page = text_page(size=(4960, 7016)).rotate(3, resample=Image.BICUBIC, fillcolor=230).convert("RGB")
+    page.info["dpi"] = (600, 600)
+    assert effective_dpi(page) == 600
+
+    out = preprocess(page)
+    assert out.mode == "L"
+    assert set(np.unique(np.asarray(out))) <= {0, 255}
+    assert out.width < page.width * 0.6  # ~300 dpi (plus the deskew's expanded canvas)
+    assert abs(deskew_angle(out, 127)) <= 0.3
+
+
+def test_photo_dpi_is_estimated_from_its_text():
+    """Test photos without DPI are sized by their text lines, not their frame: a long receipt is no A4 page"""
+    page = text_page()
+    assert effective_dpi(page) is None
+    assert text_dpi(page) == pytest.approx(150, rel=0.3)
+    assert text_dpi(text_page(size=(1240, 5000))) == pytest.approx(text_dpi(page), rel=0.05)
+
+    blank = Image.new("L", (3000, 4000), 230)  # no text to measure: left at full size
+    assert text_dpi(blank) is None
+    assert preprocess(blank).size == blank.size
+
+
+def test_receipts_are_binarized_with_a_local_threshold():
+    """Test a page lit unevenly keeps its text in the shadow with a local threshold, not with Otsu's"""
+    pixels = np.asarray(text_page(), dtype=np.float32) * np.linspace(1, 0.3, 1240, dtype=np.float32)
+    page = Image.fromarray(pixels.astype(np.uint8))
+
+    def ink_in_shadow(doc_type):
+        out = np.asarray(preprocess(page, dpi=150, doc_type=doc_type))
+        return (out[:, 620:] == 0).mean()
+
+    assert ink_in_shadow("document") > 0.5  # global threshold: the dark half turns black
+    assert ink_in_shadow("receipt") < 0.1
+    assert ink_in_shadow("photo") < 0.1
+
+
+def test_preprocess_can_be_disabled(monkeypatch):
+    """Test OCR_PREPROCESS=0 hands the image to Tesseract untouched"""
+    page = text_page()
+    monkeypatch.setattr(ocr_preprocessing, "OCR_PREPROCESS", False)
+    assert preprocess(page) is page
+
+
+def test_tesseract_args_per_doc_type():
+    """Test each document type selects its page segmentation mode, receipts without dictionaries"""
+    assert "--psm 3" in ocr_preprocessing.tesseract_args("document")["config"]
+    assert "load_system_dawg=0" in ocr_preprocessing.tesseract_args("receipt")["config"]
+    assert ocr_preprocessing.tesseract_args("form")["lang"] == ocr_preprocessing.OCR_LANG
@@ -0,0 +1,86 @@
+import json
+import threading
+import app.tracing as tracing
+from fastapi.testclient import TestClient
+from app.services import search_server
+from app.services.search_server import SearchBatcher
+from app.services.vector_client import RemoteVectorService
+
+
+def test_batcher_groups_concurrent_searches():
+    """Test that searches arriving together are run as one batch, in order"""
+    batch_sizes = []
+    release = threading.Event()
+
+    def search_batch(requests):
+        release.wait(timeout=5)  # hold the first batch so the rest queue up
+        batch_sizes.append(len(requests))
+        return [[{"query": r["query"]}] for r in requests]
+
+    batcher = SearchBatcher(search_batch, max_batch_size=16, max_wait_ms=50)
+    futures = [batcher.submit({"query": f"q{i}"}) for i in range(10)]
+    release.set()
+    results = [f.result(timeout=5) for f in futures]
+    batcher.close()
+
+    assert results == [[{"query": f"q{i}"}] for i in range(10)]
+    assert sum(batch_sizes) == 10
+    assert len(batch_sizes) < 10
+
+
+def test_batcher_propagates_errors():
+    """Test that a failing batch fails every request in it"""
+    def search_batch(requests):
+        raise RuntimeError("index unavailable")
+
+    batcher = SearchBatcher(search_batch, max_wait_ms=1)
+    future = batcher.submit({"query": "q"})
+    try:
+        future.result(timeout=5)
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert "index unavailable" in str(e)
+    finally:
+        batcher.close()
+
+
+def test_batcher_runs_under_the_submitting_trace():
+    """Test that the batch thread's spans land in the submitting request's trace"""
+    seen = []
+
+    def search_batch(requests):
+        seen.append(tracing.current_request_id())
+        return [[] for _ in requests]
+
+    batcher = SearchBatcher(search_batch, max_wait_ms=1)
+    token = tracing._trace.set(tracing.Trace("req-9"))
+    try:
+        batcher.submit({"query": "q"}).result(timeout=5)
+    finally:
+        tracing._trace.reset(token)
+        batcher.close()
+
+    assert seen == ["req-9"]
+
+
+def test_remote_search_is_traced_under_the_callers_request_id(monkeypatch, make_vector_service, tmp_path):
+    """Test that the client sends its request id and the server traces under it"""
+    service = make_vector_service()
+    service.add_chunks([{'text': "invoice total 42", 'doc_id': 1, 'chunk_id': 0, 'user_id': 1}])
+    monkeypatch.setattr(search_server, "get_local_vector_service", lambda: service)
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_PATH", str(tmp_path / "spans.jsonl"))
+    monkeypatch.setattr(tracing, "_export_file", None)
+
+    remote = RemoteVectorService()
+    remote.client = TestClient(search_server.app)
+    token = tracing._trace.set(tracing.Trace("req-7"))
+    try:
+        results = remote.search_batch([{"query": "invoice total", "top_k": 1, "user_id": 1}])
+    finally:
+        tracing._trace.reset(token)
+
+    assert results[0][0]["doc_id"] == 1
+    tracing._export_file.flush()
+    spans = {s["name"]: s for s in map(json.loads, open(tmp_path / "spans.jsonl"))}
+    assert spans["POST /search/batch"]["traceId"] == "req-7"
+    assert spans["faiss.search"]["traceId"] == "req-7"
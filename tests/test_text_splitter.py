@@ -0,0 +1,113 @@
+import random
+import re
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.services.chunking_service import ChunkingService
+from app.services.text_splitter import TextSplitter
+
+# pieces that hit every separator level, repeated separators and long words
+TOKENS = ["a", "word", "longerword", "x" * 37, ". ", ".", "\n", "\n\n", "\n\n\n", " ", "  ", "\t", "é", "中文"]
+
+
+def random_texts(count, seed=0, max_tokens=400):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield rng, "".join(rng.choice(TOKENS) for _ in range(rng.randint(0, max_tokens)))
+
+
+@pytest.mark.parametrize("separators", [None, ["\n", " "], [" "]])
+def test_compat_mode_matches_langchain(separators):
+    """Test compat mode reproduces RecursiveCharacterTextSplitter.split_text exactly"""
+    for rng, text in random_texts(300, seed=len(separators or [])):
+        chunk_size = rng.choice([10, 30, 100])
+        overlap = rng.randint(0, chunk_size // 2)
+        langchain = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=overlap,
+            separators=separators or ["\n\n", "\n", ". ", " ", ""], length_function=len
+        )
+        splitter = TextSplitter(chunk_size, overlap, separators, mode="compat")
+        assert splitter.split_text(text) == langchain.split_text(text)
+
+
+@pytest.mark.parametrize("mode", ["native", "compat"])
+def test_split_spans_on_a_range_equals_splitting_the_slice(mode):
+    """Test offsets into a range match splitting the sliced string"""
+    splitter = TextSplitter(30, 5, mode=mode)
+    for rng, text in random_texts(200, seed=1):
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, len(text))
+        spans = splitter.split_spans(text, start, end)
+        assert [text[a:b] for a, b in spans] == splitter.split_text(text[start:end])
+
+
+def test_native_mode_chunks_are_bounded_and_cover_the_text():
+    """Test native chunks fit chunk_size, are stripped, in order, and miss no text"""
+    for rng, text in random_texts(300, seed=2):
+        chunk_size = rng.choice([10, 30, 100])
+        spans = TextSplitter(chunk_size, rng.randint(0, chunk_size // 2)).split_spans(text)
+
+        covered = [False] * len(text)
+        previous_start = -1
+        for start, end in spans:
+            assert 0 < end - start <= chunk_size
+            assert start > previous_start
+            assert text[start:end] == text[start:end].strip()
+            previous_start = start
+            covered[start:end] = [True] * (end - start)
+        assert all(covered[i] for i, ch in enumerate(text) if not ch.isspace())
+
+
+def test_native_chunking_does_not_depend_on_windows():
+    """Test windowed iter_spans gives the same chunks as one pass over the text"""
+    chunker = ChunkingService(chunk_size=50, overlap=10, mode="native")
+    _, text = next(random_texts(1, seed=3, max_tokens=20_000))
+    assert list(chunker.iter_spans(text)) == chunker.splitter.split_spans(text)
+
+
+def test_compat_chunking_matches_langchain_on_long_documents():
+    """Test compat chunks of a document spanning many windows are LangChain's, chunk for chunk"""
+    chunker = ChunkingService(chunk_size=50, overlap=10, mode="compat")
+    _, text = next(random_texts(1, seed=5, max_tokens=20_000))
+    assert len(text) > 3 * chunker.window_size
+    langchain = RecursiveCharacterTextSplitter(
+        chunk_size=50, chunk_overlap=10, separators=["\n\n", "\n", ". ", " ", ""], length_function=len
+    )
+    assert [c['text'] for c in chunker.iter_chunks(text, doc_id=1, user_id=1)] == langchain.split_text(text)
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        TextSplitter(100, 10, mode="fast")
+
+
+class WordPieceLikeTokenizer:
+    """Words and punctuation as tokens, with the HF fast-tokenizer call interface"""
+
+    def __call__(self, text, **kwargs):
+        return {"offset_mapping": [m.span() for m in re.finditer(r"\w+|[^\w\s]", text)]}
+
+
+def count_tokens(text):
+    return len(WordPieceLikeTokenizer()(text)["offset_mapping"])
+
+
+def test_token_mode_chunks_fit_token_budget():
+    """Test token-length chunks never exceed chunk_size tokens and miss no text"""
+    splitter = TextSplitter(20, 4, tokenizer=WordPieceLikeTokenizer())
+    for rng, text in random_texts(200, seed=4):
+        spans = splitter.split_spans(text)
+        covered = [False] * len(text)
+        for start, end in spans:
+            assert 0 < count_tokens(text[start:end]) <= 20
+            covered[start:end] = [True] * (end - start)
+        assert all(covered[i] for i, ch in enumerate(text) if not ch.isspace())
+
+
+def test_token_mode_counts_tokens_not_characters():
+    """Test long words make shorter chunks in characters but the same in tokens"""
+    chunker = ChunkingService(chunk_size=10, overlap=0, tokenizer=WordPieceLikeTokenizer())
+    chunks = chunker.chunk_text(" ".join(["internationalization"] * 30), doc_id=1, user_id=1)
+    assert [count_tokens(c['text']) for c in chunks] == [10, 10, 10]
+
+    with pytest.raises(ValueError):
+        TextSplitter(10, 0, mode="compat", tokenizer=WordPieceLikeTokenizer())
@@ -0,0 +1,174 @@
+import faiss
+import pytest
+
+
+def make_chunks(texts, doc_id=1, user_id=1):
+    return [
+        {'text': text, 'doc_id': doc_id, 'chunk_id': i, 'user_id': user_id}
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_search_returns_cosine_scores(make_vector_service):
+    """Test best match first with a similarity in [-1, 1], and min_score cutoff"""
+    service = make_vector_service()
+    service.add_chunks(make_chunks(["invoice total amount", "meeting notes summary"]))
+
+    results = service.search("invoice amount", top_k=2)
+    assert results[0]['chunk_id'] == 0
+    assert -1.0 <= results[-1]['similarity_score'] <= results[0]['similarity_score'] <= 1.0
+
+    assert service.search("invoice amount", top_k=2, min_score=0.99) == []
+
+
+def test_index_persists_across_instances(make_vector_service):
+    """Test a second instance on the same data dir loads saved chunks"""
+    make_vector_service().add_chunks(make_chunks(["contract termination clause"]))
+    reloaded = make_vector_service()
+    assert reloaded.search("termination clause")[0]['text'] == "contract termination clause"
+
+
+def test_compressed_index_keeps_full_precision_vectors(make_vector_service):
+    """Test fp16 stores vectors on disk and still finds exact matches"""
+    service = make_vector_service(index_type="fp16")
+    texts = [f"report number {i} section {i % 7}" for i in range(50)]
+    service.add_chunks(make_chunks(texts))
+
+    assert len(service.vectors) == 50
+    assert service.search(texts[13], top_k=1)[0]['chunk_id'] == 13
+
+
+def test_trained_index_reranks_from_full_precision_vectors(make_vector_service, monkeypatch):
+    """Test PQ trains once train_size vectors exist and re-ranking scores the top hits exactly"""
+    import app.services.vector_service as vector_service
+
+    monkeypatch.setattr(vector_service, "PQ_M", 4)  # coarse codes: PQ scores alone miss exact hits
+    service = make_vector_service(index_type="pq", rerank_factor=4, train_size=300)
+    texts = [f"report number {i} section {i % 7}" for i in range(300)]
+    chunks = make_chunks(texts)
+    service.add_chunks(chunks[:299])
+    assert not service.index.is_trained
+
+    service.add_chunks(chunks[299:])
+    assert service.index.is_trained
+    assert service.index.ntotal == 300
+
+    assert service.search(texts[13], top_k=1)[0]['chunk_id'] == 13
+    # every text is its own best match, cosine 1 (or ties with an identical hash vector)
+    for text in texts:
+        assert service.search(text, top_k=1)[0]['similarity_score'] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_mmap_index_serves_reads_and_accepts_writes(make_vector_service):
+    """Test a memory-mapped index searches, then copies itself on first write"""
+    make_vector_service().add_chunks(make_chunks(["delivery address warehouse"]))
+
+    mapped = make_vector_service(mmap=True)
+    assert mapped.search("warehouse address")[0]['doc_id'] == 1
+
+    mapped.add_chunks(make_chunks(["payment due date"], doc_id=2))
+    assert mapped.search("payment due")[0]['doc_id'] == 2
+    assert make_vector_service(mmap=True).search("payment due")[0]['doc_id'] == 2
+
+
+def test_legacy_json_metadata_is_migrated(tmp_path, make_vector_service):
+    """Test an old IndexFlatL2 + chunk_metadata.json pair still loads and scores"""
+    import json
+    import faiss
+    from tests.conftest import HashingEmbedder
+
+    texts = ["tax identification number", "warranty period"]
+    index = faiss.IndexFlatL2(HashingEmbedder.dimension)
+    index.add(HashingEmbedder().encode(texts))
+    faiss.write_index(index, str(tmp_path / "faiss_index.bin"))
+    with open(tmp_path / "chunk_metadata.json", "w", encoding="utf-8") as f:
+        json.dump([{'doc_id': 7, 'chunk_id': i, 'user_id': None, 'text': t} for i, t in enumerate(texts)], f)
+
+    results = make_vector_service().search("warranty period", top_k=1)
+    assert results[0]['text'] == "warranty period"
+    assert results[0]['similarity_score'] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_concurrent_index_and_search_stay_consistent(make_vector_service):
+    """Test searches running during concurrent adds only see complete, matching chunks"""
+    import threading
+
+    service = make_vector_service()
+    errors = []
+    writers_done = threading.Event()
+
+    def writer(doc_id):
+        try:
+            for batch in range(10):
+                texts = [f"doc{doc_id} part{batch} chunk{i} shared words" for i in range(5)]
+                service.add_chunks(make_chunks(texts, doc_id=doc_id))
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            while not writers_done.is_set():
+                for r in service.search("shared words chunk1", top_k=10):
+                    # every hit's text must belong to the (doc, chunk) it came back as
+                    assert r['text'].startswith(f"doc{r['doc_id']} ")
+                    assert f"chunk{r['chunk_id']} " in r['text']
+        except Exception as e:
+            errors.append(e)
+
+    writers = [threading.Thread(target=writer, args=(d,)) for d in range(4)]
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for t in writers + readers:
+        t.start()
+    for t in writers:
+        t.join()
+    writers_done.set()
+    for t in readers:
+        t.join()
+
+    assert errors == []
+    assert len(service.chunk_metadata) == service.index.ntotal == 4 * 10 * 5
+    reloaded = make_vector_service()
+    assert len(reloaded.chunk_metadata) == reloaded.index.ntotal == 200
+
+
+def test_save_writes_the_file_outside_the_lock(make_vector_service):
+    """Test adds and searches don't wait while a save is writing the index file"""
+    import threading
+
+    service = make_vector_service()
+    service.add_chunks(make_chunks(["quarterly revenue report"]), save=False)
+    writing, release = threading.Event(), threading.Event()
+    save_index = service._save_index
+
+    def slow_save_index(data):
+        writing.set()
+        release.wait(10)
+        save_index(data)
+
+    service._save_index = slow_save_index
+    saver = threading.Thread(target=service.save)
+    saver.start()
+    assert writing.wait(10)
+
+    # the disk write is stuck: an add and a search still go through
+    service.add_chunks(make_chunks(["annual budget forecast"], doc_id=2), save=False)
+    assert service.search("budget forecast", top_k=1)[0]['doc_id'] == 2
+
+    release.set()
+    saver.join()
+    assert faiss.read_index(service.index_path).ntotal == 1  # the snapshot from before the add
+    service.save()
+    assert make_vector_service().index.ntotal == 2
+
+
+def test_processes_sharing_a_data_dir_write_one_at_a_time(make_vector_service):
+    """Test two services on one data dir (like API workers) keep index and metadata in step"""
+    alpha, beta = make_vector_service(), make_vector_service()
+    alpha.add_chunks(make_chunks(["alpha invoice text"], doc_id=1, user_id=1))
+    beta.add_chunks(make_chunks(["beta contract"], doc_id=2, user_id=2))
+
+    reloaded = make_vector_service()
+    assert len(reloaded.chunk_metadata) == reloaded.index.ntotal == 2
+    top = reloaded.search("beta contract", top_k=1)[0]
+    assert (top['doc_id'], top['text']) == (2, "beta contract")
+    assert reloaded.search("alpha invoice text", top_k=1)[0]['doc_id'] == 1
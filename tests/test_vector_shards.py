@@ -0,0 +1,61 @@
+import os
+from app.services.vector_shards import ShardedVectorService
+from tests.conftest import HashingEmbedder
+from tests.test_vector_service import make_chunks
+
+
+def make_sharded(tmp_path, mode="user", **kwargs):
+    return ShardedVectorService(mode=mode, embedder=HashingEmbedder(), data_dir=str(tmp_path), **kwargs)
+
+
+def test_user_search_only_touches_own_shard(tmp_path):
+    """Test chunks land in per-user shards and a user's search only loads theirs"""
+    make_sharded(tmp_path).add_chunks(
+        make_chunks(["invoice total amount"], user_id=1) + make_chunks(["invoice total amount"], doc_id=2, user_id=2)
+    )
+    assert sorted(os.listdir(tmp_path / "shards")) == ["user_1", "user_2"]
+
+    service = make_sharded(tmp_path)
+    results = service.search("invoice amount", user_id=2)
+    assert [r['doc_id'] for r in results] == [2]
+    assert service.loaded_shards() == ["user_2"]
+    assert service.search("invoice amount", user_id=3) == []
+
+
+def test_cross_user_search_merges_shards(tmp_path):
+    """Test a search without user_id fans out and returns the global top_k by score"""
+    service = make_sharded(tmp_path, mode="4")
+    service.add_chunks(
+        make_chunks(["payment due date"], doc_id=1, user_id=1)
+        + make_chunks(["payment schedule"], doc_id=2, user_id=2)
+        + make_chunks(["meeting notes"], doc_id=3, user_id=3)
+    )
+
+    results = service.search("payment due date", top_k=2)
+    assert [r['doc_id'] for r in results] == [1, 2]
+    assert results[0]['similarity_score'] >= results[1]['similarity_score']
+
+
+def test_lru_eviction_reloads_from_disk(tmp_path):
+    """Test only max_loaded shards stay in memory and evicted ones reload"""
+    service = make_sharded(tmp_path, max_loaded=2)
+    for user_id in (1, 2, 3):
+        service.add_chunks(make_chunks([f"warranty clause {user_id}"], doc_id=user_id, user_id=user_id))
+    assert service.loaded_shards() == ["user_2", "user_3"]
+
+    assert service.search("warranty clause", user_id=1)[0]['doc_id'] == 1
+    assert service.loaded_shards() == ["user_3", "user_1"]
+
+
+def test_memory_budget_eviction_with_hnsw_shards(tmp_path):
+    """Test the memory budget sizes HNSW shards (codes plus graph) and evicts by it"""
+    service = make_sharded(tmp_path, index_type="hnsw", memory_budget_mb=0.04)  # one shard of 40 chunks
+    for user_id in (1, 2, 3):
+        texts = [f"warranty clause {user_id} item {i}" for i in range(40)]
+        service.add_chunks(make_chunks(texts, doc_id=user_id, user_id=user_id))
+    shard = service._shard("user_3")
+    assert shard.index_bytes() > shard.index.ntotal * shard.dimension * 4  # graph counted
+    assert service.loaded_shards() == ["user_3"]
+
+    assert service.search("warranty clause", user_id=1)[0]['doc_id'] == 1
+    assert service.loaded_shards() == ["user_1"]
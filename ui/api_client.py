@@ -0,0 +1,176 @@
+"""
+API calls shared by the tabs.
+
+One requests.Session for the whole Streamlit server (st.cache_resource):
+its connection pool keeps connections to the API open across reruns and
+users, instead of a new TCP connection per call. Idempotent GETs are
+retried on connection errors and 502/503/504; every call has a timeout.
+
+Files go up through the resumable upload API in chunks (upload()), so a
+dropped connection costs one chunk, not the whole file.
+"""
+import hashlib
+import time
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import (
+    API_BASE_URL, API_TIMEOUT, API_LONG_TIMEOUT, API_POOL_SIZE, HEALTH_CHECK_TTL, UPLOAD_RETRIES, UPLOAD_POLL_INTERVAL
+)
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    session = requests.Session()
+    retries = Retry(
+        total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),  # POSTs (create, upload) aren't safe to repeat
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get(path: str, fresh_for: float = 0, timeout=API_TIMEOUT) -> requests.Response:
+    """
+    GET an API path, reusing the last response for it.
+
+    Within fresh_for seconds of fetching it, the stored response is returned
+    without a request (call invalidate() after changing the data). After
+    that it is revalidated: the stored ETag goes back as If-None-Match and
+    an unchanged resource costs a 304 with no body and no DB query.
+    """
+    cache = st.session_state.setdefault("http_cache", {})
+    url = f"{API_BASE_URL}{path}"
+    cached = cache.get(url)
+    if cached is not None and time.monotonic() - cached.fetched_at < fresh_for:
+        return cached
+    headers = {"If-None-Match": cached.headers["ETag"]} if cached is not None else {}
+
+    response = get_session().get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached is not None:
+        response = cached
+    elif response.status_code != 200 or "ETag" not in response.headers:
+        cache.pop(url, None)
+        return response
+    response.fetched_at = time.monotonic()
+    cache[url] = response
+    return response
+
+
+def invalidate(path: str):
+    """Forget the stored response for path (after an upload, index...)"""
+    st.session_state.setdefault("http_cache", {}).pop(f"{API_BASE_URL}{path}", None)
+
+
+def post(path: str, timeout=API_TIMEOUT, **kwargs) -> requests.Response:
+    """POST to an API path (json=, data=, files= as for requests)"""
+    return get_session().post(f"{API_BASE_URL}{path}", timeout=timeout, **kwargs)
+
+
+def post_long(path: str, **kwargs) -> requests.Response:
+    """POST that does heavy work server-side (OCR, indexing, LLM calls)"""
+    return post(path, timeout=API_LONG_TIMEOUT, **kwargs)
+
+
+@st.cache_data(ttl=HEALTH_CHECK_TTL, show_spinner=False)
+def api_is_up() -> bool:
+    """GET /healthz, remembered for HEALTH_CHECK_TTL seconds so reruns don't wait on it"""
+    try:
+        return get_session().get(f"{API_BASE_URL}/healthz", timeout=2).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def upload(file, title: str, user_id: int, doc_type: str = "document", on_progress=None) -> dict:
+    """
+    Upload a file (Streamlit UploadedFile) through the resumable upload API
+    and complete it; returns the upload's status (its OCR runs server-side
+    with doc_type's settings, see wait_for_upload). Raises RuntimeError with the API's answer on failure.
+
+    A chunk that fails (connection error, timeout, 5xx, bad checksum) is
+    retried from the offset the server has, up to UPLOAD_RETRIES times in a
+    row (looking up the server's offset counts as a try too).
+    on_progress(sent_bytes, size) is called after every chunk.
+    """
+    response = post("/documents/uploads", json={
+        "filename": file.name, "content_type": file.type, "size": file.size, "title": title, "user_id": user_id,
+        "doc_type": doc_type
+    })
+    if response.status_code != 201:
+        raise RuntimeError(f"Upload failed: {response.text}")
+    upload_path = f"/documents/uploads/{response.json()['upload_id']}"
+    chunk_size = response.json()["chunk_size"]
+
+    file_digest = hashlib.sha256()
+    offset, failures = 0, 0
+    while offset < file.size:
+        file.seek(offset)
+        chunk = file.read(chunk_size)
+        headers = {"Upload-Offset": str(offset), "X-Chunk-SHA256": hashlib.sha256(chunk).hexdigest()}
+        try:
+            response = get_session().put(
+                f"{API_BASE_URL}{upload_path}", data=chunk, headers=headers, timeout=API_LONG_TIMEOUT
+            )
+        except requests.RequestException as e:
+            response = None
+            error = str(e)
+        else:
+            error = response.text
+        if response is not None and response.status_code == 200:
+            offset = response.json()["offset"]
+            failures = 0
+            if on_progress:
+                on_progress(offset, file.size)
+            continue
+        if response is not None and response.status_code < 500 and response.status_code not in (400, 409):
+            raise RuntimeError(f"Upload failed: {error}")
+
+        # resume from what the server has (the chunk may have landed before the connection dropped);
+        # a failed lookup is retried and counted like a failed chunk
+        while True:
+            failures += 1
+            if failures > UPLOAD_RETRIES:
+                raise RuntimeError(f"Upload failed after {UPLOAD_RETRIES} retries: {error}")
+            time.sleep(min(0.5 * 2 ** failures, 10))
+            try:
+                response = get_session().get(f"{API_BASE_URL}{upload_path}", timeout=API_TIMEOUT)
+                response.raise_for_status()
+                offset = response.json()["offset"]
+                break
+            except requests.RequestException as e:
+                error = str(e)
+
+    file.seek(0)
+    for block in iter(lambda: file.read(1024 * 1024), b""):
+        file_digest.update(block)
+    response = post_long(f"{upload_path}/complete", json={"sha256": file_digest.hexdigest()})
+    if response.status_code != 202:
+        raise RuntimeError(f"Upload failed: {response.text}")
+    return response.json()
+
+
+def wait_for_upload(upload_id: str, timeout: float = API_LONG_TIMEOUT[1]) -> dict:
+    """
+    Poll a completed upload until its OCR is done or failed (or timeout runs
+    out); returns its status. Connection errors and 5xx are polled through
+    until the deadline; other errors raise RuntimeError.
+    """
+    deadline = time.monotonic() + timeout
+    status = {"status": "processing"}
+    while True:
+        try:
+            response = get_session().get(f"{API_BASE_URL}/documents/uploads/{upload_id}", timeout=API_TIMEOUT)
+        except requests.RequestException:
+            response = None
+        if response is not None and response.status_code < 500:
+            if response.status_code != 200:
+                raise RuntimeError(f"Upload status failed: {response.text}")
+            status = response.json()
+            if status["status"] != "processing":
+                return status
+        if time.monotonic() > deadline:
+            return status
+        time.sleep(UPLOAD_POLL_INTERVAL)
@@ -5,8 +5,18 @@ import os
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
-# File Upload Limits
-MAX_FILE_SIZE_MB = 10 * 1024 * 1024  # 10 MB in bytes
+# Timeouts in seconds: (connect, read). Long ones for OCR, indexing and the agent
+API_TIMEOUT = (3, 10)
+API_LONG_TIMEOUT = (3, float(os.getenv("API_LONG_TIMEOUT", "300")))
+API_POOL_SIZE = 10  # keep-alive connections to the API
+HEALTH_CHECK_TTL = 10  # seconds between /healthz checks
+DOCUMENTS_LIST_TTL = 30  # reuse the documents list without asking for this long
+
+# File Upload Limits (resumable uploads: keep in step with the API's
+# MAX_RESUMABLE_UPLOAD_BYTES and Streamlit's server.maxUploadSize)
+MAX_FILE_SIZE_MB = 500 * 1024 * 1024  # 500 MB in bytes
+UPLOAD_RETRIES = 5  # failed attempts in a row at one chunk before giving up
+UPLOAD_POLL_INTERVAL = 1  # seconds between OCR status checks
 
 # Azure OpenAI Configuration
 DEFAULT_API_VERSION = "2024-12-01-preview"
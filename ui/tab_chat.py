@@ -1,7 +1,6 @@
 """Chat tab - AI-powered chat interface"""
 import streamlit as st
-import requests
-from .config import API_BASE_URL
+from . import api_client
 
 
 def render_chat_tab():
@@ -31,7 +30,7 @@ def render_chat_tab():
                             st.markdown(
                                 f"- **Doc ID {src['doc_id']}**, "
                                 f"Chunk {src['chunk_id']} "
-                                f"(Score: {src['similarity_score']:.3f})"
+                                f"(Similarity: {src['similarity_score']:.3f})"
                             )
 
     # Chat input
@@ -52,13 +51,12 @@ def render_chat_tab():
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
                 try:
-                    response = requests.post(
-                        f"{API_BASE_URL}/ai/ask",
+                    response = api_client.post_long(
+                        "/ai/ask",
                         json={
                             "query": user_query,
                             "user_id": st.session_state.current_user_id
-                        },
-                        timeout=30
+                        }
                     )
 
                     if response.status_code >= 200 and response.status_code < 300:
@@ -76,7 +74,7 @@ def render_chat_tab():
                                     st.markdown(
                                         f"- **Doc ID {source['doc_id']}**, "
                                         f"Chunk {source['chunk_id']} "
-                                        f"(Score: {source['similarity_score']:.3f})"
+                                        f"(Similarity: {source['similarity_score']:.3f})"
                                     )
 
                         # Add to chat history
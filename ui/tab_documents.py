@@ -1,7 +1,7 @@
 """Documents tab - Document upload and management"""
 import streamlit as st
-import requests
-from .config import API_BASE_URL, MAX_FILE_SIZE_MB
+from . import api_client
+from .config import DOCUMENTS_LIST_TTL, MAX_FILE_SIZE_MB
 
 
 def render_documents_tab():
@@ -13,77 +13,82 @@ def render_documents_tab():
         return
     
     current_user = st.session_state.current_user_id
+    documents_path = f"/users/{current_user}/documents"
     st.info(f"Current User ID: {current_user}")
 
     st.subheader("Upload Document (PDF/Image)")
 
     # Size limit info
-    st.markdown("**Note:** Maximum file size is 10 MB.")
+    st.markdown("**Note:** Maximum file size is 500 MB.")
 
     uploaded_file = st.file_uploader(
-        "Choose a file (max 10 MB)",
+        "Choose a file (max 500 MB)",
         type=["pdf", "png", "jpg", "jpeg"]
     )
 
+    # Picks the OCR settings (page layout, dictionaries) on the server
+    doc_type = st.selectbox("Document type", ["document", "receipt", "form", "photo"])
+
     if uploaded_file:
         file_size = uploaded_file.size
 
         if file_size > MAX_FILE_SIZE_MB:
-            st.error("File size exceeds 10 MB limit.")
+            st.error("File size exceeds 500 MB limit.")
         else:
             st.info(f"File '{uploaded_file.name}' of size {file_size/(1024*1024):.2f} MB ready for upload.")
 
             if st.button("Upload and Index", type="primary"):
-                with st.spinner("Uploading"):
-                    try:
-                        # Upload doc
-                        files = {
-                            "file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)
-                        }
-                        data = {
-                            "title": uploaded_file.name,
-                            "user_id": current_user
-                        }
+                try:
+                    # Upload doc in chunks (resumes after a dropped connection)
+                    progress = st.progress(0.0, text="Uploading")
+                    upload = api_client.upload(
+                        uploaded_file,
+                        title=uploaded_file.name,
+                        user_id=current_user,
+                        doc_type=doc_type,
+                        on_progress=lambda sent, size: progress.progress(sent / size, text="Uploading")
+                    )
+                    progress.empty()
+                    doc_id = upload["document_id"]
+                    st.success(f"☑️ Uploaded! Doc ID: {doc_id}")
 
-                        response = requests.post(
-                            f"{API_BASE_URL}/documents/upload",
-                            files=files,
-                            data=data
-                        )
+                    # OCR runs on the server after the upload
+                    with st.spinner("Extracting text..."):
+                        upload = api_client.wait_for_upload(upload["upload_id"])
+                    api_client.invalidate(documents_path)
 
-                        if response.status_code >= 200 and response.status_code < 300:
-                            doc_data = response.json()
-                            doc_id = doc_data["document_id"]
-                            st.success(f"☑️ Uploaded! Doc ID: {doc_id}")
-                            
-                            # Auto-index
-                            with st.spinner("Indexing..."):
-                                index_response = requests.post(
-                                    f"{API_BASE_URL}/documents/index",
-                                    json={"document_ids": [doc_id]}
-                                )
+                    if upload["status"] == "done":
+                        # Auto-index
+                        with st.spinner("Indexing..."):
+                            index_response = api_client.post_long(
+                                "/documents/index",
+                                json={"document_ids": [doc_id]}
+                            )
 
-                                if index_response.status_code >= 200 and index_response.status_code < 300:
-                                    st.success("☑️ Indexing complete!")
-                                else:
-                                    st.error(f"Indexing failed: {index_response.text}")
-                                    st.info("Use document list below to retry indexing")
-                        else:
-                            st.error(f"Upload failed: {response.text}")
+                            if index_response.status_code >= 200 and index_response.status_code < 300:
+                                st.success("☑️ Indexing complete!")
+                            else:
+                                st.error(f"Indexing failed: {index_response.text}")
+                                st.info("Use document list below to retry indexing")
+                    elif upload["status"] == "failed":
+                        st.error(f"Text extraction failed: {upload['error']}")
+                    else:
+                        st.info("Text extraction is still running. Index the document from the list below once it's done.")
 
-                    except Exception as e:
-                        st.error(f"Error: {str(e)}")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
     
     st.markdown("---")
     st.subheader("My Documents")
 
     # Refresh button
     if st.button("Refresh Document List"):
+        api_client.invalidate(documents_path)
         st.rerun()
     
-    # Fetch user's documents
+    # Fetch user's documents: reused for DOCUMENTS_LIST_TTL, then revalidated (a 304 reuses the last list)
     try:
-        response = requests.get(f"{API_BASE_URL}/users/{current_user}/documents")
+        response = api_client.get(documents_path, fresh_for=DOCUMENTS_LIST_TTL)
         if response.status_code >= 200 and response.status_code < 300:
             docs = response.json()
             
@@ -100,8 +105,8 @@ def render_documents_tab():
                         if st.button("📊 Index", key=f"index_{doc['id']}"):
                             with st.spinner("Indexing..."):
                                 try:
-                                    idx_resp = requests.post(
-                                        f"{API_BASE_URL}/documents/index",
+                                    idx_resp = api_client.post_long(
+                                        "/documents/index",
                                         json={"document_ids": [doc['id']]}
                                     )
                                     if idx_resp.status_code == 200:
@@ -1,7 +1,6 @@
 """Users tab - User creation and selection"""
 import streamlit as st
-import requests
-from .config import API_BASE_URL
+from . import api_client
 
 
 def render_users_tab():
@@ -20,10 +19,9 @@ def render_users_tab():
         if st.button("Create User"):
             if new_username and new_email:
                 try:
-                    response = requests.post(
-                        f"{API_BASE_URL}/users/",
-                        json={"username": new_username, "email": new_email},
-                        timeout=5
+                    response = api_client.post(
+                        "/users/",
+                        json={"username": new_username, "email": new_email}
                     )
                     if response.status_code >= 200 and response.status_code < 300:
                         user_data = response.json()
@@ -49,10 +47,7 @@ def render_users_tab():
     if st.button("Load User"):
         # Validate user exists by checking their documents endpoint
         try:
-            response = requests.get(
-                f"{API_BASE_URL}/users/{user_id_input}/documents",
-                timeout=5
-            )
+            response = api_client.get(f"/users/{user_id_input}/documents")
             if response.status_code >= 200 and response.status_code < 300:
                 st.session_state.current_user_id = user_id_input
                 st.success(f"User {user_id_input} selected")